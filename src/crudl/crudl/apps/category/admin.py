@@ -2,10 +2,9 @@ from re import I
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 # from django_mptt_admin.admin import DjangoMpttAdmin
-from treebeard.admin import TreeAdmin
-from treebeard.forms import movenodeform_factory
 from crudl.apps.core.admin import LanguageChoicesForm
 from .models import Category, CategoryTranslations
+from .tree import TreeNodeAdmin, tree_node_form_factory
 
 class CategoryTranslationsForm(LanguageChoicesForm):
     class Meta:
@@ -20,8 +19,8 @@ class CategoryTranslationsInline(admin.StackedInline):
 
 
 @admin.register(Category)
-class CategoryAdmin(TreeAdmin):
-    form = movenodeform_factory(Category)
+class CategoryAdmin(TreeNodeAdmin):
+    form = tree_node_form_factory(Category)
     inlines = [CategoryTranslationsInline]
     fieldsets = [
         (_("Title"), {
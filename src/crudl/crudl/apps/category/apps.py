@@ -6,3 +6,6 @@ class CategoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'crudl.apps.category'
     verbose_name = _("Category")
+    
+    def ready(self):
+        from . import signals
@@ -0,0 +1,58 @@
+import contextlib
+from django.db import connection, models
+
+_benchmark_models = {}
+
+
+def get_benchmark_models():
+    """
+    Returns a dict of the names of the tree engines and the models
+    with titles stored in them, which are only defined for the benchmarks
+    and have no migrations: "treebeard", the materialized path of the
+    categories, and "mptt", the nested sets with the siblings ordered
+    by title, which the categories used before
+    """
+    if not _benchmark_models:
+        from mptt.models import MPTTModel, TreeForeignKey
+        from .tree import TreeNode
+
+        class MaterializedPathBenchmarkNode(TreeNode):
+            title = models.CharField(max_length=200)
+
+            class Meta:
+                app_label = "category"
+                db_table = "category_benchmark_materialized_path"
+
+        class NestedSetsBenchmarkNode(MPTTModel):
+            parent = TreeForeignKey("self", on_delete=models.CASCADE, blank=True, null=True, related_name="children")
+            title = models.CharField(max_length=200)
+
+            class Meta:
+                app_label = "category"
+                db_table = "category_benchmark_nested_sets"
+
+            class MPTTMeta:
+                order_insertion_by = ["title"]
+
+        _benchmark_models.update({
+            "treebeard": MaterializedPathBenchmarkNode,
+            "mptt": NestedSetsBenchmarkNode,
+        })
+    return _benchmark_models
+
+
+@contextlib.contextmanager
+def benchmark_tables():
+    """
+    Creates the tables of the benchmark models and drops them afterwards
+    """
+    benchmark_models = list(get_benchmark_models().values())
+    with connection.schema_editor() as schema_editor:
+        for model in benchmark_models:
+            schema_editor.create_model(model)
+    try:
+        yield get_benchmark_models()
+    finally:
+        with connection.schema_editor() as schema_editor:
+            for model in benchmark_models:
+                schema_editor.delete_model(model)
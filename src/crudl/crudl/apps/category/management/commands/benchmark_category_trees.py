@@ -0,0 +1,125 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Benchmarks the tree engines of the categories in temporary tables: "
+        "the materialized path of treebeard, which the categories use, and "
+        "the nested sets of MPTT ordered by title, which they used before. "
+        "Both trees get the same randomly shaped categories inserted one by "
+        "one, then the whole tree, descendants, ancestors and children are "
+        "read and subtrees are moved."
+    )
+    SILENT, NORMAL, VERBOSE, VERY_VERBOSE = 0, 1, 2, 3
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument("--categories", type=int, default=10000)
+        parser.add_argument("--reads", type=int, default=500, help="Number of each kind of reads")
+        parser.add_argument("--moves", type=int, default=100, help="Number of moved subtrees")
+        parser.add_argument("--engine", action="append", dest="engines", choices=["treebeard", "mptt"])
+
+    def handle(self, *args, **options):
+        import random
+        from ...benchmarks import benchmark_tables
+
+        self.verbosity = options.get("verbosity", self.NORMAL)
+        self.category_count = options["categories"]
+        self.read_count = options["reads"]
+        self.move_count = options["moves"]
+        self.results = []
+        generator = random.Random(0)
+        # every hundredth category is a root, the others are added under
+        # a random earlier one with a random title, so that the siblings
+        # ordered by title are inserted in the middle
+        self.parents = [
+            None if index < max(1, self.category_count // 100) else generator.randrange(index)
+            for index in range(self.category_count)
+        ]
+        self.titles = [
+            "".join(generator.choice("abcdefghijklmnopqrstuvwxyz") for letter in range(8))
+            for index in range(self.category_count)
+        ]
+        self.read_indexes = [generator.randrange(self.category_count) for index in range(self.read_count)]
+        self.moves = [
+            (generator.randrange(self.category_count), generator.randrange(self.category_count))
+            for index in range(self.move_count)
+        ]
+        with benchmark_tables() as benchmark_models:
+            for engine in options["engines"] or list(benchmark_models):
+                self.benchmark(engine, benchmark_models[engine])
+        self.finalize()
+
+    def benchmark(self, engine, model):
+        from django.db import transaction
+
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(f"=== Benchmarking {engine} with {self.category_count} categories ===\n")
+        with transaction.atomic():
+            pks = []
+
+            def insert(index):
+                parent_index = self.parents[index]
+                if engine == "treebeard":
+                    if parent_index is None:
+                        node = model.add_root(title=self.titles[index])
+                    else:
+                        node = model.objects.get(pk=pks[parent_index]).add_child(title=self.titles[index])
+                else:
+                    parent_pk = None if parent_index is None else pks[parent_index]
+                    node = model.objects.create(title=self.titles[index], parent_id=parent_pk)
+                pks.append(node.pk)
+            self.measure(engine, "insert", insert, range(self.category_count))
+
+            order_by = ["path"] if engine == "treebeard" else ["tree_id", "lft"]
+            self.measure(engine, "whole tree", lambda index: list(model.objects.order_by(*order_by)), range(5))
+            for name in ("descendants", "ancestors", "children"):
+                method_name = f"get_{name}"
+                self.measure(
+                    engine, name,
+                    lambda index: list(getattr(model.objects.get(pk=pks[index]), method_name)()),
+                    self.read_indexes,
+                )
+
+            def move(indexes):
+                node = model.objects.get(pk=pks[indexes[0]])
+                target = model.objects.get(pk=pks[indexes[1]])
+                if node == target or target.is_descendant_of(node):
+                    return
+                if engine == "treebeard":
+                    node.move(target, "last-child")
+                else:
+                    node.move_to(target, "last-child")
+            self.measure(engine, "move", move, self.moves)
+            transaction.set_rollback(True)
+
+    def measure(self, engine, name, function, arguments):
+        import time
+
+        durations = []
+        for argument in arguments:
+            start = time.perf_counter()
+            function(argument)
+            durations.append((time.perf_counter() - start) * 1000)
+        self.results.append((engine, name, durations))
+        if self.verbosity >= self.VERBOSE:
+            self.stdout.write(f"{engine} {name}: {sum(durations) / 1000:.2f} s\n")
+
+    def finalize(self):
+        import statistics
+
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(
+                f"{'':<12}{'':<14}{'total s':>10}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}\n"
+            )
+            for engine, name, durations in self.results:
+                if not durations:
+                    continue
+                if len(durations) > 1:
+                    percentiles = statistics.quantiles(durations, n=100, method="inclusive")
+                else:
+                    percentiles = durations * 99
+                self.stdout.write(
+                    f"{engine:<12}{name:<14}{sum(durations) / 1000:>10.2f}{statistics.mean(durations):>10.3f}"
+                    f"{percentiles[49]:>10.3f}{percentiles[98]:>10.3f}\n"
+                )
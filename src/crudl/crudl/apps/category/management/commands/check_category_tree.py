@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Checks the tree of the categories for inconsistent paths, depths "
+        "and numbers of children, e.g. after importing categories or after "
+        "migrating from another tree engine, and fixes them with --fix."
+    )
+    SILENT, NORMAL, VERBOSE, VERY_VERBOSE = 0, 1, 2, 3
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument("--fix", action="store_true", help="Recompute the depths and numbers of children")
+        parser.add_argument("--fix-paths", action="store_true", help="Also rewrite the paths without gaps")
+
+    def handle(self, *args, **options):
+        from ...models import Category
+        from ...tree import find_problems, fix_tree
+
+        self.verbosity = options.get("verbosity", self.NORMAL)
+        problems = find_problems(Category)
+        if self.verbosity >= self.NORMAL:
+            for name, pks in problems.items():
+                self.stdout.write(f"{name}: {len(pks)} categories\n")
+                if self.verbosity >= self.VERBOSE:
+                    self.stdout.write(", ".join(str(pk) for pk in pks) + "\n")
+        if options["fix"] or options["fix_paths"]:
+            fix_tree(Category, fix_paths=options["fix_paths"])
+            problems = find_problems(Category)
+        if self.verbosity >= self.NORMAL:
+            if problems:
+                self.stdout.write(self.style.WARNING("The tree of the categories has problems\n"))
+            else:
+                self.stdout.write("The tree of the categories is consistent\n")
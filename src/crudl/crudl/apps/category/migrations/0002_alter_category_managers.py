@@ -0,0 +1,18 @@
+# Generated by Django 4.0.5 on 2026-10-18 09:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='category',
+            managers=[
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.0.5 on 2026-10-18 09:30
+
+import crudl.apps.core.model_fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0002_alter_category_managers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='multilingual_title',
+            field=crudl.apps.core.model_fields.MultilingualCharField(blank=True, default=dict, editable=False, max_length=200, verbose_name='Title in all languages'),
+        ),
+    ]
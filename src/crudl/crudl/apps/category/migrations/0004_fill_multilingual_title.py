@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.db import migrations
+
+CHUNK_SIZE = 500
+
+
+def fill_multilingual_title(apps, schema_editor):
+    Category = apps.get_model("category", "Category")
+    qs = Category.objects.order_by("pk").prefetch_related("translations")
+    for start in range(0, qs.count(), CHUNK_SIZE):
+        for category in qs[start:start + CHUNK_SIZE]:
+            category.multilingual_title = {settings.LANGUAGE_CODE: category.title}
+            for translation in category.translations.all():
+                category.multilingual_title[translation.language] = translation.title
+            category.save(update_fields=["multilingual_title"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0003_category_multilingual_title'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_multilingual_title, migrations.RunPython.noop),
+    ]
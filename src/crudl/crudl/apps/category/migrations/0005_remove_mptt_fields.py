@@ -0,0 +1,58 @@
+# Generated by Django 4.0.5 on 2026-10-18 09:54
+
+import collections
+from django.db import migrations
+
+CHUNK_SIZE = 500
+# length of a step of the materialized paths of treebeard
+STEPLEN = 4
+
+
+def fix_depth_and_numchild(apps, schema_editor):
+    # the paths were always maintained by treebeard and stay as they are,
+    # the depths and the numbers of children are recomputed from them
+    Category = apps.get_model("category", "Category")
+    paths = list(Category.objects.values_list("path", flat=True))
+    numchild = collections.Counter(path[:-STEPLEN] for path in paths if len(path) > STEPLEN)
+    changed = []
+    for category in Category.objects.only("path", "depth", "numchild").iterator(chunk_size=CHUNK_SIZE):
+        depth = len(category.path) // STEPLEN
+        if (category.depth, category.numchild) != (depth, numchild[category.path]):
+            category.depth, category.numchild = depth, numchild[category.path]
+            changed.append(category)
+    Category.objects.bulk_update(changed, ["depth", "numchild"], batch_size=CHUNK_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0004_fill_multilingual_title'),
+    ]
+
+    operations = [
+        migrations.RunPython(fix_depth_and_numchild, migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name='category',
+            options={'ordering': ['path'], 'verbose_name': 'Category', 'verbose_name_plural': 'Categories'},
+        ),
+        migrations.RemoveField(
+            model_name='category',
+            name='level',
+        ),
+        migrations.RemoveField(
+            model_name='category',
+            name='lft',
+        ),
+        migrations.RemoveField(
+            model_name='category',
+            name='parent',
+        ),
+        migrations.RemoveField(
+            model_name='category',
+            name='rght',
+        ),
+        migrations.RemoveField(
+            model_name='category',
+            name='tree_id',
+        ),
+    ]
@@ -1,26 +1,42 @@
 from multiprocessing import parent_process
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from mptt.models import MPTTModel
-from mptt.fields import TreeForeignKey
-from treebeard.mp_tree import MP_Node
-from crudl.apps.core.models import CreationModificationDateBase
-from crudl.apps.core.model_fields import TranslatedField
+from crudl.apps.core.models import CreationModificationDateBase, MultilingualSyncBase
+from crudl.apps.core.model_fields import TranslatedField, MultilingualCharField
+from crudl.apps.core.managers import TranslatedQuerySetMixin
+from .tree import TreeNode, TreeNodeManager, TreeNodeQuerySet
 
 
-class Category(MP_Node, MPTTModel, CreationModificationDateBase):
-    parent = TreeForeignKey("self", on_delete=models.CASCADE, blank=True, null=True, related_name="children")
+class CategoryQuerySet(TranslatedQuerySetMixin, TreeNodeQuerySet):
+    pass
+
+
+class CategoryManager(TreeNodeManager):
+    def get_queryset(self):
+        return CategoryQuerySet(self.model).order_by("path")
+
+    def with_translations(self, *related_lookups, language=None):
+        return self.get_queryset().with_translations(*related_lookups, language=language)
+
+    def annotate_translations(self, *field_names, language=None):
+        return self.get_queryset().annotate_translations(*field_names, language=language)
+
+
+class Category(TreeNode, CreationModificationDateBase, MultilingualSyncBase):
     title = models.CharField(_("Title"),max_length=200)
     translated_title = TranslatedField("title")
+    multilingual_title = MultilingualCharField(
+        _("Title in all languages"), max_length=200, editable=False
+    )
+    multilingual_fields = {"title": "multilingual_title"}
+
+    objects = CategoryManager()
     
     class Meta:
-        ordering = ["tree_id", "lft"]
+        ordering = ["path"]
         verbose_name = _("Category")
         verbose_name_plural = _("Categories")
     
-    class MPTTMeta:
-        order_insertion_by = ["title"]
-    
     def __str__(self):
         return self.title
 
@@ -42,4 +58,16 @@ class CategoryTranslations(models.Model):
         unique_together = [["category", "language"]]
     
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.category.sync_multilingual_fields()
+    save.alters_data = True
+
+    def delete(self, *args, **kwargs):
+        category = self.category
+        result = super().delete(*args, **kwargs)
+        category.sync_multilingual_fields()
+        return result
+    delete.alters_data = True
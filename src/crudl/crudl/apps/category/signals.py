@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from crudl.apps.core import translation_cache
+from . import snapshots
+from .models import Category, CategoryTranslations
+from .tree import node_moved
+
+
+@receiver(post_save, sender=CategoryTranslations)
+@receiver(post_delete, sender=CategoryTranslations)
+def category_translations_changed_handler(sender, **kwargs):
+    # The modification time is a part of the translation cache keys
+    translation_cache.touch(Category, kwargs["instance"].category_id)
+
+
+@receiver(post_delete, sender=Category)
+def category_delete_handler(sender, **kwargs):
+    translation_cache.delete(kwargs["instance"])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(node_moved, sender=Category)
+@receiver(post_save, sender=CategoryTranslations)
+@receiver(post_delete, sender=CategoryTranslations)
+def category_tree_changed_handler(sender, **kwargs):
+    # a snapshot built before the commit would be cached with the new generation
+    transaction.on_commit(snapshots.invalidate)
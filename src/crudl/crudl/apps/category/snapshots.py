@@ -0,0 +1,164 @@
+import array
+import threading
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import translation
+from crudl.apps.core import generations
+
+CACHE_ALIAS = getattr(settings, "CATEGORY_TREE_CACHE_ALIAS", "default")
+CACHE_TIMEOUT = getattr(settings, "CATEGORY_TREE_CACHE_TIMEOUT", 60 * 60 * 24)
+GENERATION_KEY = "category-tree:generation"
+
+# language codes and (generation, snapshot) tuples of this process
+_local_snapshots = {}
+_local_lock = threading.Lock()
+
+
+class TreeSnapshotNode(object):
+    """
+    Category of a tree snapshot, which renders in the templates
+    and form fields like a Category instance without queries
+    """
+    __slots__ = ("snapshot", "index")
+
+    def __init__(self, snapshot, index):
+        self.snapshot = snapshot
+        self.index = index
+
+    def __str__(self):
+        return self.title
+
+    def __repr__(self):
+        return f"<TreeSnapshotNode: {self.title}>"
+
+    def __eq__(self, other):
+        return isinstance(other, TreeSnapshotNode) and self.pk == other.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    @property
+    def pk(self):
+        return self.snapshot.pks[self.index]
+
+    @property
+    def title(self):
+        return self.snapshot.titles[self.index]
+
+    translated_title = title
+
+    @property
+    def parent(self):
+        parent_index = self.snapshot.parents[self.index]
+        return None if parent_index < 0 else self.snapshot.nodes[parent_index]
+
+    def get_level(self):
+        return self.snapshot.levels[self.index]
+
+    def is_leaf_node(self):
+        index = self.index + 1
+        return index == len(self.snapshot) or self.snapshot.parents[index] != self.index
+
+
+class TreeSnapshot(object):
+    """
+    The category forest in one language in depth-first order as parallel
+    arrays of the pks, the indexes of the parents (-1 for the roots),
+    the levels and the translated titles, which pickle compactly
+    """
+    def __init__(self, lang_code, pks, parents, levels, titles):
+        self.lang_code = lang_code
+        self.pks = pks
+        self.parents = parents
+        self.levels = levels
+        self.titles = titles
+        self._nodes = None
+        self._indexes = None
+
+    def __getstate__(self):
+        return (self.lang_code, self.pks, self.parents, self.levels, self.titles)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __len__(self):
+        return len(self.pks)
+
+    @property
+    def nodes(self):
+        """
+        List of all nodes in depth-first order
+        """
+        if self._nodes is None:
+            self._nodes = [TreeSnapshotNode(self, index) for index in range(len(self))]
+        return self._nodes
+
+    def get_node(self, pk):
+        """
+        Returns the node of the category or None, if it doesn't exist
+        """
+        if self._indexes is None:
+            self._indexes = {pk: index for index, pk in enumerate(self.pks)}
+        index = self._indexes.get(pk)
+        return None if index is None else self.nodes[index]
+
+
+def build_tree_snapshot(lang_code):
+    """
+    Reads the categories with one query and returns their tree snapshot in the language
+    """
+    from .models import Category
+    from .tree import get_tree_rows
+
+    pks, parents, levels = array.array("q"), array.array("l"), array.array("H")
+    titles = []
+    # indexes of the ancestors of the current node
+    ancestors = []
+    for index, (pk, level, multilingual_title) in enumerate(
+        get_tree_rows(Category.objects.all(), "multilingual_title")
+    ):
+        del ancestors[level:]
+        pks.append(pk)
+        parents.append(ancestors[-1] if ancestors else -1)
+        levels.append(level)
+        titles.append(multilingual_title.get_translation(lang_code))
+        ancestors.append(index)
+    return TreeSnapshot(lang_code, pks, parents, levels, titles)
+
+
+def get_generation():
+    return generations.get_generation(GENERATION_KEY, CACHE_ALIAS)
+
+
+def get_tree_snapshot(lang_code=None):
+    """
+    Returns the tree snapshot of the categories in the language or in the
+    active language. It is kept in this process and in the shared cache,
+    until the generation is increased, so the database is only queried
+    once per language after each change of the categories.
+    """
+    lang_code = lang_code or translation.get_language() or settings.LANGUAGE_CODE
+    generation = get_generation()
+    local = _local_snapshots.get(lang_code)
+    if local and local[0] == generation:
+        return local[1]
+    cache = caches[CACHE_ALIAS]
+    key = f"category-tree:{generation}:{lang_code}"
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_tree_snapshot(lang_code)
+        cache.set(key, snapshot, timeout=CACHE_TIMEOUT)
+    with _local_lock:
+        _local_snapshots[lang_code] = (generation, snapshot)
+    return snapshot
+
+
+def get_tree_nodes(lang_code=None):
+    return get_tree_snapshot(lang_code).nodes
+
+
+def invalidate():
+    """
+    Makes the tree snapshots of all languages obsolete in all processes
+    """
+    generations.bump_generation(GENERATION_KEY, CACHE_ALIAS)
@@ -0,0 +1,55 @@
+from django import template
+from django.utils.safestring import mark_safe
+from ..tree import get_forest
+
+register = template.Library()
+
+
+class RecurseTreeNode(template.Node):
+    def __init__(self, template_nodes, nodes_var):
+        self.template_nodes = template_nodes
+        self.nodes_var = template.Variable(nodes_var)
+
+    def render_node(self, context, node, children):
+        rendered_children = [
+            self.render_node(context, child, grandchildren) for child, grandchildren in children
+        ]
+        with context.push(node=node, children=mark_safe("".join(rendered_children))):
+            return self.template_nodes.render(context)
+
+    def render(self, context):
+        nodes = self.nodes_var.resolve(context)
+        return "".join(
+            self.render_node(context, node, children) for node, children in get_forest(nodes)
+        )
+
+
+@register.tag
+def recursetree(parser, token):
+    """
+    Usage:
+        {% recursetree categories %}
+            <li>{{ node.title }}<ul>{{ children }}</ul></li>
+        {% endrecursetree %}
+    renders the tree nodes in depth-first order recursively,
+    where "children" are the rendered children of the "node".
+    """
+    try:
+        tag_name, nodes_var = token.split_contents()
+    except ValueError:
+        tag_name = token.contents.split()[0]
+        raise template.TemplateSyntaxError(
+            f"{tag_name} tag requires a single argument"
+        )
+    template_nodes = parser.parse(("endrecursetree",))
+    parser.delete_first_token()
+    return RecurseTreeNode(template_nodes, nodes_var)
+
+
+@register.filter
+def count_of(counts, node):
+    """
+    Usage: {{ idea_counts|count_of:node }}
+    returns the count of the node in the dictionary of pks and counts or 0
+    """
+    return counts.get(node.pk, 0)
@@ -1,3 +1,111 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase
+from crudl.apps.core.form_fields import MultipleChoiceTreeField, TreeNodeChoiceField
+from . import snapshots
+from .models import Category, CategoryTranslations
+from .tree import find_problems, get_forest
 
-# Create your tests here.
+
+class CategoryTreeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.art = Category.add_root(title="Art")
+        cls.painting = cls.art.add_child(title="Painting")
+        cls.watercolor = cls.painting.add_child(title="Watercolor")
+        cls.sculpture = cls.art.add_child(title="Sculpture")
+        cls.music = Category.add_root(title="Music")
+
+    def test_nodes_are_ordered_depth_first(self):
+        categories = list(Category.objects.all())
+        self.assertEqual(
+            [(category.title, category.get_level()) for category in categories],
+            [("Art", 0), ("Painting", 1), ("Watercolor", 2), ("Sculpture", 1), ("Music", 0)],
+        )
+        forest = get_forest(categories)
+        self.assertEqual([node for node, children in forest], [self.art, self.music])
+        self.assertEqual([node for node, children in forest[0][1]], [self.painting, self.sculpture])
+        # the nodes without their parent in the list are roots
+        self.assertEqual([node for node, children in get_forest(categories[1:3])], [self.painting])
+        self.assertEqual(find_problems(Category), {})
+
+    def test_recursetree_renders_the_nested_nodes(self):
+        template = Template(
+            "{% load category_tags %}{% recursetree categories %}"
+            "{{ node.title }}{% if not node.is_leaf_node %}({{ children }}){% endif %} "
+            "{% endrecursetree %}"
+        )
+        with self.assertNumQueries(1):
+            rendered = template.render(Context({"categories": Category.objects.all()}))
+        self.assertEqual(rendered, "Art(Painting(Watercolor ) Sculpture ) Music ")
+
+    def test_form_fields_indent_the_labels_by_level(self):
+        field = TreeNodeChoiceField(queryset=Category.objects.all(), level_indicator="-")
+        self.assertEqual([label for value, label in field.choices][1:4], ["Art", "- Painting", "-- Watercolor"])
+        field = MultipleChoiceTreeField(queryset=Category.objects.all())
+        self.assertEqual([label for value, label in field.choices][1], "&nbsp;&nbsp;&nbsp;&nbsp; Painting")
+
+
+class CategoryTreeSnapshotTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.art = Category.add_root(title="Art")
+        cls.painting = cls.art.add_child(title="Painting")
+        CategoryTranslations.objects.create(category=cls.painting, language="de", title="Malerei")
+        cls.music = Category.add_root(title="Music")
+
+    def setUp(self):
+        cache.clear()
+        snapshots._local_snapshots.clear()
+
+    def test_snapshot_is_built_once_per_language(self):
+        with self.assertNumQueries(1):
+            snapshot = snapshots.get_tree_snapshot("de")
+        self.assertEqual(list(snapshot.pks), [self.art.pk, self.painting.pk, self.music.pk])
+        self.assertEqual(list(snapshot.parents), [-1, 0, -1])
+        self.assertEqual(list(snapshot.levels), [0, 1, 0])
+        self.assertEqual(snapshot.titles, ["Art", "Malerei", "Music"])
+        node = snapshot.get_node(self.painting.pk)
+        self.assertEqual(node.parent.pk, self.art.pk)
+        self.assertTrue(node.is_leaf_node())
+        self.assertFalse(node.parent.is_leaf_node())
+        with self.assertNumQueries(0):
+            self.assertIs(snapshots.get_tree_snapshot("de"), snapshot)
+            # other processes unpickle the snapshot from the shared cache
+            snapshots._local_snapshots.clear()
+            self.assertEqual(snapshots.get_tree_snapshot("de").titles, snapshot.titles)
+
+    def test_snapshots_are_invalidated_by_changes(self):
+        self.assertEqual(snapshots.get_tree_snapshot("de").titles[1], "Malerei")
+        CategoryTranslations.objects.filter(category=self.painting).update(title="Gemälde")
+        self.assertEqual(snapshots.get_tree_snapshot("de").titles[1], "Malerei")
+        with self.captureOnCommitCallbacks(execute=True):
+            CategoryTranslations.objects.get(category=self.painting).save()
+            # the generation is only increased, when the transaction is committed
+            self.assertEqual(snapshots.get_tree_snapshot("de").titles[1], "Malerei")
+        self.assertEqual(snapshots.get_tree_snapshot("de").titles[1], "Gemälde")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.get(pk=self.painting.pk).move(Category.objects.get(pk=self.music.pk), "last-child")
+        snapshot = snapshots.get_tree_snapshot("en")
+        self.assertEqual(list(snapshot.pks), [self.art.pk, self.music.pk, self.painting.pk])
+        self.assertEqual(list(snapshot.parents), [-1, -1, 1])
+
+    def test_forms_and_category_list_render_without_queries(self):
+        from crudl.apps.ideas.facets import get_facet_counts
+        from crudl.apps.ideas.forms import IdeaFilterForm
+        from .views import IdeaCategoryListView
+
+        snapshots.get_tree_snapshot("en")
+        # the idea counts of the category list are cached with the facets
+        get_facet_counts({})
+        with self.assertNumQueries(0):
+            rendered = str(IdeaFilterForm()["category"])
+        self.assertIn("&nbsp;&nbsp;&nbsp;&nbsp; Painting", rendered)
+        with self.assertNumQueries(0):
+            response = IdeaCategoryListView.as_view()(RequestFactory().get("/idea-categories/"))
+            rendered = Template(
+                "{% load category_tags %}{% recursetree categories %}"
+                "{{ node.title }}:{{ idea_counts|count_of:node }} {{ children }}{% endrecursetree %}"
+            ).render(Context(response.context_data))
+        self.assertEqual(rendered, "Art:0 Painting:0 Music:0 ")
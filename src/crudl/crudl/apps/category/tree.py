@@ -0,0 +1,132 @@
+"""
+The tree engine of the categories.
+
+The categories are a materialized path tree of django-treebeard: each node
+stores the path of its parent with its own step appended, its depth and the
+number of its children, so the depth-first order is the order of the paths
+and a subtree is a range of paths. The model, the admin, the form fields and
+the templates use the tree through this module.
+"""
+from django.db import models
+from django.db.models.functions import Concat
+from django.dispatch import Signal
+from treebeard.admin import TreeAdmin
+from treebeard.forms import movenodeform_factory
+from treebeard.mp_tree import MP_Node, MP_NodeManager, MP_NodeQuerySet
+
+TreeNodeQuerySet = MP_NodeQuerySet
+TreeNodeManager = MP_NodeManager
+TreeNodeAdmin = TreeAdmin
+# form of the admin with the position and the relative node of a moved node
+tree_node_form_factory = movenodeform_factory
+# sent with the instance after moving it, as the nodes
+# of the moved subtree are updated without saving them
+node_moved = Signal()
+
+
+class TreeNode(MP_Node):
+    """
+    Abstract node of a tree ordered depth-first by the path.
+    The roots and children are added with add_root() and add_child()
+    and moved with move(), as the bookkeeping fields aren't editable.
+    """
+    class Meta:
+        abstract = True
+
+    def get_level(self):
+        """
+        Returns the level of the node starting with 0 for the roots
+        """
+        return self.depth - 1
+
+    def is_leaf_node(self):
+        return self.numchild == 0
+
+    def move(self, target, pos=None):
+        super().move(target, pos)
+        node_moved.send(sender=type(self), instance=self)
+    move.alters_data = True
+
+    @classmethod
+    def get_subtree_suffix(cls):
+        """
+        Returns the string, which appended to the path of a node is the
+        upper bound of the paths in its subtree, as the steps only consist
+        of the characters of the alphabet up to the last one
+        """
+        return cls.alphabet[-1] * cls._meta.get_field("path").max_length
+
+    @classmethod
+    def get_subtree_filter(cls, path, prefix=""):
+        """
+        Returns a Q object for the nodes in the subtree of the node with the
+        path (a string or an expression like OuterRef("path")) including the
+        node as one range of the indexed paths. Unlike the LIKE pattern of
+        path__startswith the range uses the index with any collation of
+        PostgreSQL and with the case-insensitive LIKE of SQLite.
+        """
+        if isinstance(path, str):
+            upper_bound = path + cls.get_subtree_suffix()
+        else:
+            upper_bound = Concat(path, models.Value(cls.get_subtree_suffix()), output_field=models.CharField())
+        return models.Q(**{f"{prefix}path__gte": path, f"{prefix}path__lte": upper_bound})
+
+    @classmethod
+    def get_subtree_join_sql(cls, connection, ancestor_alias, descendant_alias):
+        """
+        Returns the SQL condition and its parameters for joining
+        the nodes of the table aliases with the nodes in their subtrees
+        """
+        ancestor_path = f"{connection.ops.quote_name(ancestor_alias)}.{connection.ops.quote_name('path')}"
+        descendant_path = f"{connection.ops.quote_name(descendant_alias)}.{connection.ops.quote_name('path')}"
+        return (
+            f"{descendant_path} BETWEEN {ancestor_path} AND {ancestor_path} || %s",
+            [cls.get_subtree_suffix()],
+        )
+
+
+def get_tree_rows(queryset, *field_names):
+    """
+    Returns a list of (pk, level, *values) tuples
+    of the nodes of the queryset in depth-first order
+    """
+    return [
+        (pk, depth - 1, *values)
+        for pk, depth, *values in queryset.order_by("path").values_list("pk", "depth", *field_names)
+    ]
+
+
+def get_forest(nodes):
+    """
+    Returns a list of (node, children) tuples of the roots, where the
+    children are lists of the same tuples, from the nodes in depth-first
+    order. The nodes without their parent in the list are taken as roots.
+    """
+    forest = []
+    # the (level, children) of the ancestors of the current node
+    stack = [(-1, forest)]
+    for node in nodes:
+        level = node.get_level()
+        while stack[-1][0] >= level:
+            stack.pop()
+        children = []
+        stack[-1][1].append((node, children))
+        stack.append((level, children))
+    return forest
+
+
+def find_problems(model):
+    """
+    Returns a dict of the problems of the tree and the pks of their nodes
+    """
+    names = ("invalid characters", "invalid step length", "orphans", "wrong depth", "wrong number of children")
+    return {name: pks for name, pks in zip(names, model.find_problems()) if pks}
+
+
+def fix_tree(model, fix_paths=False):
+    """
+    Recomputes the depths and the numbers of children of the nodes,
+    and with fix_paths also rewrites the paths without gaps,
+    e.g. after importing the nodes or editing them with SQL
+    """
+    model.fix_tree(fix_paths=fix_paths)
@@ -1,9 +1,23 @@
 from django.shortcuts import render
 from django.views.generic import ListView
 from .models import Category
+from .snapshots import get_tree_nodes
 
 
 class IdeaCategoryListView(ListView):
     model = Category
-    template_name = "categories/category_list.html"
+    template_name = "category/category_list.html"
     context_object_name = "categories"
+
+    def get_queryset(self):
+        # rendered from the cached tree snapshot without queries
+        return get_tree_nodes()
+
+    def get_context_data(self, **kwargs):
+        from crudl.apps.ideas.facets import get_facet_counts
+
+        context = super().get_context_data(**kwargs)
+        # the ideas of each category including its descendants, cached
+        # with the facets of the idea list until an idea is changed
+        context["idea_counts"] = get_facet_counts({})["category"]
+        return context
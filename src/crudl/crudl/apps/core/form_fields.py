@@ -1,8 +1,56 @@
 from django import forms
+from django.utils.html import conditional_escape, format_html
+from django.utils.safestring import mark_safe
 
 
-class MultipleChoiceTreeField(forms.ModelMultipleChoiceField):
-    widget = forms.CheckboxSelectMultiple
+class TreeNodeChoiceIterator(forms.models.ModelChoiceIterator):
+    """
+    Iterates through the tree nodes returned by the nodes function
+    of the field, e.g. from a cache, instead of the queryset
+    """
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for node in self.field.nodes():
+            yield (node.pk, self.field.label_from_instance(node))
+
+    def __len__(self):
+        return len(self.field.nodes()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.nodes())
+
+
+class TreeNodeLabelMixin(object):
+    """
+    Indents the labels of the tree nodes, which have get_level(),
+    by repeating the level indicator for each level.
+    With the nodes function the choices are rendered from the returned
+    nodes in depth-first order, while the queryset still validates them.
+    """
+    level_indicator = "---"
+
+    def __init__(self, *args, level_indicator=None, nodes=None, **kwargs):
+        if level_indicator is not None:
+            self.level_indicator = level_indicator
+        self.nodes = nodes
+        if nodes is not None:
+            self.iterator = TreeNodeChoiceIterator
+        super().__init__(*args, **kwargs)
 
     def label_from_instance(self, obj):
-        return obj
\ No newline at end of file
+        label = super().label_from_instance(obj)
+        level = obj.get_level()
+        if not level:
+            return label
+        indentation = mark_safe(conditional_escape(self.level_indicator) * level)
+        return format_html("{} {}", indentation, label)
+
+
+class TreeNodeChoiceField(TreeNodeLabelMixin, forms.ModelChoiceField):
+    pass
+
+
+class MultipleChoiceTreeField(TreeNodeLabelMixin, forms.ModelMultipleChoiceField):
+    widget = forms.CheckboxSelectMultiple
+    level_indicator = mark_safe("&nbsp;&nbsp;&nbsp;&nbsp;")
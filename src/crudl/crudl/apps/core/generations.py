@@ -0,0 +1,34 @@
+"""
+Generation counters in the cache, which are a part of the cache keys
+of derived data, so that increasing the counter makes the data cached
+with the older generations obsolete in all processes at once.
+"""
+import time
+from django.core.cache import caches
+
+
+def get_initial_generation():
+    # starting from the current time in milliseconds, the generation doesn't
+    # go back to a value used before, if the counter is evicted from the cache
+    return int(time.time() * 1000)
+
+
+def get_generation(key, alias="default"):
+    return caches[alias].get_or_set(key, get_initial_generation, timeout=None)
+
+
+async def aget_generation(key, alias="default"):
+    return await caches[alias].aget_or_set(key, get_initial_generation, timeout=None)
+
+
+def bump_generation(key, alias="default"):
+    """
+    Increases the generation counter with the key in the cache
+    """
+    cache = caches[alias]
+    if not cache.add(key, get_initial_generation(), timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # the key was evicted between add() and incr()
+            cache.add(key, get_initial_generation(), timeout=None)
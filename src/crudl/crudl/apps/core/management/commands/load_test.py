@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Sends concurrent GET requests to the given URLs and reports "
+        "throughput and latency percentiles, e.g. to compare the sync "
+        "gunicorn workers with the ASGI server."
+    )
+    SILENT, NORMAL, VERBOSE, VERY_VERBOSE = 0, 1, 2, 3
+
+    def add_arguments(self, parser):
+        # Positional arguments
+        parser.add_argument("urls", nargs="+", type=str)
+        # Named (optional) arguments
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--timeout", type=float, default=30)
+
+    def handle(self, *args, **options):
+        self.verbosity = options.get("verbosity", self.NORMAL)
+        self.urls = options["urls"]
+        self.concurrency = options["concurrency"]
+        self.request_count = options["requests"]
+        self.timeout = options["timeout"]
+        self.prepare()
+        self.main()
+        self.finalize()
+
+    def prepare(self):
+        self.latencies = []
+        self.status_codes = {}
+        self.error_counter = 0
+
+    def main(self):
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(
+                f"=== Sending {self.request_count} requests with concurrency {self.concurrency} ===\n"
+            )
+        urls = [self.urls[index % len(self.urls)] for index in range(self.request_count)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for status_code, latency in executor.map(self.fetch, urls):
+                self.status_codes[status_code] = self.status_codes.get(status_code, 0) + 1
+                if status_code is None:
+                    self.error_counter += 1
+                else:
+                    self.latencies.append(latency)
+        self.duration = time.perf_counter() - start
+
+    def fetch(self, url):
+        import time
+        from urllib.error import HTTPError, URLError
+        from urllib.request import urlopen
+
+        start = time.perf_counter()
+        try:
+            with urlopen(url, timeout=self.timeout) as response:
+                response.read()
+                status_code = response.status
+        except HTTPError as error:
+            status_code = error.code
+        except (URLError, OSError):
+            status_code = None
+        return status_code, time.perf_counter() - start
+
+    def get_percentile(self, sorted_latencies, percent):
+        index = min(len(sorted_latencies) - 1, int(round(percent / 100 * (len(sorted_latencies) - 1))))
+        return sorted_latencies[index] * 1000
+
+    def finalize(self):
+        if self.verbosity >= self.NORMAL:
+            latencies = sorted(self.latencies)
+            self.stdout.write(f"-------------------------\n")
+            self.stdout.write(f"Duration        : {self.duration:.2f} s\n")
+            self.stdout.write(f"Throughput      : {len(latencies) / self.duration:.1f} requests/s\n")
+            self.stdout.write(f"Failed requests : {self.error_counter}\n")
+            self.stdout.write(f"Status codes    : {self.status_codes}\n")
+            if latencies:
+                for percent in (50, 90, 99):
+                    self.stdout.write(f"p{percent}             : {self.get_percentile(latencies, percent):.1f} ms\n")
+                self.stdout.write(f"max             : {latencies[-1] * 1000:.1f} ms\n")
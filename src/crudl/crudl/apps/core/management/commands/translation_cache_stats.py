@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help: str = "Shows the hit and miss counters of the translation cache."
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument("--reset", action="store_true", help="Reset the counters")
+
+    def handle(self, *args, **options):
+        from crudl.apps.core import translation_cache
+
+        stats = translation_cache.get_stats()
+        self.stdout.write(f"In-process hits : {stats['local_hits']}\n")
+        self.stdout.write(f"Shared hits     : {stats['shared_hits']}\n")
+        self.stdout.write(f"Misses          : {stats['misses']}\n")
+        self.stdout.write(f"Hit ratio       : {stats['hit_ratio']:.1%}\n")
+        if options["reset"]:
+            translation_cache.reset_stats()
+            self.stdout.write("Counters reset.\n")
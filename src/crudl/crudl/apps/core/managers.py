@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.db import models
+from django.db.models.functions import Coalesce
+from django.utils import translation
+from .model_fields import load_translations
+
+
+class TranslatedQuerySetMixin(object):
+    """
+    Queryset mixin for models having a "translations" relation
+    with a "language" field, which is read by TranslatedField.
+    """
+    _translations_language = None
+
+    def with_translations(self, *related_lookups, language=None):
+        """
+        Loads the translations of the given (or active) language for
+        all rows at once, when the queryset is evaluated, so that
+        TranslatedField doesn't have to query the database per
+        instance and attribute. Translations from the translation
+        cache are reused and the rest is read in one query.
+
+        Args:
+            related_lookups: names of relations, whose models also use
+                TranslatedQuerySetMixin, e.g. "categories" for ideas.
+            language: language code, defaults to the active language.
+        """
+        lang_code = language or translation.get_language() or settings.LANGUAGE_CODE
+        qs = self._chain()
+        if lang_code != settings.LANGUAGE_CODE:
+            qs._translations_language = lang_code
+        for lookup in related_lookups:
+            related_model = self.model._meta.get_field(lookup).related_model
+            qs = qs.prefetch_related(models.Prefetch(
+                lookup,
+                queryset=related_model.objects.with_translations(language=lang_code),
+            ))
+        return qs
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._translations_language = self._translations_language
+        return clone
+
+    def _fetch_all(self):
+        is_loaded = self._result_cache is not None
+        super()._fetch_all()
+        if (
+            not is_loaded
+            and self._translations_language
+            and issubclass(self._iterable_class, models.query.ModelIterable)
+        ):
+            load_translations(self._result_cache, self._translations_language)
+
+    def annotate_translations(self, *field_names, language=None):
+        """
+        Annotates translated_<field_name> for each of the given fields
+        with the value of the given (or active) language, falling back
+        to the value of the default language, so that the translated
+        values can be used for ordering, filtering and pagination
+        in the database.
+
+        The annotations shadow the TranslatedField descriptors
+        of the same name on the returned instances.
+        """
+        lang_code = language or translation.get_language() or settings.LANGUAGE_CODE
+        annotations = {}
+        for field_name in field_names:
+            if lang_code == settings.LANGUAGE_CODE:
+                annotations[f"translated_{field_name}"] = models.F(field_name)
+                continue
+            translations_relation = self.model._meta.get_field("translations")
+            translations = translations_relation.related_model.objects.filter(
+                **{translations_relation.field.name: models.OuterRef("pk")},
+                language=lang_code,
+            ).values(field_name)[:1]
+            annotations[f"translated_{field_name}"] = Coalesce(
+                models.Subquery(translations),
+                models.F(field_name),
+            )
+        return self.annotate(**annotations)
+
+
+class TranslatedQuerySet(TranslatedQuerySetMixin, models.QuerySet):
+    pass
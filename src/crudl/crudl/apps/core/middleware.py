@@ -1,10 +1,13 @@
-from threading import local
-_thread_locals = local()
+import asyncio
+import contextvars
+from . import request_cache
+
+_current_request = contextvars.ContextVar("current_request", default=None)
 
 
 def get_current_request():
-    """:Returns the HttpRequest object for this thread"""
-    return getattr(_thread_locals, "request", None)
+    """:Returns the HttpRequest object for the current thread or asyncio task"""
+    return _current_request.get()
 
 def get_current_user():
     """:Returns the current user if it exists or None otherwise"""
@@ -13,11 +16,40 @@ def get_current_user():
         return getattr(request, "user", None)
 
 
-class ThreadLocalMiddleware(object):
-    """Middleware to add the HttpRequest to thread local storage"""
+class RequestCacheMiddleware(object):
+    """
+    Middleware to make the HttpRequest available to get_current_request()
+    and to set up the request-scoped cache of crudl.apps.core.request_cache,
+    which is cleared when the response is ready.
+
+    Both are stored in context variables, so the middleware works under
+    WSGI and ASGI, for synchronous and asynchronous views.
+    """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
-    
-    def __call__(self, request,):
-        _thread_locals.request = request
-        return self.get_response(request)
\ No newline at end of file
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Mark the instance as a coroutine function like Django's MiddlewareMixin does
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        request_token = _current_request.set(request)
+        cache_token = request_cache.start()
+        try:
+            return self.get_response(request)
+        finally:
+            request_cache.finish(cache_token)
+            _current_request.reset(request_token)
+
+    async def __acall__(self, request):
+        request_token = _current_request.set(request)
+        cache_token = request_cache.start()
+        try:
+            return await self.get_response(request)
+        finally:
+            request_cache.finish(cache_token)
+            _current_request.reset(request_token)
@@ -1,14 +1,80 @@
 from django.conf import settings
+from django.core import validators
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.fields.json import KeyTextTransform
 from django.utils.translation import  get_language
 from django.utils import translation
+from django.utils.translation import gettext_lazy as _
+
+TRANSLATIONS_CACHE_ATTR = "_translations_cache"
+
+
+def load_translations(instances, lang_code):
+    """
+    Loads the translations of the given language for all instances of
+    the same model from the translation cache and the rest in one query,
+    and memoizes them on the instances for TranslatedField
+    """
+    from . import request_cache, translation_cache
+
+    pending = [
+        instance for instance in instances
+        if instance.pk is not None
+        and lang_code not in instance.__dict__.get(TRANSLATIONS_CACHE_ATTR, {})
+    ]
+    if not pending:
+        return
+    # Objects loaded more than once in a request share the translations
+    request_translations = request_cache.get_or_set("translations", dict)
+    translations = {}
+    for instance in pending:
+        key = translation_cache.get_instance_cache_key(instance, lang_code)
+        if key in request_translations:
+            translations[instance.pk] = request_translations[key]
+    uncached = [instance for instance in pending if instance.pk not in translations]
+    if uncached:
+        translations.update(translation_cache.get_many(uncached, lang_code))
+    missing = [instance for instance in pending if instance.pk not in translations]
+    if missing:
+        relation = missing[0]._meta.get_field("translations")
+        loaded = dict.fromkeys([instance.pk for instance in missing])
+        for translation_object in relation.related_model.objects.filter(
+            **{f"{relation.field.name}__in": list(loaded)},
+            language = lang_code,
+        ):
+            loaded[getattr(translation_object, relation.field.attname)] = translation_object
+        translation_cache.set_many(missing, lang_code, loaded)
+        translations.update(loaded)
+    for instance in pending:
+        key = translation_cache.get_instance_cache_key(instance, lang_code)
+        request_translations[key] = translations[instance.pk]
+        cache = instance.__dict__.setdefault(TRANSLATIONS_CACHE_ATTR, {})
+        cache[lang_code] = translations[instance.pk]
+
+
+def get_translation(instance, lang_code):
+    """
+    Returns the translation object of the instance for the given
+    language or None. Translations loaded by
+    TranslatedQuerySetMixin.with_translations() are used when available,
+    otherwise the translation cache or a single query is used.
+    """
+    if instance.pk is None:
+        return None
+    cache = instance.__dict__.get(TRANSLATIONS_CACHE_ATTR, {})
+    if lang_code not in cache:
+        load_translations([instance], lang_code)
+    return instance.__dict__[TRANSLATIONS_CACHE_ATTR][lang_code]
 
 
 class TranslatedField(object):
     def __init__(self, field_name):
         self.field_name = field_name
-    
+
     def __get__(self, instance, owner):
+        if instance is None:
+            return self
         lang_code = translation.get_language()
         if lang_code == settings.LANGUAGE_CODE:
             # The fields of the default language are in the manin model
@@ -16,7 +82,99 @@ class TranslatedField(object):
         else:
             # The fields of the orther languages are in the translation
             # Model, but falls back to the main model
-            translations = instance.translations.filter(
-                language = lang_code,
-            ).first() or instance
-            return getattr(translations, self.field_name)
\ No newline at end of file
+            translations = get_translation(instance, lang_code) or instance
+            return getattr(translations, self.field_name)
+
+
+class MultilingualValue(dict):
+    """
+    Dictionary of language codes and values, which renders
+    as the value of the active language
+    """
+    def get_translation(self, lang_code=None):
+        lang_code = lang_code or get_language() or settings.LANGUAGE_CODE
+        return self.get(lang_code) or self.get(settings.LANGUAGE_CODE, "")
+
+    @property
+    def translated(self):
+        return self.get_translation()
+
+    def __str__(self):
+        return str(self.translated)
+
+
+class MultilingualFieldMixin(object):
+    """
+    Stores the values of all languages in one JSON column, e.g.
+    {"en": "Park Güell", "de": "Park Güell in Barcelona"}.
+    Single languages can be looked up with key transforms,
+    e.g. Idea.objects.filter(multilingual_title__de__icontains="park").
+    """
+    description = _("Multilingual value")
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("default", dict)
+        kwargs.setdefault("blank", True)
+        super().__init__(*args, **kwargs)
+
+    def from_db_value(self, value, expression, connection):
+        value = super().from_db_value(value, expression, connection)
+        if isinstance(value, dict):
+            value = MultilingualValue(value)
+        return value
+
+    def to_python(self, value):
+        value = super().to_python(value)
+        if isinstance(value, dict):
+            value = MultilingualValue(value)
+        return value
+
+    def validate(self, value, model_instance):
+        super().validate(value, model_instance)
+        if not isinstance(value, dict):
+            raise ValidationError(
+                _("Enter a dictionary of language codes and values."),
+                code="invalid",
+            )
+        lang_codes = dict(settings.LANGUAGES)
+        for lang_code, lang_value in value.items():
+            if lang_code not in lang_codes:
+                raise ValidationError(
+                    _("%(lang_code)s is not a language of this website."),
+                    code="invalid_language",
+                    params={"lang_code": lang_code},
+                )
+            self.validate_language_value(lang_value)
+
+    def validate_language_value(self, value):
+        if not isinstance(value, str):
+            raise ValidationError(
+                _("Translations have to be strings."), code="invalid"
+            )
+
+    @classmethod
+    def get_language_indexes(cls, field_name, name_prefix, languages=None):
+        """
+        Returns expression indexes on the values of the given field
+        for each language, to be used in Meta.indexes
+        """
+        return [
+            models.Index(
+                KeyTextTransform(lang_code, field_name),
+                name=f"{name_prefix}_{lang_code.replace('-', '_')}",
+            )
+            for lang_code, lang_name in (languages or settings.LANGUAGES)
+        ]
+
+
+class MultilingualCharField(MultilingualFieldMixin, models.JSONField):
+    description = _("Multilingual string")
+
+    def validate_language_value(self, value):
+        super().validate_language_value(value)
+        if self.max_length is not None:
+            validators.MaxLengthValidator(self.max_length)(value)
+
+
+class MultilingualTextField(MultilingualFieldMixin, models.JSONField):
+    description = _("Multilingual text")
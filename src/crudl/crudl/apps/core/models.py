@@ -1,12 +1,15 @@
 from urllib.parse import urlparse, urlunparse
 from django.conf import settings
 from django.db import models
+from django.utils import translation
 from django.utils.translation import gettext_lazy as _
 from django.utils.safestring import mark_safe
 from django.template.loader import render_to_string
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.core.exceptions import FieldError
+from . import url_paths
+from .model_fields import MultilingualValue
 
 class CreatorBase(models.Model):
     """Abstract base class for a creator"""
@@ -29,13 +32,16 @@ class UrlBase(models.Model):
 
     Args:
         models (mixix): Models extending this mixin should have either get_url or 
-        get_url_path implemented.
+        get_url_path implemented, or url_name set to the name of the URL pattern,
+        which takes the arguments of get_url_kwargs().
     """
+    url_name = None
+
     class Meta:
         abstract = True
     
     def get_url(self):
-        if hasattr(self.get_url_path, "dont_recurse"):
+        if self.url_name is None and hasattr(self.get_url_path, "dont_recurse"):
             raise NotImplementedError
         try:
             path = self.get_url_path()
@@ -45,6 +51,8 @@ class UrlBase(models.Model):
     get_url.dont_recurse = True
     
     def get_url_path(self):
+        if self.url_name is not None:
+            return url_paths.get_url_path(self.url_name, **self.get_url_kwargs())
         if hasattr(self.get_url, "dont_recurse"):
             raise NotImplementedError
         try:
@@ -54,6 +62,26 @@ class UrlBase(models.Model):
         bits = urlparse(url)
         return urlunparse(("", "") + bits[2:])
     get_url_path.dont_recurse = True
+
+    def get_url_kwargs(self):
+        return {"pk": self.pk}
+
+    def get_url_paths(self, languages=None):
+        """
+        Returns a dict of language codes and the URL paths of the object
+        for search indexes, sitemaps and hreflang links. With url_name
+        the paths are formatted from the precomputed templates,
+        otherwise each language is activated for get_url_path().
+        """
+        if self.url_name is not None:
+            return url_paths.get_url_paths(self.url_name, languages, **self.get_url_kwargs())
+        if languages is None:
+            languages = [lang_code for lang_code, lang_name in settings.LANGUAGES]
+        paths = {}
+        for lang_code in languages:
+            with translation.override(lang_code):
+                paths[lang_code] = self.get_url_path()
+        return paths
     
     def get_absolute_url(self):
         return self.get_url()
@@ -70,6 +98,62 @@ class CreationModificationDateBase(models.Model):
         abstract = True
 
 
+class MultilingualSyncBase(models.Model):
+    """
+    Abstract base class which keeps JSON-backed multilingual fields
+    in sync with the fields of the default language and the
+    "translations" relation.
+
+    multilingual_fields maps the translated field names to the
+    multilingual field names, e.g. {"title": "multilingual_title"}.
+    """
+    multilingual_fields = {}
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+        for field_name, multilingual_field_name in self.multilingual_fields.items():
+            if update_fields is not None:
+                # only the multilingual fields of the saved fields are synced
+                if field_name not in update_fields:
+                    continue
+                update_fields.add(multilingual_field_name)
+            values = MultilingualValue(getattr(self, multilingual_field_name) or {})
+            values[settings.LANGUAGE_CODE] = getattr(self, field_name)
+            setattr(self, multilingual_field_name, values)
+        if update_fields is not None:
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+    save.alters_data = True
+
+    def sync_multilingual_fields(self):
+        """
+        Rebuilds the multilingual fields from the translations.
+        The translation models call it after each save and delete,
+        which costs a query of the translations and an UPDATE
+        of the object each time, so translations changed in bulk
+        should be saved with bulk_create() or QuerySet.update()
+        and followed by one call of this method.
+        """
+        values = {
+            multilingual_field_name: MultilingualValue({
+                settings.LANGUAGE_CODE: getattr(self, field_name),
+            })
+            for field_name, multilingual_field_name in self.multilingual_fields.items()
+        }
+        for translation in self.translations.all():
+            for field_name, multilingual_field_name in self.multilingual_fields.items():
+                values[multilingual_field_name][translation.language] = getattr(translation, field_name)
+        type(self)._base_manager.filter(pk=self.pk).update(**values)
+        for multilingual_field_name, value in values.items():
+            setattr(self, multilingual_field_name, value)
+    sync_multilingual_fields.alters_data = True
+
+
 class MetaTagsBase(models.Model):
     """
     Abstract base class for generating meta tags.
@@ -138,53 +222,53 @@ def object_relation_base_factory(prefix=None, prefix_verbose=None, add_related_n
     p = ""
     if prefix:
         p = f"{prefix}_"
-        prefix_verbose = prefix_verbose or _("Related object")
-        limit_content_type_choices_to = limit_content_type_choices_to or {}
-        content_type_field = f"{p}content_type"
-        object_id_field = f"{p}object_id"
-        content_object_field = f"{p}content_object"
-
-        class TheClass(models.Model):
-            class Meta:
-                abstract = True
-        
-        if add_related_name:
-            if not prefix:
-                raise FieldError("if add_related_name is set to " "True, a prefix must be given")
-            related_name = prefix
-        else:
-            related_name = None
-        
-        optional = not is_required
-        ct_verbose_name = _(f"{prefix_verbose}'s type (model)")
-        content_type = models.ForeignKey(
-            ContentType,
-            verbose_name=ct_verbose_name,
-            related_name=related_name,
-            blank=optional,
-            null=optional,
-            help_text = _("Please select the type (model) " "for the relation, you want to build."),
-            limit_choices_to=limit_content_type_choices_to,
-            on_delete=models.CASCADE
-        )
-        fk_verbose_name = prefix_verbose
-        
-        object_id = models.CharField(
-            fk_verbose_name,
-            blank=optional,
-            null=False,
-            help_text=_("Please enter the ID of the related object."),
-            max_length=255,
-            default=""
-        )
-        
-        content_object = GenericForeignKey(
-            ct_field=content_type_field,
-            fk_field=object_id_field
-        )
-        
-        TheClass.add_to_class(content_type_field, content_type)
-        TheClass.add_to_class(object_id_field, object_id)
-        TheClass.add_to_class(content_object_field, content_object)
+    prefix_verbose = prefix_verbose or _("Related object")
+    limit_content_type_choices_to = limit_content_type_choices_to or {}
+    content_type_field = f"{p}content_type"
+    object_id_field = f"{p}object_id"
+    content_object_field = f"{p}content_object"
+
+    class TheClass(models.Model):
+        class Meta:
+            abstract = True
     
-        return TheClass
+    if add_related_name:
+        if not prefix:
+            raise FieldError("if add_related_name is set to " "True, a prefix must be given")
+        related_name = prefix
+    else:
+        related_name = None
+    
+    optional = not is_required
+    ct_verbose_name = _(f"{prefix_verbose}'s type (model)")
+    content_type = models.ForeignKey(
+        ContentType,
+        verbose_name=ct_verbose_name,
+        related_name=related_name,
+        blank=optional,
+        null=optional,
+        help_text = _("Please select the type (model) " "for the relation, you want to build."),
+        limit_choices_to=limit_content_type_choices_to,
+        on_delete=models.CASCADE
+    )
+    fk_verbose_name = prefix_verbose
+    
+    object_id = models.CharField(
+        fk_verbose_name,
+        blank=optional,
+        null=False,
+        help_text=_("Please enter the ID of the related object."),
+        max_length=255,
+        default=""
+    )
+    
+    content_object = GenericForeignKey(
+        ct_field=content_type_field,
+        fk_field=object_id_field
+    )
+    
+    TheClass.add_to_class(content_type_field, content_type)
+    TheClass.add_to_class(object_id_field, object_id)
+    TheClass.add_to_class(content_object_field, content_object)
+
+    return TheClass
@@ -0,0 +1,256 @@
+import base64
+import binascii
+import json
+import math
+from collections.abc import Sequence
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models
+from django.utils.functional import cached_property
+
+COUNT_EXACT = "exact"
+COUNT_APPROXIMATE = "approximate"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values, number):
+    """
+    Returns an opaque URL-safe string for the position after the row
+    with the given ordering values, which starts the page with the number
+    """
+    data = json.dumps({"v": values, "n": number}, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Returns the ordering values and the page number of the cursor
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(data)
+        values, number = data["v"], int(data["n"])
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError) as error:
+        raise InvalidCursor(str(error))
+    if not isinstance(values, list) or number < 2:
+        raise InvalidCursor("Malformed cursor")
+    return values, number
+
+
+class KeysetPaginator(object):
+    """
+    Paginator, which continues after the last row of the previous page
+    with a WHERE condition on the ordering values instead of OFFSET,
+    so that deep pages are as fast as the first one, if the ordering
+    can use an index. The primary key is appended to the ordering of the
+    queryset to make it unique; the sort keys must not be NULL.
+
+    Pages are addressed by opaque cursors. As pages can't be jumped to
+    by number, each page provides the links to the window of pages
+    around it, which costs one query forward and one query backward
+    independent of the depth.
+
+    Args:
+        object_list: ordered queryset.
+        per_page: number of rows per page.
+        window: number of linked pages on each side of the current page.
+        count_mode: None to skip counting, COUNT_EXACT for COUNT(*) or
+            COUNT_APPROXIMATE for the estimate of the PostgreSQL planner
+            (reltuples of the table for unfiltered querysets).
+    """
+    def __init__(self, object_list, per_page, window=2, count_mode=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.window = window
+        self.count_mode = count_mode
+        self.ordering = self.get_ordering()
+
+    def get_ordering(self):
+        query = self.object_list.query
+        ordering = list(query.order_by or (query.default_ordering and self.object_list.model._meta.ordering) or ())
+        for field in ordering:
+            if not isinstance(field, str) or "__" in field or field.lstrip("-") == "?":
+                raise ValueError(f"KeysetPaginator can't order by {field!r}")
+        pk_name = self.object_list.model._meta.pk.name
+        if not any(field.lstrip("-") in ("pk", pk_name) for field in ordering):
+            ordering.append("pk")
+        return ordering
+
+    def get_values(self, obj):
+        return [getattr(obj, field.lstrip("-")) for field in self.ordering]
+
+    def get_keyset_filter(self, values, backwards=False, inclusive=False):
+        """
+        Returns the condition for the rows after the given ordering values
+        or before them, if backwards is True
+        """
+        condition = models.Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip("-")
+            is_descending = field.startswith("-")
+            lookup = "lt" if is_descending != backwards else "gt"
+            if inclusive and index == len(self.ordering) - 1:
+                lookup += "e"
+            condition_for_field = models.Q(**{f"{name}__{lookup}": values[index]})
+            for previous_field, previous_value in zip(self.ordering[:index], values[:index]):
+                condition_for_field &= models.Q(**{previous_field.lstrip("-"): previous_value})
+            condition |= condition_for_field
+        return condition
+
+    def get_reversed_queryset(self):
+        return self.object_list.order_by(*[
+            field[1:] if field.startswith("-") else f"-{field}" for field in self.ordering
+        ])
+
+    def page(self, cursor=None):
+        """
+        Returns the page for the cursor or the first page,
+        if the cursor is empty or invalid
+        """
+        values, number = None, 1
+        if cursor:
+            try:
+                values, number = decode_cursor(cursor)
+            except InvalidCursor:
+                pass
+        lookahead = self.per_page * self.window + 1
+
+        qs = self.object_list.order_by(*self.ordering)
+        if values:
+            qs = qs.filter(self.get_keyset_filter(values))
+        rows = list(qs[:lookahead])
+
+        previous_rows = []
+        if values:
+            previous_rows = list(self.get_reversed_queryset().filter(
+                self.get_keyset_filter(values, backwards=True, inclusive=True)
+            )[:lookahead])
+            if len(previous_rows) < lookahead:
+                # all previous rows are known, so the number can be corrected
+                number = math.ceil(len(previous_rows) / self.per_page) + 1
+            else:
+                number = max(number, self.window + 2)
+        return KeysetPage(rows, previous_rows, number, self)
+
+    @cached_property
+    def count(self):
+        if self.count_mode == COUNT_EXACT:
+            return self.object_list.count()
+        if self.count_mode == COUNT_APPROXIMATE:
+            return get_approximate_count(self.object_list)
+        return None
+
+    @cached_property
+    def num_pages(self):
+        if self.count is None:
+            return None
+        return max(math.ceil(self.count / self.per_page), 1)
+
+
+def get_approximate_count(qs):
+    """
+    Returns the number of rows estimated by PostgreSQL: reltuples of the
+    table for querysets without conditions and the rows of the query plan
+    otherwise. Other databases count the rows.
+    """
+    connection = connections[qs.db]
+    if connection.vendor != "postgresql":
+        return qs.count()
+    if not qs.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                [qs.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return int(row[0])
+    plan = json.loads(qs.order_by().explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class KeysetPage(Sequence):
+    """
+    Page of a KeysetPaginator with cursors to the neighbouring pages
+    """
+    def __init__(self, rows, previous_rows, number, paginator):
+        per_page = paginator.per_page
+        self.object_list = rows[:per_page]
+        self.number = number
+        self.paginator = paginator
+
+        self.previous_pages = []
+        for offset in range(1, paginator.window + 1):
+            if len(previous_rows) <= (offset - 1) * per_page:
+                break
+            page_number = number - offset
+            cursor = None
+            if page_number > 1 and len(previous_rows) > offset * per_page:
+                cursor = encode_cursor(paginator.get_values(previous_rows[offset * per_page]), page_number)
+            self.previous_pages.insert(0, (page_number, cursor))
+
+        self.next_pages = []
+        for offset in range(1, paginator.window + 1):
+            if len(rows) <= offset * per_page:
+                break
+            cursor = encode_cursor(paginator.get_values(rows[offset * per_page - 1]), number + offset)
+            self.next_pages.append((number + offset, cursor))
+
+    def __repr__(self):
+        return f"<Page {self.number}>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return bool(self.next_pages)
+
+    def has_previous(self):
+        return bool(self.previous_pages)
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    @property
+    def next_cursor(self):
+        return self.next_pages[0][1] if self.next_pages else None
+
+    @property
+    def previous_cursor(self):
+        return self.previous_pages[-1][1] if self.previous_pages else None
+
+    def get_page_window(self):
+        """
+        Returns (number, cursor) tuples for the first page, the pages
+        in the window and the current page, whose cursor is False.
+        Paginator.ELLIPSIS marks the gap after the first page.
+        """
+        pages = []
+        first_linked = self.previous_pages[0][0] if self.previous_pages else self.number
+        if first_linked > 1:
+            pages.append((1, None))
+            if first_linked > 2:
+                pages.append((Paginator.ELLIPSIS, False))
+        return pages + self.previous_pages + [(self.number, False)] + self.next_pages
+
+
+class KeysetPaginationMixin(object):
+    """
+    Mixin for ListView to paginate with KeysetPaginator by the "cursor" query parameter
+    """
+    paginator_class = KeysetPaginator
+    page_kwarg = "cursor"
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.get_paginator(queryset, page_size)
+        page = paginator.page(self.request.GET.get(self.page_kwarg))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        return self.paginator_class(queryset, per_page, **kwargs)
@@ -0,0 +1,49 @@
+import contextvars
+
+_request_cache = contextvars.ContextVar("request_cache", default=None)
+
+
+def start():
+    """
+    Starts an empty cache for the current context and returns the token
+    for finish(). Context variables are isolated per thread and per
+    asyncio task, so concurrent requests never share their values.
+    """
+    return _request_cache.set({})
+
+
+def finish(token):
+    _request_cache.reset(token)
+
+
+def get_request_cache():
+    """
+    Returns the dictionary of the current request or None
+    outside of requests, e.g. in management commands
+    """
+    return _request_cache.get()
+
+
+def get_or_set(key, default):
+    """
+    Returns the memoized value for the key or calls default(),
+    memoizes and returns its result
+    """
+    cache = _request_cache.get()
+    if cache is None:
+        return default()
+    if key not in cache:
+        cache[key] = default()
+    return cache[key]
+
+
+def set_value(key, value):
+    cache = _request_cache.get()
+    if cache is not None:
+        cache[key] = value
+
+
+def delete_value(key):
+    cache = _request_cache.get()
+    if cache is not None:
+        cache.pop(key, None)
@@ -291,4 +291,65 @@ def remove_from_query(context, *args, **kwargs):
                 # skip key-value pairs mentioned in kwargs
                 if not (key in kwargs and str(value) == str(kwargs[key])):
                     query_params.append((key, value))
-    return construct_query_string(context, query_params)
\ No newline at end of file
+    return construct_query_string(context, query_params)
+
+@register.simple_tag(takes_context=True)
+def get_pagination_links(context, page, on_each_side=2):
+    """
+    Returns the links of the page navigation for a Django Page (by the "page"
+    query parameter) or a KeysetPage (by the "cursor" query parameter) as a
+    dictionary with "previous_url", "next_url" and "pages", a list of
+    dictionaries with "number", "url" and "is_current" for the window
+    of pages around the current page.
+
+    Usage: {% get_pagination_links object_list as links %}
+    """
+    from django.core.paginator import Paginator
+    from crudl.apps.core.paginators import KeysetPage
+
+    pages = []
+    if isinstance(page, KeysetPage):
+        def get_url(cursor):
+            return modify_query(context, "page", cursor=cursor)
+        for number, cursor in page.get_page_window():
+            pages.append({
+                "number": number,
+                "url": get_url(cursor) if cursor is not False else "",
+                "is_current": number == page.number,
+            })
+        previous_url = get_url(page.previous_cursor) if page.has_previous() else ""
+        next_url = get_url(page.next_cursor) if page.has_next() else ""
+    else:
+        page_range = page.paginator.get_elided_page_range(page.number, on_each_side=on_each_side, on_ends=1)
+        for number in page_range:
+            pages.append({
+                "number": number,
+                "url": modify_query(context, page=number) if number != Paginator.ELLIPSIS else "",
+                "is_current": number == page.number,
+            })
+        previous_url = modify_query(context, page=page.previous_page_number()) if page.has_previous() else ""
+        next_url = modify_query(context, page=page.next_page_number()) if page.has_next() else ""
+    return {"previous_url": previous_url, "next_url": next_url, "pages": pages}
+
+@register.simple_tag
+def hreflang_links(obj):
+    """
+    Returns the <link rel="alternate" hreflang="..."> tags to the object in
+    all languages and "x-default" to the default language. The paths come
+    from UrlBase.get_url_paths() without activating the languages.
+
+    Usage: {% hreflang_links idea %}
+    """
+    from django.conf import settings
+    from django.utils.html import format_html, format_html_join
+
+    url_paths = obj.get_url_paths()
+    links = format_html_join(
+        "\n",
+        '<link rel="alternate" hreflang="{}" href="{}{}" />',
+        ((lang_code, settings.WEBSITE_URL, url_path) for lang_code, url_path in url_paths.items()),
+    )
+    return links + format_html(
+        '\n<link rel="alternate" hreflang="x-default" href="{}{}" />',
+        settings.WEBSITE_URL, url_paths[settings.LANGUAGE_CODE],
+    )
@@ -1,3 +1,155 @@
-from django.test import TestCase
+import asyncio
+import uuid
+from unittest import mock
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import translation
+from . import generations, request_cache, url_paths
+from .paginators import COUNT_EXACT, KeysetPaginator
+from .middleware import RequestCacheMiddleware, get_current_request
 
-# Create your tests here.
+
+class RequestCacheMiddlewareTest(SimpleTestCase):
+    def test_values_are_memoized_per_request(self):
+        calls = []
+
+        def view(request):
+            for attempt in range(3):
+                request_cache.get_or_set("answer", lambda: calls.append(1) or 42)
+            self.assertIs(get_current_request(), request)
+            return HttpResponse()
+
+        middleware = RequestCacheMiddleware(view)
+        middleware(RequestFactory().get("/"))
+        middleware(RequestFactory().get("/"))
+        self.assertEqual(len(calls), 2)
+        self.assertIsNone(request_cache.get_request_cache())
+        self.assertIsNone(get_current_request())
+
+    def test_nothing_is_memoized_outside_of_requests(self):
+        calls = []
+        for attempt in range(2):
+            request_cache.get_or_set("answer", lambda: calls.append(1) or 42)
+        self.assertEqual(len(calls), 2)
+
+    def test_concurrent_async_requests_are_isolated(self):
+        async def view(request):
+            request_cache.set_value("path", request.path)
+            await asyncio.sleep(0.01)
+            self.assertIs(get_current_request(), request)
+            return HttpResponse(request_cache.get_request_cache()["path"])
+
+        middleware = RequestCacheMiddleware(view)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+
+        async def main():
+            return await asyncio.gather(*[
+                middleware(RequestFactory().get(f"/{index}/")) for index in range(10)
+            ])
+
+        responses = asyncio.run(main())
+        self.assertEqual(
+            [response.content.decode() for response in responses],
+            [f"/{index}/" for index in range(10)],
+        )
+
+
+class KeysetPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth import get_user_model
+
+        User = get_user_model()
+        for index in range(20):
+            # pairs of users have the same first name
+            User.objects.create(
+                username=f"user-{index:02d}", email=f"user-{index:02d}@example.com",
+                first_name=f"Name {index // 2:02d}",
+            )
+        cls.users = User.objects.order_by("first_name", "pk")
+
+    def get_pages(self, paginator):
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        return pages
+
+    def test_next_cursors_cover_all_rows_once(self):
+        paginator = KeysetPaginator(self.users, per_page=3, count_mode=COUNT_EXACT)
+        pages = self.get_pages(paginator)
+        self.assertEqual([page.number for page in pages], [1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual([user for page in pages for user in page], list(self.users))
+        self.assertEqual(paginator.num_pages, 7)
+
+    def test_deep_pages_use_constant_number_of_queries(self):
+        paginator = KeysetPaginator(self.users, per_page=3)
+        pages = self.get_pages(paginator)
+        # the rows after the cursor and the rows before it
+        with self.assertNumQueries(2):
+            paginator.page(pages[5].next_cursor)
+
+    def test_page_window_links_to_neighbouring_pages(self):
+        paginator = KeysetPaginator(self.users.order_by("-first_name"), per_page=3, window=2)
+        pages = self.get_pages(paginator)
+        page = paginator.page(pages[4].next_cursor)
+        window = page.get_page_window()
+        self.assertEqual([number for number, cursor in window], [1, "…", 4, 5, 6, 7])
+        for number, cursor in window:
+            if cursor:
+                self.assertEqual(list(paginator.page(cursor)), list(pages[number - 1]))
+        self.assertEqual(list(paginator.page(page.previous_cursor)), list(pages[4]))
+        self.assertEqual(window[0], (1, None))
+
+    def test_invalid_cursor_returns_first_page(self):
+        paginator = KeysetPaginator(self.users, per_page=3)
+        page = paginator.page("not a cursor")
+        self.assertEqual(page.number, 1)
+        self.assertEqual(list(page), list(self.users[:3]))
+
+
+class UrlPathsTest(SimpleTestCase):
+    def setUp(self):
+        url_paths.clear()
+
+    def test_paths_match_reversed_urls(self):
+        pk = uuid.uuid4()
+        paths = url_paths.get_url_paths("ideas:idea_detail", pk=pk)
+        self.assertEqual(paths["en"], f"/en/ideas/{pk}/")
+        for lang_code in ("de", "lt", "sv"):
+            with translation.override(lang_code):
+                self.assertEqual(paths[lang_code], reverse("ideas:idea_detail", kwargs={"pk": pk}))
+
+    def test_pattern_is_reversed_once_per_process(self):
+        url_paths.get_url_path("ideas:idea_detail", "en", pk=uuid.uuid4())
+        with translation.override("de"), mock.patch.object(url_paths, "reverse") as patched_reverse:
+            path = url_paths.get_url_path("ideas:idea_detail", pk="1b9d6bcd-bbfd-4b2d-9b5d-ab8dfbbd4bed")
+        self.assertEqual(path, "/de/ideas/1b9d6bcd-bbfd-4b2d-9b5d-ab8dfbbd4bed/")
+        patched_reverse.assert_not_called()
+
+
+
+class GenerationsTest(SimpleTestCase):
+    key = "test:generation"
+
+    def setUp(self):
+        caches["default"].delete(self.key)
+
+    def test_bumped_generation_is_newer(self):
+        generation = generations.get_generation(self.key)
+        generations.bump_generation(self.key)
+        self.assertGreater(generations.get_generation(self.key), generation)
+
+    def test_counter_evicted_before_incr_is_added_again(self):
+        cache = caches["default"]
+        generation = generations.get_generation(self.key)
+
+        def evict(key):
+            cache.delete(key)
+            raise ValueError(f"Key '{key}' not found")
+
+        with mock.patch.object(cache, "incr", side_effect=evict):
+            generations.bump_generation(self.key)
+        self.assertIsNotNone(cache.get(self.key))
+        self.assertGreaterEqual(generations.get_generation(self.key), generation)
@@ -0,0 +1,176 @@
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+
+CACHE_ALIAS = getattr(settings, "TRANSLATION_CACHE_ALIAS", "default")
+CACHE_TIMEOUT = getattr(settings, "TRANSLATION_CACHE_TIMEOUT", 60 * 60 * 24)
+LOCAL_CACHE_SIZE = getattr(settings, "TRANSLATION_CACHE_LOCAL_SIZE", 5000)
+STATS_FLUSH_EVERY = getattr(settings, "TRANSLATION_CACHE_STATS_FLUSH_EVERY", 100)
+STATS_EVENTS = ("local_hits", "shared_hits", "misses")
+
+
+class LocalLRUCache(object):
+    """
+    A small thread-safe in-process cache, which drops
+    the least recently used keys when it is full
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    found[key] = self._data[key]
+        return found
+
+    def set_many(self, mapping):
+        with self._lock:
+            for key, value in mapping.items():
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LocalLRUCache(LOCAL_CACHE_SIZE)
+_stats = dict.fromkeys(STATS_EVENTS, 0)
+_stats_lock = threading.Lock()
+
+
+def get_cache_key(model, pk, lang_code, modified):
+    """
+    Returns the key for the translation of an object in a language.
+    As the modification time is a part of the key,
+    saving the object makes the old entries obsolete.
+    """
+    timestamp = modified.timestamp() if modified else ""
+    return f"translations:{model._meta.label_lower}:{pk}:{lang_code}:{timestamp}"
+
+
+def get_instance_cache_key(instance, lang_code):
+    return get_cache_key(
+        type(instance), instance.pk, lang_code, getattr(instance, "modified", None)
+    )
+
+
+def get_many(instances, lang_code):
+    """
+    Returns a dictionary of primary keys and translations (or None,
+    if the object has no translation) for the cached instances
+    """
+    keys = {get_instance_cache_key(instance, lang_code): instance.pk for instance in instances}
+    found = local_cache.get_many(keys)
+    record("local_hits", len(found))
+    missing_keys = [key for key in keys if key not in found]
+    if missing_keys:
+        shared_found = caches[CACHE_ALIAS].get_many(missing_keys)
+        record("shared_hits", len(shared_found))
+        record("misses", len(missing_keys) - len(shared_found))
+        local_cache.set_many(shared_found)
+        found.update(shared_found)
+    # the translations are wrapped in tuples to cache missing translations as (None,)
+    return {keys[key]: value[0] for key, value in found.items()}
+
+
+def set_many(instances, lang_code, translations):
+    """
+    Caches the translations dictionary of primary keys and
+    translations (or None) for the given instances
+    """
+    mapping = {
+        get_instance_cache_key(instance, lang_code): (translations.get(instance.pk),)
+        for instance in instances
+    }
+    local_cache.set_many(mapping)
+    caches[CACHE_ALIAS].set_many(mapping, timeout=CACHE_TIMEOUT)
+
+
+def delete(instance):
+    """
+    Deletes the cached translations of the instance in all languages
+    """
+    keys = [get_instance_cache_key(instance, lang_code) for lang_code, lang_name in settings.LANGUAGES]
+    local_cache.delete_many(keys)
+    caches[CACHE_ALIAS].delete_many(keys)
+
+
+def touch(model, pk):
+    """
+    Updates the modification time of the object, so that its cached
+    translations are not used anymore by any process
+    """
+    from django.utils.timezone import now as timezone_now
+
+    model._base_manager.filter(pk=pk).update(modified=timezone_now())
+
+
+def record(event, count=1):
+    """
+    Counts cache hits and misses and adds them to the shared counters
+    in the cache every STATS_FLUSH_EVERY events
+    """
+    if not count:
+        return
+    with _stats_lock:
+        _stats[event] += count
+        if sum(_stats.values()) < STATS_FLUSH_EVERY:
+            return
+        pending = dict(_stats)
+        for key in STATS_EVENTS:
+            _stats[key] = 0
+    flush_stats(pending)
+
+
+def flush_stats(pending):
+    cache = caches[CACHE_ALIAS]
+    for event, count in pending.items():
+        if count:
+            key = f"translation-cache-stats:{event}"
+            cache.add(key, 0, timeout=None)
+            cache.incr(key, count)
+
+
+def get_stats():
+    """
+    Returns the hit and miss counters of all processes
+    plus the not yet flushed ones of this process
+    """
+    cache = caches[CACHE_ALIAS]
+    shared = cache.get_many([f"translation-cache-stats:{event}" for event in STATS_EVENTS])
+    with _stats_lock:
+        stats = {
+            event: shared.get(f"translation-cache-stats:{event}", 0) + _stats[event]
+            for event in STATS_EVENTS
+        }
+    lookups = sum(stats.values())
+    stats["hit_ratio"] = (stats["local_hits"] + stats["shared_hits"]) / lookups if lookups else 0
+    return stats
+
+
+def reset_stats():
+    with _stats_lock:
+        for key in STATS_EVENTS:
+            _stats[key] = 0
+    caches[CACHE_ALIAS].delete_many([f"translation-cache-stats:{event}" for event in STATS_EVENTS])
+
+
+def clear():
+    """
+    Clears the in-process cache
+    """
+    local_cache.clear()
@@ -0,0 +1,123 @@
+import threading
+from urllib.parse import quote
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import NoReverseMatch, get_resolver, get_script_prefix, reverse
+from django.urls.resolvers import LocalePrefixPattern
+from django.utils import translation
+from django.utils.http import RFC3986_SUBDELIMS
+
+# values for the URL arguments while reversing the templates:
+# the first set matches the uuid, str, slug and path converters, the second one int
+PLACEHOLDER_SETS = (
+    lambda index: f"00000000-0000-0000-0000-{index:012d}",
+    lambda index: f"{10 ** 9 + index}",
+)
+
+_language_prefixes = None
+_templates = {}
+_lock = threading.Lock()
+
+
+def get_language_prefixes():
+    """
+    Returns a dict of language codes and the path prefixes added to
+    the URLs by i18n_patterns, e.g. {"en": "en/", "de": "de/"}.
+    The prefixes are computed once per process.
+    """
+    global _language_prefixes
+    if _language_prefixes is None:
+        locale_pattern = None
+        for url_pattern in get_resolver().url_patterns:
+            if isinstance(getattr(url_pattern, "pattern", None), LocalePrefixPattern):
+                locale_pattern = url_pattern.pattern
+                break
+        prefixes = {}
+        for lang_code, lang_name in settings.LANGUAGES:
+            if locale_pattern is None or (
+                lang_code == settings.LANGUAGE_CODE and not locale_pattern.prefix_default_language
+            ):
+                prefixes[lang_code] = ""
+            else:
+                prefixes[lang_code] = f"{lang_code}/"
+        _language_prefixes = prefixes
+    return _language_prefixes
+
+
+def get_url_path_template(viewname, kwarg_names):
+    """
+    Returns the path of the URL pattern without the script and language
+    prefixes as a format string, e.g. "ideas/{pk}/" for "ideas:idea_detail".
+    The pattern is reversed once per process in the default language.
+    The routes under i18n_patterns mustn't be translated.
+    """
+    key = (viewname, tuple(sorted(kwarg_names)))
+    template = _templates.get(key)
+    if template is not None:
+        return template
+
+    prefix = get_script_prefix() + get_language_prefixes()[settings.LANGUAGE_CODE]
+    for get_placeholder in PLACEHOLDER_SETS:
+        placeholders = {name: get_placeholder(index) for index, name in enumerate(key[1])}
+        try:
+            with translation.override(settings.LANGUAGE_CODE):
+                path = reverse(viewname, kwargs=placeholders)
+        except NoReverseMatch:
+            continue
+        if path.startswith(prefix):
+            break
+    else:
+        raise NoReverseMatch(f"Reverse for '{viewname}' can't be turned into a URL path template.")
+
+    template = path[len(prefix):].replace("{", "{{").replace("}", "}}")
+    for name, placeholder in placeholders.items():
+        template = template.replace(placeholder, f"{{{name}}}")
+    with _lock:
+        _templates[key] = template
+    return template
+
+
+def get_url_path(viewname, language=None, **kwargs):
+    """
+    Returns the URL path of the view in the language (the active one
+    by default) without activating the language and walking the resolver,
+    e.g. get_url_path("ideas:idea_detail", "de", pk=idea.pk)
+    """
+    language = language or translation.get_language() or settings.LANGUAGE_CODE
+    return get_url_paths(viewname, [language], **kwargs)[language]
+
+
+def get_url_paths(viewname, languages=None, **kwargs):
+    """
+    Returns a dict of language codes and the URL paths of the view
+    in all languages of the LANGUAGES setting or the given ones
+    """
+    prefixes = get_language_prefixes()
+    if languages is None:
+        languages = prefixes.keys()
+    script_prefix = get_script_prefix()
+    path = get_url_path_template(viewname, kwargs).format(**{
+        name: quote(str(value), safe=RFC3986_SUBDELIMS + "/~:@")
+        for name, value in kwargs.items()
+    })
+    paths = {}
+    for lang_code in languages:
+        prefix = prefixes.get(lang_code)
+        if prefix is None:
+            prefix = prefixes[translation.get_supported_language_variant(lang_code)]
+        paths[lang_code] = script_prefix + prefix + path
+    return paths
+
+
+def clear():
+    global _language_prefixes
+    with _lock:
+        _language_prefixes = None
+        _templates.clear()
+
+
+@receiver(setting_changed)
+def clear_on_setting_changed(sender, setting, **kwargs):
+    if setting in ("ROOT_URLCONF", "LANGUAGES", "LANGUAGE_CODE"):
+        clear()
@@ -1,5 +1,6 @@
 import os
 import json
+from asgiref.sync import sync_to_async
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.http import HttpResponse, JsonResponse
@@ -7,7 +8,6 @@ from django.core.exceptions import SuspiciousOperation
 from django.urls import reverse
 from django.template import Context, Template
 from django.views.decorators.cache import cache_page
-from django.views.decorators.csrf import csrf_protect
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from django.shortcuts import render
@@ -35,31 +35,41 @@ def js_settings(request):
     )
     return response
 
-@csrf_protect
-def upload_file(request):
+def save_temporary_upload(file):
+    """
+    Saves the uploaded file to the temporary uploads directory
+    and returns its description for the file uploader
+    """
+    upload_to = os.path.join("temporary-uploads", file.name)
+    name = default_storage.save(upload_to, ContentFile(file.read()))
+    file = default_storage.open(name)
+    absolute_uploads_dir = os.path.join(settings.MEDIA_ROOT, "temporary-uploads")
+    file.filename = os.path.basename(file.name)
+    return {
+        "name": file.filename,
+        "size": file.size,
+        "deleteType": "DELETE",
+        "deleteUrl": (reverse("delete_file") + f"?filename={file.filename}"),
+        "path": file.name[len(absolute_uploads_dir) + 1 :],
+    }
+
+
+async def upload_file(request):
+    # the CSRF token is checked by CsrfViewMiddleware,
+    # as the csrf_protect decorator of Django 4.0 doesn't support coroutines
     status_code = 400
     data = {"files": [], "error": _("Bad request")}
-    if request.method == "POST" and request.is_ajax() and "picture" in request.FILES:
+    is_ajax = request.headers.get("x-requested-with") == "XMLHttpRequest"
+    if request.method == "POST" and is_ajax and "picture" in request.FILES:
         file_types = [f"image/{x}" for x in ["gif", "jpg", "jpeg", "png"]]
         file = request.FILES.get("picture")
         if file.content_type not in file_types:
             status_code = 405
             data["error"] = _("Invalid file format")
         else:
-            upload_to = os.path.join("temporary-uploads", file.name)
-            name = default_storage.save(upload_to, ContentFile(file.read()))
-            file = default_storage.open(name)
+            # write the file in a separate thread without blocking the event loop
+            uploaded_file = await sync_to_async(save_temporary_upload, thread_sensitive=False)(file)
             status_code = 200
             del data["error"]
-            absolute_uploads_dir = os.path.join(settings.MEDIA_ROOT, "temporary-uploads")
-            file.filename = os.path.basename(file.name)
-            data["files"].append(
-                {
-                    "name": file.filename,
-                    "size": file.size,
-                    "deleteType": "DELETE",
-                    "deleteUrl": (reverse("delete_file") + f"?filename={file.filename}"),
-                    "path": file.name[len(absolute_uploads_dir) + 1 :],
-                }
-            )
+            data["files"].append(uploaded_file)
     return JsonResponse(data, status=status_code)
@@ -1,6 +1,12 @@
+from crudl.apps.core import request_cache
+
+
 def auth0(request):
     data = {}
     if request.user.is_authenticated:
-        auth0_user = request.user.social_auth.filter(provider="auth0",).first()
+        auth0_user = request_cache.get_or_set(
+            ("auth0_user", request.user.pk),
+            lambda: request.user.social_auth.filter(provider="auth0",).first(),
+        )
         data = {"auth0_user": auth0_user,}
     return data
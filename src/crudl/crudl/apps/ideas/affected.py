@@ -0,0 +1,30 @@
+def get_affected_idea_pks(sender, instance, action=None, reverse=False, pk_set=None, **kwargs):
+    """
+    Returns the pks of the ideas, whose search data is affected by a signal
+    of their translations, their categories or the categories and their
+    translations, as a list or a lazy queryset. The receivers updating the
+    search indexes and documents use it with the arguments of the signal,
+    and they have to read the pks in the receiver, as the ideas of a category
+    aren't known anymore after clearing or deleting it.
+    """
+    from crudl.apps.category.models import Category, CategoryTranslations
+    from .models import Idea, IdeaTranslations
+
+    if sender is IdeaTranslations:
+        return [instance.idea_id]
+    if sender is Idea.categories.through:
+        if action in ("post_add", "post_remove"):
+            return list(pk_set) if reverse else [instance.pk]
+        if action == "pre_clear" and reverse:
+            # the cleared ideas aren't known afterwards
+            return instance.category_ideas.values_list("pk", flat=True)
+        if action == "post_clear" and not reverse:
+            return [instance.pk]
+        return []
+    if sender is Category:
+        return instance.category_ideas.values_list("pk", flat=True)
+    if sender is CategoryTranslations:
+        return Idea.categories.through.objects.filter(
+            category_id=instance.category_id,
+        ).values_list("idea_id", flat=True)
+    return []
@@ -6,3 +6,6 @@ class IdeasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'crudl.apps.ideas'
     verbose_name = _("Idea")
+    
+    def ready(self):
+        from . import signals
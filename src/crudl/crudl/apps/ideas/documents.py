@@ -1,5 +1,5 @@
 from django.conf import settings
-from django.utils.translation import get_language, activate
+from django.utils.translation import get_language
 from django.db import models
 from django_elasticsearch_dsl import fields
 from django_elasticsearch_dsl.documents import (
@@ -10,14 +10,8 @@ from django_elasticsearch_dsl.registries import registry
 from crudl.apps.category.models import Category
 from .models import Idea
 
-model_field_class_to_field_class[models.UUIDField] = fields.TextField
-
-def _get_url_path(instance, language):
-    current_language = get_language()
-    activate(language)
-    url_path = instance.get_url_path()
-    activate(current_language)
-    return url_path
+# UUIDs are matched and sorted as whole values, e.g. for search_after
+model_field_class_to_field_class[models.UUIDField] = fields.KeywordField
 
 
 @registry.register_document
@@ -61,31 +55,36 @@ class IdeaDocument(Document):
         fields = ["uuid", "rating"]
         related_models = [Category]
     
+    def get_queryset(self):
+        return super().get_queryset().select_related("author").prefetch_related(
+            "translations", "categories__translations"
+        )
+
     def get_instance_from_related(self, related_instance):
         if isinstance(related_instance, Category):
             category = related_instance
             return category.category_ideas.all()
     
     def prepare(self, instance):
+        # the paths are formatted from the URL templates of this process
+        url_paths = instance.get_url_paths()
         lang_code_underscored = settings.LANGUAGE_CODE.replace("-", "_")
         setattr(instance, f"title_{lang_code_underscored}", instance.title)
         setattr(instance, f"content_{lang_code_underscored}", instance.content)
-        setattr(
-            instance,
-            f"url_path_{lang_code_underscored}",
-            _get_url_path(instance=instance, language=settings.LANGUAGE_CODE),
-        )
+        setattr(instance, f"url_path_{lang_code_underscored}", url_paths[settings.LANGUAGE_CODE])
+        # .all() reads the translations prefetched by rebuild_ideas_index
+        translations_by_language = {
+            translations.language: translations
+            for translations in instance.translations.all()
+        }
         for lang_code, lang_name in settings.LANGUAGES_EXCEPT_THE_DEFAULT:
             lang_code_underscored = lang_code.replace("-", "_")
             setattr(instance, f"title_{lang_code_underscored}", "")
-            translations = instance.translations.filter(language=lang_code).first()
+            translations = translations_by_language.get(lang_code)
             if translations:
                 setattr(instance, f"title_{lang_code_underscored}", translations.title)
                 setattr(instance, f"content_{lang_code_underscored}", translations.content)
-            setattr(
-                instance,
-                f"url_path_{lang_code_underscored}", _get_url_path(instance=instance, language=lang_code),
-            )
+            setattr(instance, f"url_path_{lang_code_underscored}", url_paths[lang_code])
         data = super().prepare(instance=instance)
         return data
     
@@ -112,10 +111,14 @@ class IdeaDocument(Document):
             category_dict = {"pk": category.pk}
             lang_code_underscored = settings.LANGUAGE_CODE.replace("-", "_")
             category_dict[f"title_{lang_code_underscored}"] = category.title
+            translations_by_language = {
+                translations.language: translations
+                for translations in category.translations.all()
+            }
             for lang_code, lang_name in settings.LANGUAGES_EXCEPT_THE_DEFAULT:
                 lang_code_underscored = lang_code.replace("-", "_")
                 category_dict[f"title_{lang_code_underscored}"] = ""
-                translations = category.translations.filter(language=lang_code).first()
+                translations = translations_by_language.get(lang_code)
                 if translations:
                     category_dict[f"title_{lang_code_underscored}"] = translations.title
             categories.append(category_dict)
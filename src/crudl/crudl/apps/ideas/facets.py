@@ -0,0 +1,179 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, models
+from crudl.apps.core import generations
+
+CACHE_ALIAS = getattr(settings, "IDEA_FACETS_CACHE_ALIAS", "default")
+CACHE_TIMEOUT = getattr(settings, "IDEA_FACETS_CACHE_TIMEOUT", 60 * 60)
+GENERATION_KEY = "idea-facets:generation"
+FACET_NAMES = ("author", "category", "rating")
+
+
+class SubqueryCount(models.Subquery):
+    """
+    Counts the rows of a correlated subquery
+    """
+    template = "(SELECT COUNT(*) FROM (%(subquery)s) _count)"
+    output_field = models.IntegerField()
+
+
+def in_category(category_path, idea_ref="pk"):
+    """
+    Returns a correlated EXISTS condition for the ideas, which belong to
+    the category with the given path or to any of its descendants,
+    i.e. the categories in one range of the indexed paths.
+    Unlike filtering through the join of the categories relation it
+    doesn't multiply the idea rows, so no DISTINCT is necessary.
+    """
+    from crudl.apps.category.models import Category
+    from .models import Idea
+
+    return models.Exists(Idea.categories.through.objects.filter(
+        Category.get_subtree_filter(category_path, prefix="category__"),
+        idea=models.OuterRef(idea_ref),
+    ))
+
+
+def filter_ideas(qs, filters):
+    """
+    Filters the ideas by the selected facet values.
+
+    Args:
+        qs: queryset of ideas.
+        filters: dictionary of facet names and selected values, i.e. a user
+            for "author", a category for "category" (including the ideas
+            of its descendants) and a rating number for "rating".
+    """
+    if filters.get("author"):
+        qs = qs.filter(author=filters["author"])
+    if filters.get("category"):
+        qs = qs.filter(in_category(filters["category"].path))
+    if filters.get("rating"):
+        qs = qs.filter(rating=filters["rating"])
+    return qs
+
+
+def get_filter_signature(filters, exclude=None):
+    """
+    Returns a string identifying the selected facet values except the excluded facet
+    """
+    parts = []
+    for name in FACET_NAMES:
+        value = filters.get(name)
+        if name != exclude and value:
+            parts.append(f"{name}={getattr(value, 'pk', value)}")
+    return "&".join(parts)
+
+
+def _filtered_ideas(filters, exclude):
+    from .models import Idea
+
+    other_filters = {name: value for name, value in filters.items() if name != exclude}
+    return filter_ideas(Idea.objects.order_by(), other_filters)
+
+
+def count_authors(filters):
+    rows = _filtered_ideas(filters, exclude="author").exclude(author=None).values(
+        "author"
+    ).annotate(idea_count=models.Count("pk"))
+    return {row["author"]: row["idea_count"] for row in rows}
+
+
+def get_category_counts_sql(ideas=None):
+    """
+    Returns the SQL and parameters of one aggregate query, which selects
+    the "id" and the "idea_count" of each category with ideas in its
+    subtree. The categories are joined with the categories in the ranges
+    of the paths of their subtrees and with their ideas, which are counted
+    once per category, even if they belong to several of its descendants.
+
+    Args:
+        ideas: queryset of the counted ideas or None for all ideas.
+    """
+    from crudl.apps.category.models import Category
+    from .models import Idea
+
+    through = Idea.categories.through
+    connection = connections[through.objects.db]
+    qn = connection.ops.quote_name
+    subtree_sql, params = Category.get_subtree_join_sql(connection, "ancestor", "descendant")
+    sql = (
+        f"SELECT {qn('ancestor')}.{qn('id')}, COUNT(DISTINCT {qn('idea_category')}.{qn('idea_id')}) AS {qn('idea_count')} "
+        f"FROM {qn(Category._meta.db_table)} {qn('ancestor')} "
+        f"INNER JOIN {qn(Category._meta.db_table)} {qn('descendant')} ON {subtree_sql} "
+        f"INNER JOIN {qn(through._meta.db_table)} {qn('idea_category')} "
+        f"ON {qn('idea_category')}.{qn('category_id')} = {qn('descendant')}.{qn('id')} "
+    )
+    if ideas is not None:
+        ideas_sql, ideas_params = ideas.order_by().values("pk").query.sql_with_params()
+        sql += f"WHERE {qn('idea_category')}.{qn('idea_id')} IN ({ideas_sql}) "
+        params += list(ideas_params)
+    sql += f"GROUP BY {qn('ancestor')}.{qn('id')}"
+    return sql, params
+
+
+def count_categories(filters):
+    """
+    Counts the ideas of each category and its descendants with one aggregate query
+    """
+    from .models import Idea
+
+    other_filters = {name: value for name, value in filters.items() if name != "category" and value}
+    ideas = _filtered_ideas(filters, exclude="category") if other_filters else None
+    sql, params = get_category_counts_sql(ideas)
+    with connections[Idea.categories.through.objects.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        return dict(cursor.fetchall())
+
+
+def count_ratings(filters):
+    rows = _filtered_ideas(filters, exclude="rating").exclude(rating=None).values(
+        "rating"
+    ).annotate(idea_count=models.Count("pk"))
+    return {row["rating"]: row["idea_count"] for row in rows}
+
+
+COUNTERS = {
+    "author": count_authors,
+    "category": count_categories,
+    "rating": count_ratings,
+}
+
+
+def get_generation():
+    return generations.get_generation(GENERATION_KEY, CACHE_ALIAS)
+
+
+def get_facet_counts(filters):
+    """
+    Returns a dictionary of facet names and dictionaries of the values
+    (author and category IDs or ratings) and their idea counts.
+    Each facet respects the selected values of the other facets,
+    so its counts are the numbers of ideas the user would see by
+    selecting the value. The counts are cached by the signature
+    of the other filters until an idea is changed.
+    """
+    cache = caches[CACHE_ALIAS]
+    generation = get_generation()
+    keys = {
+        name: f"idea-facets:{generation}:{name}:{get_filter_signature(filters, exclude=name)}"
+        for name in FACET_NAMES
+    }
+    cached = cache.get_many(keys.values())
+    counts = {}
+    missing = {}
+    for name, key in keys.items():
+        if key in cached:
+            counts[name] = cached[key]
+        else:
+            counts[name] = missing[key] = COUNTERS[name](filters)
+    if missing:
+        cache.set_many(missing, timeout=CACHE_TIMEOUT)
+    return counts
+
+
+def invalidate():
+    """
+    Makes all cached facet counts obsolete
+    """
+    generations.bump_generation(GENERATION_KEY, CACHE_ALIAS)
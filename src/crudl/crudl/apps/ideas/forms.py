@@ -7,9 +7,9 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from crispy_forms import bootstrap, helper, layout
 from pkg_resources import require
-from mptt.forms import TreeNodeChoiceField
 from crudl.apps.category.models import Category
-from crudl.apps.core.form_fields import MultipleChoiceTreeField
+from crudl.apps.category.snapshots import get_tree_nodes
+from crudl.apps.core.form_fields import MultipleChoiceTreeField, TreeNodeChoiceField
 from .models import Idea, IdeaTranslations, RATING_CHOICES
 
 User = get_user_model()
@@ -27,7 +27,7 @@ class IdeaSearchForm(forms.Form):
         self.helper.form_method = "GET"
         self.helper.layout = layout.Layout(
             layout.Field("q", css_class="input-block-level"),
-            layout.submit("search", _("Search")),
+            layout.Submit("search", _("Search")),
         )
 
 
@@ -36,6 +36,7 @@ class IdeaForm(forms.ModelForm):
         label= _("Categories"),
         required=False,
         queryset=Category.objects.all(),
+        nodes=get_tree_nodes,
     )
     class Meta:
         model = Idea
@@ -45,7 +46,6 @@ class IdeaForm(forms.ModelForm):
         self.request = request
         super().__init__(*args, **kwargs)
         
-        self.fields["categories"].widget = forms.CheckboxSelectMultiple()
         title_field = layout.Field(
             "title", css_class="input-block-level"
         )
@@ -105,14 +105,15 @@ class IdeaFilterForm(forms.Form):
     author = forms.ModelChoiceField(
         label=_("Author"),
         required=False,
-        queryset=User.objects.annotate(
-            idea_count=models.Count("authored_ideas")
-        ).filter(idea_count__gt=0)
+        queryset=User.objects.filter(
+            models.Exists(Idea.objects.filter(author=models.OuterRef("pk")))
+        )
     )
     category = TreeNodeChoiceField(
         label =_("Category"),
         required=False,
         queryset = Category.objects.all(),
+        nodes = get_tree_nodes,
         level_indicator = mark_safe("&nbsp;&nbsp;&nbsp;&nbsp;")
     )
     rating = forms.ChoiceField(
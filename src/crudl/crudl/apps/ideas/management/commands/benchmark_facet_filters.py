@@ -0,0 +1,136 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Compares filtering ideas by categories with JOIN + DISTINCT "
+        "and with EXISTS subqueries, and counting the ideas per category "
+        "also with one aggregate query over the ranges of the subtrees, "
+        "printing the query plans and timings. "
+        "The generated sample data is rolled back afterwards."
+    )
+    SILENT, NORMAL, VERBOSE, VERY_VERBOSE = 0, 1, 2, 3
+    PAGE_SIZE = 24
+    BATCH_SIZE = 10000
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument("--ideas", type=int, default=1000000)
+        parser.add_argument("--categories", type=int, default=20, help="Number of root categories with 5 children each")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        from django.db import transaction
+
+        self.verbosity = options.get("verbosity", self.NORMAL)
+        self.idea_count = options["ideas"]
+        self.category_count = options["categories"]
+        self.repeat = options["repeat"]
+        with transaction.atomic():
+            self.prepare()
+            self.main()
+            transaction.set_rollback(True)
+        self.finalize()
+
+    def prepare(self):
+        from django.contrib.auth import get_user_model
+        from crudl.apps.category.models import Category
+        from ...models import Idea
+
+        self.results = []
+        User = get_user_model()
+        self.author = User.objects.create(
+            username="benchmark-author", email="benchmark-author@example.com"
+        )
+        self.root = None
+        leaves = []
+        for index in range(self.category_count):
+            root = Category.add_root(title=f"Benchmark category {index}")
+            self.root = self.root or root
+            leaves += [root.add_child(title=f"Benchmark category {index}.{child_index}") for child_index in range(5)]
+
+        for batch_start in range(0, self.idea_count, self.BATCH_SIZE):
+            ideas = Idea.objects.bulk_create([
+                Idea(
+                    title=f"Benchmark idea {index}",
+                    content=f"Content of the benchmark idea {index}. " * 20,
+                    picture="ideas/benchmark.png",
+                    author=self.author if index % 10 == 0 else None,
+                    rating=index % 5 + 1,
+                )
+                for index in range(batch_start, min(batch_start + self.BATCH_SIZE, self.idea_count))
+            ])
+            # two categories per idea, so that the joins multiply the rows
+            Idea.categories.through.objects.bulk_create([
+                Idea.categories.through(idea=idea, category=leaves[(index + offset) % len(leaves)])
+                for index, idea in enumerate(ideas, start=batch_start)
+                for offset in (0, 1)
+            ])
+            if self.verbosity >= self.VERBOSE:
+                self.stdout.write(f"Created {batch_start + len(ideas)} ideas\n")
+
+    def main(self):
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(f"=== Benchmarking {self.idea_count} ideas ===\n")
+        workloads = (
+            ("page", self.page, ("join", "exists")),
+            ("ids", self.ids, ("join", "exists")),
+            ("category-facet", self.category_facet, ("join", "exists", "aggregate")),
+        )
+        for workload, function, strategies in workloads:
+            for strategy in strategies:
+                self.results.append((workload, strategy) + self.measure(function, strategy))
+
+    def get_queryset(self, strategy):
+        from ...facets import in_category
+        from ...models import Idea
+
+        qs = Idea.objects.filter(author=self.author, rating__gte=3)
+        if strategy == "join":
+            return qs.filter(categories__path__startswith=self.root.path).distinct()
+        return qs.filter(in_category(self.root.path))
+
+    def page(self, strategy):
+        return self.get_queryset(strategy).order_by("title", "pk")[:self.PAGE_SIZE]
+
+    def ids(self, strategy):
+        return self.get_queryset(strategy).order_by().values_list("pk", flat=True)
+
+    def category_facet(self, strategy):
+        from django.db import models
+        from crudl.apps.category.models import Category
+        from ...facets import SubqueryCount, get_category_counts_sql, in_category
+        from ...models import Idea
+
+        ideas = Idea.objects.filter(author=self.author).order_by()
+        if strategy == "aggregate":
+            return Category.objects.raw(*get_category_counts_sql(ideas))
+        if strategy == "join":
+            ideas = ideas.filter(
+                categories__path__startswith=models.OuterRef("path")
+            ).distinct().values("pk")
+        else:
+            ideas = ideas.filter(
+                in_category(models.OuterRef(models.OuterRef("path")))
+            ).values("pk")
+        return Category.objects.annotate(idea_count=SubqueryCount(ideas)).values_list("pk", "idea_count")
+
+    def measure(self, function, strategy):
+        import time
+
+        qs = function(strategy)
+        if self.verbosity >= self.NORMAL:
+            # raw querysets can't explain themselves
+            plan = qs.explain() if hasattr(qs, "explain") else ""
+            self.stdout.write(f"--- {function.__name__} ({strategy}) ---\n{qs.query}\n{plan}\n\n")
+        start = time.perf_counter()
+        for repetition in range(self.repeat):
+            list(function(strategy))
+        duration = (time.perf_counter() - start) / self.repeat
+        return (duration * 1000,)
+
+    def finalize(self):
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(f"{'workload':<16}{'strategy':<10}{'ms/run':>10}\n")
+            for workload, strategy, duration in self.results:
+                self.stdout.write(f"{workload:<16}{strategy:<10}{duration:>10.2f}\n")
@@ -0,0 +1,198 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Compares the relevance and latency of the idea search backends "
+        "with generated sample ideas: how often the searched idea is the top "
+        "hit, the precision of the first pages of category searches, the "
+        "overlap of the first pages with the first backend and the latency "
+        "of the first and third pages. Elasticsearch gets the sample ideas "
+        "indexed and removed afterwards, the generated sample data is "
+        "rolled back."
+    )
+    SILENT, NORMAL, VERBOSE, VERY_VERBOSE = 0, 1, 2, 3
+    BACKENDS = {
+        "elasticsearch": "crudl.apps.ideas.search.ElasticsearchIdeaSearch",
+        "database": "crudl.apps.ideas.search.DatabaseIdeaSearch",
+    }
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument("--ideas", type=int, default=1000)
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--language", help="Language of the searches")
+        parser.add_argument(
+            "--backends", nargs="+", choices=list(self.BACKENDS), default=["elasticsearch", "database"],
+        )
+
+    def handle(self, *args, **options):
+        from django.conf import settings
+        from django.db import transaction
+
+        self.verbosity = options.get("verbosity", self.NORMAL)
+        self.idea_count = options["ideas"]
+        self.category_count = options["categories"]
+        self.query_count = options["queries"]
+        self.lang_code = options["language"] or settings.LANGUAGE_CODE
+        self.backends = options["backends"]
+        if self.category_count < 1 or self.query_count <= self.category_count:
+            raise CommandError("There must be at least one category and more queries than categories.")
+        with transaction.atomic():
+            self.prepare()
+            try:
+                self.main()
+            finally:
+                self.cleanup()
+            transaction.set_rollback(True)
+        self.finalize()
+
+    def prepare(self):
+        import random
+        import time
+        from crudl.apps.search.benchmarks import create_sample_ideas
+        from ...models import Idea
+        from ...search_documents import update_search_documents
+
+        self.results = []
+        self.reference_pages = None
+        self.elasticsearch_pks = []
+        create_sample_ideas(self.idea_count, categories=self.category_count)
+        ideas = list(Idea.objects.filter(title__startswith="Benchmark idea ").values_list("pk", "title"))
+        self.idea_pks = {int(title.rsplit(" ", 1)[1]): str(pk) for pk, title in ideas}
+
+        start = time.perf_counter()
+        update_search_documents(self.idea_pks.values())
+        self.document_duration = time.perf_counter() - start
+
+        # the titles of the sample ideas and categories end with their index,
+        # so the relevant ideas of each query are known; the queries are
+        # distinct, so that no response is taken from the result cache
+        indexes = random.Random(0).sample(range(self.idea_count), min(self.query_count, self.idea_count))
+        self.queries = [
+            (f"benchmark category {index}", {
+                pk for idea_index, pk in self.idea_pks.items() if idea_index % self.category_count == index
+            })
+            for index in range(self.category_count)
+        ] + [
+            (f"benchmark idea {index}", {self.idea_pks[index]})
+            for index in indexes[:self.query_count - self.category_count]
+        ]
+
+    def main(self):
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(
+                f"=== Benchmarking {len(self.queries)} searches in {self.idea_count} ideas ===\n"
+                f"Search documents saved in {self.document_duration:.2f} s\n"
+            )
+        for name in self.backends:
+            if name == "elasticsearch" and not self.index_elasticsearch():
+                continue
+            self.measure(name)
+
+    def index_elasticsearch(self):
+        from django.apps import apps
+        from crudl.apps.search import index_queue
+
+        if not apps.is_installed("django_elasticsearch_dsl"):
+            self.stderr.write("Skipping Elasticsearch, as django_elasticsearch_dsl isn't installed\n")
+            return False
+        from ...documents import IdeaDocument
+
+        try:
+            if not IdeaDocument._get_connection().ping():
+                raise ConnectionError("no response")
+            pks = list(self.idea_pks.values())
+            self.elasticsearch_pks = pks
+            for chunk in index_queue.iter_chunks(pks, index_queue.CHUNK_SIZE):
+                index_queue.update_elasticsearch(list(index_queue.get_ideas(chunk)))
+            IdeaDocument._index.refresh()
+        except Exception as error:
+            self.stderr.write(f"Skipping Elasticsearch: {error}\n")
+            return False
+        return True
+
+    def cleanup(self):
+        from crudl.apps.search import index_queue
+
+        for chunk in index_queue.iter_chunks(self.elasticsearch_pks, index_queue.CHUNK_SIZE):
+            index_queue.remove_elasticsearch(chunk)
+
+    def measure(self, name):
+        from asgiref.sync import async_to_sync
+        from ...search import get_search_backend
+
+        backend = get_search_backend(self.BACKENDS[name])
+        # one event loop for all queries, so that Elasticsearch keeps its connections
+        first_durations, third_durations, first_pages = async_to_sync(self.run_queries)(backend)
+
+        top_hits = precision_hits = precision_total = 0
+        overlaps = []
+        if self.reference_pages is None:
+            self.reference_pages = first_pages
+        for (query, relevant), pks, reference_pks in zip(self.queries, first_pages, self.reference_pages):
+            if len(relevant) == 1:
+                top_hits += bool(pks) and pks[0] in relevant
+            else:
+                precision_hits += len(set(pks) & relevant)
+                precision_total += len(pks)
+            if pks or reference_pks:
+                overlaps.append(len(set(pks) & set(reference_pks)) / len(set(pks) | set(reference_pks)))
+        self.results.append((
+            name,
+            top_hits / (len(self.queries) - self.category_count),
+            precision_hits / precision_total if precision_total else 0.0,
+            sum(overlaps) / len(overlaps) if overlaps else 1.0,
+            first_durations,
+            third_durations,
+        ))
+
+    async def run_queries(self, backend):
+        import time
+        from django.test import RequestFactory
+        from django.utils import translation
+        from ...forms import IdeaSearchForm
+        from ...search import get_async_elasticsearch
+
+        request = RequestFactory().get("/search/")
+        first_durations, third_durations, first_pages = [], [], []
+        with translation.override(self.lang_code):
+            for query, relevant in self.queries:
+                form = IdeaSearchForm(request, data={"q": query})
+                search = backend(form, self.lang_code, 24)
+                start = time.perf_counter()
+                page = await search.page()
+                first_durations.append((time.perf_counter() - start) * 1000)
+                first_pages.append([self.get_idea_pk(obj) for obj in page])
+
+                next_pages = dict(page.next_pages)
+                if page.number + 2 in next_pages:
+                    start = time.perf_counter()
+                    await backend(form, self.lang_code, 24).page(next_pages[page.number + 2])
+                    third_durations.append((time.perf_counter() - start) * 1000)
+        if self.elasticsearch_pks:
+            await get_async_elasticsearch().close()
+        return first_durations, third_durations, first_pages
+
+    def get_idea_pk(self, obj):
+        # the database backend returns search documents, Elasticsearch the hits
+        if hasattr(obj, "idea_id"):
+            return str(obj.idea_id)
+        return str(obj.meta.id)
+
+    def finalize(self):
+        import statistics
+
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(
+                f"{'':<15}{'top hit':>10}{'precision':>10}{'overlap':>10}"
+                f"{'p50 ms':>10}{'p99 ms':>10}{'page 3 p50':>12}\n"
+            )
+            for name, top_hit, precision, overlap, first_durations, third_durations in self.results:
+                percentiles = statistics.quantiles(first_durations, n=100, method="inclusive")
+                third = f"{statistics.median(third_durations):.2f}" if third_durations else "-"
+                self.stdout.write(
+                    f"{name:<15}{top_hit:>10.2f}{precision:>10.2f}{overlap:>10.2f}"
+                    f"{percentiles[49]:>10.2f}{percentiles[98]:>10.2f}{third:>12}\n"
+                )
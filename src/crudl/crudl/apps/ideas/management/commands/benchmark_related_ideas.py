@@ -0,0 +1,163 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Benchmarks the related ideas with generated ideas, whose texts "
+        "are drawn from a Zipf distribution of words: building the TF-IDF "
+        "vectors, computing the related ideas of all ideas, saving them, "
+        "the incremental update after changing some ideas and the query "
+        "of the detail view. The generated sample data is rolled back afterwards."
+    )
+    SILENT, NORMAL, VERBOSE, VERY_VERBOSE = 0, 1, 2, 3
+    BATCH_SIZE = 5000
+
+    def add_arguments(self, parser):
+        from ...related import BATCH_SIZE, COUNT
+
+        # Named (optional) arguments
+        parser.add_argument("--ideas", type=int, default=100000)
+        parser.add_argument("--changed", type=int, default=100, help="Number of ideas changed before the incremental update")
+        parser.add_argument("--words", type=int, default=80, help="Number of words in the content of an idea")
+        parser.add_argument("--vocabulary", type=int, default=20000, help="Number of different words")
+        parser.add_argument("--count", type=int, default=COUNT)
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--queries", type=int, default=1000, help="Number of detail view queries")
+
+    def handle(self, *args, **options):
+        from django.conf import settings
+        from django.db import transaction
+
+        self.verbosity = options.get("verbosity", self.NORMAL)
+        self.idea_count = options["ideas"]
+        self.changed_count = min(options["changed"], self.idea_count)
+        self.word_count = options["words"]
+        self.vocabulary_size = options["vocabulary"]
+        self.count = options["count"]
+        self.batch_size = options["batch_size"]
+        self.query_count = options["queries"]
+        self.lang_code = settings.LANGUAGE_CODE
+        with transaction.atomic():
+            self.prepare()
+            self.main()
+            transaction.set_rollback(True)
+        self.finalize()
+
+    def get_word(self, index):
+        # letters only, as numbers aren't terms
+        word = ""
+        while True:
+            index, letter = divmod(index, 26)
+            word += chr(ord("a") + letter)
+            if not index:
+                return word + "x"
+
+    def get_text(self, generator, length):
+        ranks = generator.zipf(1.1, size=length)
+        return " ".join(self.words[rank % self.vocabulary_size] for rank in ranks)
+
+    def prepare(self):
+        import numpy as np
+        from crudl.apps.category.models import Category
+        from ...models import Idea
+
+        self.results = []
+        self.generator = np.random.default_rng(0)
+        self.words = [self.get_word(index) for index in range(self.vocabulary_size)]
+        categories = [
+            Category.add_root(title=f"Benchmark category {self.get_word(index)}") for index in range(20)
+        ]
+        for batch_start in range(0, self.idea_count, self.BATCH_SIZE):
+            ideas = []
+            for index in range(batch_start, min(batch_start + self.BATCH_SIZE, self.idea_count)):
+                title = self.get_text(self.generator, 5)
+                content = self.get_text(self.generator, self.word_count)
+                ideas.append(Idea(
+                    title=f"Benchmark idea {index}",
+                    content=content,
+                    multilingual_title={self.lang_code: title},
+                    multilingual_content={self.lang_code: content},
+                    picture="ideas/benchmark.png",
+                ))
+            Idea.objects.bulk_create(ideas)
+            Idea.categories.through.objects.bulk_create([
+                Idea.categories.through(idea=idea, category=categories[index % len(categories)])
+                for index, idea in enumerate(ideas, start=batch_start)
+            ])
+            if self.verbosity >= self.VERBOSE:
+                self.stdout.write(f"Created {batch_start + len(ideas)} ideas\n")
+
+    def main(self):
+        import datetime
+        import time
+        from django.utils.timezone import now as timezone_now
+        from crudl.apps.search.models import IndexWatermark
+        from ...models import Idea
+        from ...related import LanguageVectors, get_watermark_name, save_related_ideas, update_related_ideas
+
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(f"=== Benchmarking the related ideas of {self.idea_count} ideas ===\n")
+
+        start = time.perf_counter()
+        vectors = LanguageVectors(self.lang_code)
+        self.add_result("TF-IDF vectors", start)
+
+        start = time.perf_counter()
+        neighbours = vectors.get_neighbours(vectors.pks, self.count, self.batch_size)
+        self.add_result("all related ideas", start)
+
+        start = time.perf_counter()
+        saved = save_related_ideas(self.lang_code, neighbours, replace_all=True)
+        self.add_result(f"saving {saved} rows", start)
+        IndexWatermark.objects.update_or_create(
+            name=get_watermark_name(self.lang_code), defaults={"modified": timezone_now()},
+        )
+
+        changed_pks = [
+            vectors.pks[row]
+            for row in self.generator.choice(len(vectors.pks), self.changed_count, replace=False)
+        ]
+        for pk in changed_pks:
+            content = self.get_text(self.generator, self.word_count)
+            Idea.objects.filter(pk=pk).update(
+                multilingual_content={self.lang_code: content}, modified=timezone_now(),
+            )
+        start = time.perf_counter()
+        counts = update_related_ideas(
+            [self.lang_code], count=self.count, batch_size=self.batch_size, margin=datetime.timedelta(0),
+        )
+        self.add_result(f"incremental ({counts[self.lang_code]} ideas)", start)
+        self.measure_detail_queries(vectors.pks)
+
+    def measure_detail_queries(self, pks):
+        import time
+        from ...models import RelatedIdea
+
+        durations = []
+        for row in self.generator.choice(len(pks), min(self.query_count, len(pks)), replace=False):
+            start = time.perf_counter()
+            list(
+                RelatedIdea.objects.filter(
+                    idea=pks[row], language=self.lang_code,
+                ).select_related("related").only("related", "related__multilingual_title")
+            )
+            durations.append((time.perf_counter() - start) * 1000)
+        self.query_durations = durations
+
+    def add_result(self, name, start):
+        import time
+
+        self.results.append((name, time.perf_counter() - start))
+        if self.verbosity >= self.VERBOSE:
+            self.stdout.write(f"{name}: {self.results[-1][1]:.2f} s\n")
+
+    def finalize(self):
+        import statistics
+
+        if self.verbosity >= self.NORMAL:
+            for name, duration in self.results:
+                self.stdout.write(f"{name:<35}{duration:>10.2f} s\n")
+            percentiles = statistics.quantiles(self.query_durations, n=100, method="inclusive")
+            self.stdout.write(
+                f"{'detail view query':<35}{percentiles[49]:>10.2f} ms p50{percentiles[98]:>10.2f} ms p99\n"
+            )
@@ -0,0 +1,202 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Compares the translation tables with the JSON multilingual fields "
+        "on list, detail and Elasticsearch-prepare workloads. "
+        "The generated sample data is rolled back afterwards."
+    )
+    SILENT, NORMAL, VERBOSE, VERY_VERBOSE = 0, 1, 2, 3
+    PAGE_SIZE = 24
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument("--ideas", type=int, default=240)
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument("--language", type=str, default="de")
+
+    def handle(self, *args, **options):
+        from django.db import transaction
+
+        self.verbosity = options.get("verbosity", self.NORMAL)
+        self.idea_count = options["ideas"]
+        self.category_count = options["categories"]
+        self.repeat = options["repeat"]
+        self.language = options["language"]
+        with transaction.atomic():
+            self.prepare()
+            self.main()
+            transaction.set_rollback(True)
+        self.finalize()
+
+    def prepare(self):
+        from django.conf import settings
+        from crudl.apps.category.models import Category, CategoryTranslations
+        from ...models import Idea, IdeaTranslations
+
+        self.results = []
+        languages = settings.LANGUAGES_EXCEPT_THE_DEFAULT
+        categories = [
+            Category.add_root(title=f"Benchmark category {index}")
+            for index in range(self.category_count)
+        ]
+        CategoryTranslations.objects.bulk_create([
+            CategoryTranslations(category=category, language=lang_code, title=f"{category.title} ({lang_code})")
+            for category in categories
+            for lang_code, lang_name in languages
+        ])
+        for category in categories:
+            category.sync_multilingual_fields()
+
+        ideas = []
+        for index in range(self.idea_count):
+            title = f"Benchmark idea {index}"
+            content = f"Content of the benchmark idea {index}. " * 20
+            ideas.append(Idea(
+                title=title,
+                content=content,
+                picture="ideas/benchmark.png",
+                multilingual_title=dict(
+                    [(settings.LANGUAGE_CODE, title)]
+                    + [(lang_code, f"{title} ({lang_code})") for lang_code, lang_name in languages]
+                ),
+                multilingual_content=dict(
+                    [(settings.LANGUAGE_CODE, content)]
+                    + [(lang_code, f"{content} ({lang_code})") for lang_code, lang_name in languages]
+                ),
+            ))
+        ideas = Idea.objects.bulk_create(ideas)
+        IdeaTranslations.objects.bulk_create([
+            IdeaTranslations(
+                idea=idea,
+                language=lang_code,
+                title=idea.multilingual_title[lang_code],
+                content=idea.multilingual_content[lang_code],
+            )
+            for idea in ideas
+            for lang_code, lang_name in languages
+        ])
+        Idea.categories.through.objects.bulk_create([
+            Idea.categories.through(idea=idea, category=categories[index % len(categories)])
+            for index, idea in enumerate(ideas)
+        ])
+        self.idea_pk = ideas[0].pk
+
+    def main(self):
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(
+                f"=== Benchmarking {self.idea_count} ideas in language '{self.language}' ===\n"
+            )
+        workloads = (
+            ("list", self.list_from_tables, self.list_from_json),
+            ("detail", self.detail_from_tables, self.detail_from_json),
+            ("es-prepare", self.prepare_from_tables, self.prepare_from_json),
+        )
+        for workload, tables_function, json_function in workloads:
+            for layout, function in (("tables", tables_function), ("json", json_function)):
+                self.results.append((workload, layout) + self.measure(function))
+
+    def measure(self, function):
+        import time
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.utils import translation
+
+        with translation.override(self.language):
+            with CaptureQueriesContext(connection) as queries:
+                function()
+            query_count = len(queries)
+            start = time.perf_counter()
+            for repetition in range(self.repeat):
+                function()
+            duration = (time.perf_counter() - start) / self.repeat
+        return query_count, duration * 1000
+
+    def list_from_tables(self):
+        from ...models import Idea
+
+        qs = Idea.objects.with_translations("categories").order_by("pk")[:self.PAGE_SIZE]
+        return [
+            (idea.translated_title, idea.translated_content, [
+                category.translated_title for category in idea.categories.all()
+            ])
+            for idea in qs
+        ]
+
+    def list_from_json(self):
+        from ...models import Idea
+
+        qs = Idea.objects.prefetch_related("categories").order_by("pk")[:self.PAGE_SIZE]
+        return [
+            (idea.multilingual_title.translated, idea.multilingual_content.translated, [
+                category.multilingual_title.translated for category in idea.categories.all()
+            ])
+            for idea in qs
+        ]
+
+    def detail_from_tables(self):
+        from ...models import Idea
+
+        idea = Idea.objects.with_translations("categories").get(pk=self.idea_pk)
+        return (idea.translated_title, idea.translated_content, [
+            category.translated_title for category in idea.categories.all()
+        ])
+
+    def detail_from_json(self):
+        from ...models import Idea
+
+        idea = Idea.objects.prefetch_related("categories").get(pk=self.idea_pk)
+        return (idea.multilingual_title.translated, idea.multilingual_content.translated, [
+            category.multilingual_title.translated for category in idea.categories.all()
+        ])
+
+    def prepare_from_tables(self):
+        from ...models import Idea
+
+        documents = []
+        qs = Idea.objects.prefetch_related(
+            "translations", "categories__translations"
+        ).order_by("pk")[:self.PAGE_SIZE]
+        for idea in qs:
+            document = {"title_en": idea.title, "content_en": idea.content}
+            for translation in idea.translations.all():
+                lang_code_underscored = translation.language.replace("-", "_")
+                document[f"title_{lang_code_underscored}"] = translation.title
+                document[f"content_{lang_code_underscored}"] = translation.content
+            document["categories"] = []
+            for category in idea.categories.all():
+                category_dict = {"pk": category.pk, "title_en": category.title}
+                for translation in category.translations.all():
+                    lang_code_underscored = translation.language.replace("-", "_")
+                    category_dict[f"title_{lang_code_underscored}"] = translation.title
+                document["categories"].append(category_dict)
+            documents.append(document)
+        return documents
+
+    def prepare_from_json(self):
+        from ...models import Idea
+
+        documents = []
+        qs = Idea.objects.prefetch_related("categories").order_by("pk")[:self.PAGE_SIZE]
+        for idea in qs:
+            document = {}
+            for lang_code, title in idea.multilingual_title.items():
+                document[f"title_{lang_code.replace('-', '_')}"] = title
+            for lang_code, content in idea.multilingual_content.items():
+                document[f"content_{lang_code.replace('-', '_')}"] = content
+            document["categories"] = []
+            for category in idea.categories.all():
+                category_dict = {"pk": category.pk}
+                for lang_code, title in category.multilingual_title.items():
+                    category_dict[f"title_{lang_code.replace('-', '_')}"] = title
+                document["categories"].append(category_dict)
+            documents.append(document)
+        return documents
+
+    def finalize(self):
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(f"{'workload':<12}{'layout':<8}{'queries':>8}{'ms/run':>10}\n")
+            for workload, layout, query_count, duration in self.results:
+                self.stdout.write(f"{workload:<12}{layout:<8}{query_count:>8}{duration:>10.2f}\n")
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Rebuilds the search documents of all ideas for the full-text "
+        "search of the primary database in chunks, e.g. after the migration "
+        "or after switching IDEA_SEARCH_BACKEND to the database backend."
+    )
+    SILENT, NORMAL, VERBOSE, VERY_VERBOSE = 0, 1, 2, 3
+
+    def add_arguments(self, parser):
+        from ...search_documents import CHUNK_SIZE
+
+        # Named (optional) arguments
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        import time
+        from django.conf import settings
+        from crudl.apps.search.index_queue import iter_chunks
+        from ...models import Idea, IdeaSearchDocument
+        from ...search_documents import update_search_documents
+
+        self.verbosity = options.get("verbosity", self.NORMAL)
+        chunk_size = options["chunk_size"]
+        start = time.perf_counter()
+        ideas = documents = 0
+        pks = Idea.objects.order_by("pk").values_list("pk", flat=True)
+        for chunk in iter_chunks(pks.iterator(chunk_size=chunk_size), chunk_size):
+            documents += update_search_documents(chunk, chunk_size=chunk_size)
+            ideas += len(chunk)
+            if self.verbosity >= self.VERBOSE:
+                self.stdout.write(f"Updated {ideas} ideas\n")
+        # the documents of the languages removed from the settings
+        removed, details = IdeaSearchDocument.objects.exclude(
+            language__in=[lang_code for lang_code, lang_name in settings.LANGUAGES],
+        ).delete()
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(
+                f"Saved {documents} search documents of {ideas} ideas and removed {removed} "
+                f"in {time.perf_counter() - start:.2f} s\n"
+            )
+
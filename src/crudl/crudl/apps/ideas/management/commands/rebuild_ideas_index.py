@@ -0,0 +1,215 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+
+CHECKPOINT_CACHE_KEY = "rebuild-ideas-index:last-uuid"
+
+
+def init_worker():
+    import django
+
+    # processes started with "spawn" don't inherit the loaded apps
+    django.setup()
+
+
+def prepare_actions(pks):
+    """
+    Loads the ideas with their author, translations, categories and
+    category translations in four queries and returns their bulk actions
+    """
+    from ...documents import IdeaDocument
+
+    document = IdeaDocument()
+    ideas = document.get_queryset().filter(pk__in=pks).order_by("pk")
+    return [
+        document._prepare_action(idea, "index")
+        for idea in ideas
+        if document.should_index_object(idea)
+    ]
+
+
+class FakeTransport(object):
+    """
+    Elasticsearch transport, which accepts bulk requests
+    without sending them anywhere, for benchmarking
+    """
+    def __init__(self, hosts, **kwargs):
+        from elasticsearch.serializer import JSONSerializer
+
+        self.serializer = JSONSerializer()
+
+    def perform_request(self, method, url, headers=None, params=None, body=None):
+        lines = body.decode("utf-8").splitlines() if isinstance(body, bytes) else body.splitlines()
+        # each action line of "index" operations is followed by a source line
+        items = [{"index": {"status": 201}} for line in lines[::2]]
+        return {"took": 0, "errors": False, "items": items}
+
+    def close(self):
+        pass
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Rebuilds the Elasticsearch index of ideas in bulk: "
+        "streams the ideas by UUID, prepares the documents of each chunk "
+        "with prefetched relations in a process pool and sends them with "
+        "streaming_bulk. The last indexed UUID is saved after every chunk "
+        "for --resume. Use --fake-transport to benchmark the documents "
+        "per second without Elasticsearch."
+    )
+    SILENT, NORMAL, VERBOSE, VERY_VERBOSE = 0, 1, 2, 3
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--processes", type=int, default=os.cpu_count(), help="0 prepares the documents in this process")
+        parser.add_argument("--after", type=str, default="", help="Index only the ideas after this UUID")
+        parser.add_argument("--resume", action="store_true", help="Continue after the last UUID of the interrupted rebuild")
+        parser.add_argument("--fake-transport", action="store_true", help="Don't send the documents to Elasticsearch")
+
+    def handle(self, *args, **options):
+        import time
+        from django.core.cache import cache
+
+        self.verbosity = options.get("verbosity", self.NORMAL)
+        self.chunk_size = options["chunk_size"]
+        self.processes = options["processes"]
+        self.fake_transport = options["fake_transport"]
+        after = options["after"]
+        if options["resume"]:
+            after = cache.get(CHECKPOINT_CACHE_KEY)
+            if not after:
+                raise CommandError("There is no interrupted rebuild to resume.")
+
+        client = self.get_client()
+        if not after and not self.fake_transport:
+            self.recreate_index()
+
+        qs = self.get_queryset(after)
+        self.total = qs.count()
+        self.indexed = self.errors = 0
+        self.start = time.perf_counter()
+        for ok, info in self.stream(client, qs):
+            if not ok:
+                self.errors += 1
+                if self.verbosity >= self.VERBOSE:
+                    self.stderr.write(f"{info}\n")
+        if not self.fake_transport:
+            cache.delete(CHECKPOINT_CACHE_KEY)
+        self.finalize()
+
+    def get_client(self):
+        from elasticsearch import Elasticsearch
+        from ...documents import IdeaDocument
+
+        if self.fake_transport:
+            return Elasticsearch(transport_class=FakeTransport)
+        return IdeaDocument._get_connection()
+
+    def recreate_index(self):
+        from ...documents import IdeaDocument
+
+        IdeaDocument._index.delete(ignore=[404])
+        IdeaDocument.init()
+
+    def get_queryset(self, after):
+        from ...models import Idea
+
+        qs = Idea.objects.order_by("pk")
+        if after:
+            qs = qs.filter(pk__gt=after)
+        return qs
+
+    def iter_chunks(self, qs):
+        chunk = []
+        for pk in qs.values_list("pk", flat=True).iterator(chunk_size=self.chunk_size):
+            chunk.append(pk)
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def iter_prepared_chunks(self, qs):
+        if not self.processes:
+            for chunk in self.iter_chunks(qs):
+                yield chunk, prepare_actions(chunk)
+            return
+
+        import multiprocessing
+        from collections import deque
+        from django.db import connections
+
+        # the worker processes must open their own database connections
+        connections.close_all()
+        with multiprocessing.Pool(self.processes, initializer=init_worker) as pool:
+            # a limited number of chunks is prepared ahead of the bulk requests
+            # and they are yielded in UUID order for the checkpoints
+            in_progress = deque()
+            for chunk in self.iter_chunks(qs):
+                in_progress.append((chunk, pool.apply_async(prepare_actions, (chunk,))))
+                if len(in_progress) >= self.processes * 2:
+                    chunk, result = in_progress.popleft()
+                    yield chunk, result.get()
+            while in_progress:
+                chunk, result = in_progress.popleft()
+                yield chunk, result.get()
+
+    def stream(self, client, qs):
+        """
+        Sends the actions of the prepared chunks with streaming_bulk and
+        saves the last UUID of each chunk, when all its actions are done
+        """
+        from collections import deque
+        from elasticsearch.helpers import streaming_bulk
+
+        pending_chunks = deque()
+
+        def actions():
+            for chunk, chunk_actions in self.iter_prepared_chunks(qs):
+                pending_chunks.append((chunk[-1], len(chunk_actions), len(chunk)))
+                if not chunk_actions:
+                    self.finish_chunks(pending_chunks, 0)
+                yield from chunk_actions
+
+        for ok, info in streaming_bulk(
+            client, actions(), chunk_size=self.chunk_size, raise_on_error=False, raise_on_exception=False
+        ):
+            yield ok, info
+            self.finish_chunks(pending_chunks, 1)
+
+    def finish_chunks(self, pending_chunks, action_count):
+        from django.core.cache import cache
+
+        last_uuid, remaining, size = pending_chunks[0]
+        remaining -= action_count
+        pending_chunks[0] = (last_uuid, remaining, size)
+        while pending_chunks and pending_chunks[0][1] <= 0:
+            last_uuid, remaining, size = pending_chunks.popleft()
+            self.indexed += size
+            if not self.fake_transport:
+                cache.set(CHECKPOINT_CACHE_KEY, str(last_uuid), timeout=None)
+            self.report_progress(last_uuid)
+
+    def report_progress(self, last_uuid):
+        import time
+
+        if self.verbosity >= self.NORMAL:
+            duration = time.perf_counter() - self.start
+            self.stdout.write(
+                f"{self.indexed}/{self.total} ideas, "
+                f"{self.indexed / duration if duration else 0:.0f} docs/s, "
+                f"last UUID {last_uuid}\n"
+            )
+
+    def finalize(self):
+        import time
+        from crudl.apps.search import result_cache
+
+        if not self.fake_transport:
+            result_cache.bump_generation()
+        duration = time.perf_counter() - self.start
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(
+                f"Indexed {self.indexed} ideas with {self.errors} errors in {duration:.2f} s "
+                f"({self.indexed / duration if duration else 0:.0f} docs/s)\n"
+            )
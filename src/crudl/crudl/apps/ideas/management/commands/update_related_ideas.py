@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Computes the related ideas of each idea by the cosine similarity "
+        "of the TF-IDF vectors of their titles, contents and categories "
+        "per language. Only the ideas affected by the ideas modified since "
+        "the previous run are recomputed, unless --full is given. "
+        "Run it from cron, e.g. every few minutes."
+    )
+    SILENT, NORMAL, VERBOSE, VERY_VERBOSE = 0, 1, 2, 3
+
+    def add_arguments(self, parser):
+        from ...related import BATCH_SIZE, COUNT
+
+        # Named (optional) arguments
+        parser.add_argument("--language", action="append", dest="languages", help="Language to update")
+        parser.add_argument("--full", action="store_true", help="Recompute the related ideas of all ideas")
+        parser.add_argument("--count", type=int, default=COUNT, help="Number of related ideas per idea")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Ideas per matrix multiplication")
+
+    def handle(self, *args, **options):
+        import time
+        from ...related import update_related_ideas
+
+        self.verbosity = options.get("verbosity", self.NORMAL)
+        start = time.perf_counter()
+        counts = update_related_ideas(
+            options["languages"], full=options["full"], count=options["count"], batch_size=options["batch_size"],
+        )
+        if self.verbosity >= self.NORMAL:
+            for lang_code, count in counts.items():
+                if count or self.verbosity >= self.VERBOSE:
+                    self.stdout.write(f"{lang_code}: {count} ideas\n")
+            self.stdout.write(f"Updated the related ideas in {time.perf_counter() - start:.2f} s\n")
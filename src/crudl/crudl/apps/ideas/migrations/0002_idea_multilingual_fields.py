@@ -0,0 +1,121 @@
+# Generated by Django 4.0.5 on 2026-10-18 09:30
+
+import crudl.apps.core.model_fields
+from django.db import migrations, models
+import django.db.models.fields.json
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idea',
+            name='multilingual_content',
+            field=crudl.apps.core.model_fields.MultilingualTextField(blank=True, default=dict, editable=False, verbose_name='Content in all languages'),
+        ),
+        migrations.AddField(
+            model_name='idea',
+            name='multilingual_title',
+            field=crudl.apps.core.model_fields.MultilingualCharField(blank=True, default=dict, editable=False, max_length=200, verbose_name='Title in all languages'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('bg', 'multilingual_title'), name='idea_title_bg'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('hr', 'multilingual_title'), name='idea_title_hr'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('cs', 'multilingual_title'), name='idea_title_cs'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('da', 'multilingual_title'), name='idea_title_da'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('nl', 'multilingual_title'), name='idea_title_nl'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('en', 'multilingual_title'), name='idea_title_en'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('et', 'multilingual_title'), name='idea_title_et'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('fi', 'multilingual_title'), name='idea_title_fi'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('fr', 'multilingual_title'), name='idea_title_fr'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('de', 'multilingual_title'), name='idea_title_de'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('el', 'multilingual_title'), name='idea_title_el'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('hu', 'multilingual_title'), name='idea_title_hu'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('ga', 'multilingual_title'), name='idea_title_ga'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('it', 'multilingual_title'), name='idea_title_it'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('lv', 'multilingual_title'), name='idea_title_lv'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('lt', 'multilingual_title'), name='idea_title_lt'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('mt', 'multilingual_title'), name='idea_title_mt'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('pl', 'multilingual_title'), name='idea_title_pl'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('pt', 'multilingual_title'), name='idea_title_pt'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('ro', 'multilingual_title'), name='idea_title_ro'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('sk', 'multilingual_title'), name='idea_title_sk'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('sl', 'multilingual_title'), name='idea_title_sl'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('es', 'multilingual_title'), name='idea_title_es'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('sv', 'multilingual_title'), name='idea_title_sv'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import migrations
+
+CHUNK_SIZE = 500
+
+
+def fill_multilingual_fields(apps, schema_editor):
+    Idea = apps.get_model("ideas", "Idea")
+    qs = Idea.objects.order_by("pk").prefetch_related("translations")
+    for start in range(0, qs.count(), CHUNK_SIZE):
+        for idea in qs[start:start + CHUNK_SIZE]:
+            idea.multilingual_title = {settings.LANGUAGE_CODE: idea.title}
+            idea.multilingual_content = {settings.LANGUAGE_CODE: idea.content}
+            for translation in idea.translations.all():
+                idea.multilingual_title[translation.language] = translation.title
+                idea.multilingual_content[translation.language] = translation.content
+            idea.save(update_fields=["multilingual_title", "multilingual_content"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0002_idea_multilingual_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_multilingual_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.5 on 2026-10-18 09:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0003_fill_multilingual_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(fields=['modified'], name='idea_modified'),
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 4.0.5 on 2026-10-18 09:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+POSTGRESQL_FORWARD = [
+    'ALTER TABLE "ideas_ideasearchdocument" ADD COLUMN "search_vector" tsvector',
+    """
+    CREATE FUNCTION ideas_ideasearchdocument_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector(NEW.configuration::regconfig, coalesce(NEW.title, '')), 'A')
+            || setweight(to_tsvector(NEW.configuration::regconfig, coalesce(NEW.categories, '')), 'B')
+            || setweight(to_tsvector(NEW.configuration::regconfig, coalesce(NEW.content, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER ideas_ideasearchdocument_search_vector
+    BEFORE INSERT OR UPDATE ON "ideas_ideasearchdocument"
+    FOR EACH ROW EXECUTE PROCEDURE ideas_ideasearchdocument_search_vector()
+    """,
+    'CREATE INDEX "idea_search_vector" ON "ideas_ideasearchdocument" USING GIN ("search_vector")',
+]
+POSTGRESQL_BACKWARD = [
+    'DROP TRIGGER IF EXISTS ideas_ideasearchdocument_search_vector ON "ideas_ideasearchdocument"',
+    "DROP FUNCTION IF EXISTS ideas_ideasearchdocument_search_vector()",
+    'DROP INDEX IF EXISTS "idea_search_vector"',
+    'ALTER TABLE "ideas_ideasearchdocument" DROP COLUMN IF EXISTS "search_vector"',
+]
+# external content table, which is kept in sync by the triggers
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE ideas_ideasearchdocument_fts USING fts5(
+        title, content, categories,
+        content='ideas_ideasearchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER ideas_ideasearchdocument_fts_insert AFTER INSERT ON ideas_ideasearchdocument BEGIN
+        INSERT INTO ideas_ideasearchdocument_fts(rowid, title, content, categories)
+        VALUES (new.id, new.title, new.content, new.categories);
+    END
+    """,
+    """
+    CREATE TRIGGER ideas_ideasearchdocument_fts_delete AFTER DELETE ON ideas_ideasearchdocument BEGIN
+        INSERT INTO ideas_ideasearchdocument_fts(ideas_ideasearchdocument_fts, rowid, title, content, categories)
+        VALUES ('delete', old.id, old.title, old.content, old.categories);
+    END
+    """,
+    """
+    CREATE TRIGGER ideas_ideasearchdocument_fts_update AFTER UPDATE ON ideas_ideasearchdocument BEGIN
+        INSERT INTO ideas_ideasearchdocument_fts(ideas_ideasearchdocument_fts, rowid, title, content, categories)
+        VALUES ('delete', old.id, old.title, old.content, old.categories);
+        INSERT INTO ideas_ideasearchdocument_fts(rowid, title, content, categories)
+        VALUES (new.id, new.title, new.content, new.categories);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS ideas_ideasearchdocument_fts_insert",
+    "DROP TRIGGER IF EXISTS ideas_ideasearchdocument_fts_delete",
+    "DROP TRIGGER IF EXISTS ideas_ideasearchdocument_fts_update",
+    "DROP TABLE IF EXISTS ideas_ideasearchdocument_fts",
+]
+
+
+def execute_for_vendor(statements):
+    def execute(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return execute
+
+
+create_search_index = execute_for_vendor({"postgresql": POSTGRESQL_FORWARD, "sqlite": SQLITE_FORWARD})
+drop_search_index = execute_for_vendor({"postgresql": POSTGRESQL_BACKWARD, "sqlite": SQLITE_BACKWARD})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0004_idea_modified_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdeaSearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(max_length=7, verbose_name='Language')),
+                ('configuration', models.CharField(max_length=50, verbose_name='Configuration')),
+                ('title', models.CharField(max_length=200, verbose_name='Title')),
+                ('content', models.TextField(verbose_name='Content')),
+                ('categories', models.TextField(blank=True, verbose_name='Categories')),
+                ('url_path', models.CharField(max_length=255, verbose_name='URL path')),
+                ('idea', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_documents', to='ideas.idea', verbose_name='Idea')),
+            ],
+            options={
+                'verbose_name': 'Idea Search Document',
+                'verbose_name_plural': 'Idea Search Documents',
+                'unique_together': {('idea', 'language')},
+            },
+        ),
+        # the documents are created by "manage.py rebuild_idea_search_documents"
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
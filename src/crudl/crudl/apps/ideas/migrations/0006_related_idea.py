@@ -0,0 +1,31 @@
+# Generated by Django 4.0.5 on 2026-10-18 09:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0005_idea_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedIdea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(max_length=7, verbose_name='Language')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Rank')),
+                ('score', models.FloatField(verbose_name='Score')),
+                ('idea', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_ideas', to='ideas.idea', verbose_name='Idea')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ideas.idea', verbose_name='Related idea')),
+            ],
+            options={
+                'verbose_name': 'Related Idea',
+                'verbose_name_plural': 'Related Ideas',
+                'ordering': ['rank'],
+                'unique_together': {('idea', 'language', 'rank')},
+            },
+        ),
+    ]
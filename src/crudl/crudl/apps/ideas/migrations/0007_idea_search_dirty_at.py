@@ -0,0 +1,22 @@
+# Generated by Django 4.0.5 on 2026-10-18 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0006_related_idea'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idea',
+            name='search_dirty_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Changed for the search'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(fields=['search_dirty_at'], name='idea_search_dirty_at'),
+        ),
+    ]
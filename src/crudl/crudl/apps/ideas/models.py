@@ -2,7 +2,6 @@ import uuid
 import contextlib
 import os
 from django.db import models
-from django.urls import reverse
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils.timezone import now as timezone_now
@@ -10,17 +9,17 @@ from django.utils.translation import gettext_lazy as _
 from imagekit.models import ImageSpecField
 # from mptt.fields import TreeManyToManyField
 from pilkit.processors import ResizeToFill
-from crudl.apps.core.model_fields import TranslatedField
+from crudl.apps.core.managers import TranslatedQuerySet
 from crudl.apps.core.models import (
     object_relation_base_factory as generic_relation,
-    CreationModificationDateBase, UrlBase
+    CreationModificationDateBase, UrlBase, MultilingualSyncBase
 )
 from crudl.apps.core.processors import WatermarkOverlay
-# from crudl.apps.core.model_fields import (
-#     MultilingualTextField,
-#     MultilingualCharField,
-#     TranslatedField
-# )
+from crudl.apps.core.model_fields import (
+    MultilingualTextField,
+    MultilingualCharField,
+    TranslatedField
+)
 
 def upload_to(instance, filename):
     now = timezone_now()
@@ -37,7 +36,7 @@ RATING_CHOICES = (
 )
 
 
-class Idea(CreationModificationDateBase, UrlBase):
+class Idea(CreationModificationDateBase, UrlBase, MultilingualSyncBase):
     uuid = models.UUIDField(
         primary_key = True, default = uuid.uuid4, editable = False
     )
@@ -79,14 +78,41 @@ class Idea(CreationModificationDateBase, UrlBase):
     )
     created = models.DateTimeField(auto_now_add=True)
     modified = models.DateTimeField(auto_now=True)
+    # Set when the categories or the translations of the idea change, so that the
+    # search indexes and related ideas are updated without changing "modified"
+    search_dirty_at = models.DateTimeField(
+        _("Changed for the search"), blank=True, null=True, editable=False
+    )
     # Use translateField if you don't want to keep migrating model every time you change language'
     translated_title = TranslatedField("title")
     translated_content = TranslatedField("content")
     translated_categories = TranslatedField("categories")
+    # All languages in one JSON column, kept in sync with title, content and the translations
+    multilingual_title = MultilingualCharField(
+        _("Title in all languages"), max_length=200, editable=False
+    )
+    multilingual_content = MultilingualTextField(
+        _("Content in all languages"), editable=False
+    )
+    multilingual_fields = {
+        "title": "multilingual_title",
+        "content": "multilingual_content",
+    }
+
+    objects = TranslatedQuerySet.as_manager()
+
+    url_name = "ideas:idea_detail"
     
     class Meta:
         verbose_name = _("Idea")
         verbose_name_plural = _("Ideas")
+        indexes = MultilingualCharField.get_language_indexes(
+            "multilingual_title", name_prefix="idea_title"
+        ) + [
+            # the incremental search index updates filter by it
+            models.Index(fields=["modified"], name="idea_modified"),
+            models.Index(fields=["search_dirty_at"], name="idea_search_dirty_at"),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields = ["title"],
@@ -121,13 +147,10 @@ class Idea(CreationModificationDateBase, UrlBase):
     def __str__(self):
         return self.title
     
-    def get_url_path(self):
-        return reverse("ideas:idea_detail", kwargs={"pk":self.pk})
-    
     def delete(self, *args, **kwargs):
         from django.core.files.storage import default_storage
         if self.picture:
-            with contextlib.supress(FileNotFoundError):
+            with contextlib.suppress(FileNotFoundError):
                 default_storage.delete(
                     self.picture_social.path
                 )
@@ -204,4 +227,92 @@ class IdeaTranslations(models.Model):
         unique_together = [["idea", "language"]]
     
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.idea.sync_multilingual_fields()
+    save.alters_data = True
+
+    def delete(self, *args, **kwargs):
+        idea = self.idea
+        result = super().delete(*args, **kwargs)
+        idea.sync_multilingual_fields()
+        return result
+    delete.alters_data = True
+
+
+class IdeaSearchDocument(models.Model):
+    """
+    Texts of an idea in one language for the full-text search in the
+    primary database. The search vector is maintained by the database
+    from these columns: a "search_vector" tsvector column with a GIN
+    index and a trigger on PostgreSQL, an FTS5 table on SQLite.
+    """
+    idea = models.ForeignKey(
+        Idea,
+        verbose_name = _("Idea"),
+        on_delete = models.CASCADE,
+        related_name = "search_documents",
+    )
+    language = models.CharField(_("Language"), max_length=7)
+    # text search configuration of PostgreSQL for the language
+    configuration = models.CharField(_("Configuration"), max_length=50)
+    title = models.CharField(_("Title"), max_length=200)
+    content = models.TextField(_("Content"))
+    categories = models.TextField(_("Categories"), blank=True)
+    url_path = models.CharField(_("URL path"), max_length=255)
+
+    class Meta:
+        verbose_name = _("Idea Search Document")
+        verbose_name_plural = _("Idea Search Documents")
+        unique_together = [["idea", "language"]]
+
+    def __str__(self):
+        return self.title
+
+    @property
+    def translated_title(self):
+        return self.title
+
+    def get_url_path(self):
+        return self.url_path
+
+    @property
+    def picture_thumbnail_url(self):
+        if not self.idea.picture:
+            return ""
+        return self.idea.picture_thumbnail.url
+
+
+class RelatedIdea(models.Model):
+    """
+    One of the most similar ideas to an idea in a language by the
+    TF-IDF vectors of their titles, contents and categories,
+    computed by "manage.py update_related_ideas"
+    """
+    idea = models.ForeignKey(
+        Idea,
+        verbose_name = _("Idea"),
+        on_delete = models.CASCADE,
+        related_name = "related_ideas",
+    )
+    related = models.ForeignKey(
+        Idea,
+        verbose_name = _("Related idea"),
+        on_delete = models.CASCADE,
+        related_name = "+",
+    )
+    language = models.CharField(_("Language"), max_length=7)
+    # position in the list of the idea starting from 0
+    rank = models.PositiveSmallIntegerField(_("Rank"))
+    score = models.FloatField(_("Score"))
+
+    class Meta:
+        verbose_name = _("Related Idea")
+        verbose_name_plural = _("Related Ideas")
+        ordering = ["rank"]
+        unique_together = [["idea", "language", "rank"]]
+
+    def __str__(self):
+        return f"{self.idea_id} -> {self.related_id} ({self.score:.3f})"
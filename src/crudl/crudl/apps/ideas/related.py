@@ -0,0 +1,230 @@
+import collections
+import datetime
+import re
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now as timezone_now
+
+COUNT = getattr(settings, "IDEA_RELATED_COUNT", 6)
+BATCH_SIZE = getattr(settings, "IDEA_RELATED_BATCH_SIZE", 1000)
+# the ideas, which share only terms with lower similarity, aren't related
+MIN_SCORE = getattr(settings, "IDEA_RELATED_MIN_SCORE", 0.05)
+# terms in more than this share of the ideas are ignored like stop words,
+# which also keeps the products of the batches sparse
+MAX_DOCUMENT_FREQUENCY = getattr(settings, "IDEA_RELATED_MAX_DOCUMENT_FREQUENCY", 0.2)
+# modifications committed later than their timestamp are still found
+SAFETY_MARGIN = getattr(settings, "IDEA_RELATED_SAFETY_MARGIN", datetime.timedelta(minutes=5))
+TITLE_WEIGHT = 3
+CATEGORY_WEIGHT = 2
+
+# words of at least two letters
+TERM_RE = re.compile(r"[^\W\d_]{2,}")
+
+
+def get_watermark_name(lang_code):
+    return f"related-ideas:{lang_code}"
+
+
+def get_term_counts(title, content, categories):
+    """
+    Returns the weighted frequencies of the terms of an idea,
+    where the words of the title and categories count more
+    """
+    counts = collections.Counter()
+    for text, weight in ((title, TITLE_WEIGHT), (content, 1), (categories, CATEGORY_WEIGHT)):
+        for term in TERM_RE.findall(text.casefold()):
+            counts[term] += weight
+    return counts
+
+
+def build_matrix(term_counts, max_document_frequency=MAX_DOCUMENT_FREQUENCY):
+    """
+    Returns the L2-normalized TF-IDF vectors of the documents with
+    logarithmic term frequencies as rows of a CSR matrix, so that
+    the products of the rows are their cosine similarities
+    """
+    vocabulary = {}
+    indptr, indices, data = [0], [], []
+    for counts in term_counts:
+        for term, count in counts.items():
+            indices.append(vocabulary.setdefault(term, len(vocabulary)))
+            data.append(count)
+        indptr.append(len(indices))
+    document_count = len(indptr) - 1
+    matrix = sparse.csr_matrix(
+        (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+        shape=(document_count, len(vocabulary)),
+    )
+    document_frequencies = np.bincount(matrix.indices, minlength=len(vocabulary))
+    idf = np.log((1 + document_count) / (1 + document_frequencies)) + 1
+    # the terms of two documents always count, even in small collections
+    idf[document_frequencies > max(max_document_frequency * document_count, 2)] = 0
+    matrix.data = ((1 + np.log(matrix.data)) * idf[matrix.indices]).astype(np.float32)
+    matrix.eliminate_zeros()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(sparse.diags(1 / norms).astype(np.float32) @ matrix)
+
+
+def get_top_neighbours(matrix, rows, count=COUNT, batch_size=BATCH_SIZE, min_score=MIN_SCORE, transposed=None):
+    """
+    Returns a dict of the rows and lists of (row, score) tuples of
+    their most similar other rows. The similarities of a batch of rows
+    to all rows are computed with one sparse matrix multiplication.
+    """
+    if transposed is None:
+        transposed = matrix.T.tocsr()
+    neighbours = {}
+    rows = list(rows)
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        products = (matrix[batch] @ transposed).tocsr()
+        for position, row in enumerate(batch):
+            begin, end = products.indptr[position], products.indptr[position + 1]
+            columns, scores = products.indices[begin:end], products.data[begin:end]
+            candidates = (columns != row) & (scores >= min_score)
+            columns, scores = columns[candidates], scores[candidates]
+            if len(scores) > count:
+                top = np.argpartition(-scores, count - 1)[:count]
+                columns, scores = columns[top], scores[top]
+            order = np.lexsort((columns, -scores))
+            neighbours[row] = [(int(columns[index]), float(scores[index])) for index in order]
+    return neighbours
+
+
+class LanguageVectors(object):
+    """
+    TF-IDF vectors of all ideas in one language
+    """
+    def __init__(self, lang_code, max_document_frequency=MAX_DOCUMENT_FREQUENCY):
+        from crudl.apps.category.models import Category
+        from .models import Idea
+
+        self.lang_code = lang_code
+        category_titles = {
+            pk: multilingual_title.get_translation(lang_code)
+            for pk, multilingual_title in Category.objects.values_list("pk", "multilingual_title")
+        }
+        categories = collections.defaultdict(list)
+        for idea_id, category_id in Idea.categories.through.objects.values_list("idea_id", "category_id"):
+            categories[idea_id].append(category_titles[category_id])
+
+        self.pks = []
+        term_counts = []
+        ideas = Idea.objects.order_by("pk").values_list("pk", "multilingual_title", "multilingual_content")
+        for pk, multilingual_title, multilingual_content in ideas.iterator(chunk_size=2000):
+            self.pks.append(pk)
+            term_counts.append(get_term_counts(
+                multilingual_title.get_translation(lang_code),
+                multilingual_content.get_translation(lang_code),
+                "\n".join(categories.get(pk, [])),
+            ))
+        self.rows = {pk: row for row, pk in enumerate(self.pks)}
+        self.matrix = build_matrix(term_counts, max_document_frequency)
+        self.transposed = self.matrix.T.tocsr()
+
+    def get_neighbours(self, pks, count=COUNT, batch_size=BATCH_SIZE):
+        neighbours = get_top_neighbours(
+            self.matrix, [self.rows[pk] for pk in pks if pk in self.rows],
+            count, batch_size, transposed=self.transposed,
+        )
+        return {
+            self.pks[row]: [(self.pks[column], score) for column, score in items]
+            for row, items in neighbours.items()
+        }
+
+    def get_affected(self, changed_pks, count=COUNT, batch_size=BATCH_SIZE):
+        """
+        Returns the pks of the ideas, whose related ideas can change with
+        the changed ideas: the changed ones, the ones, which have a changed
+        idea among their related ideas, and the ones, which could get one,
+        as it is more similar than their last related idea. The ideas, which
+        lose related ideas by deletion, are marked as modified on delete.
+        """
+        from django.db.models import Count, Min
+        from .models import RelatedIdea
+
+        current = {
+            row["idea"]: (row["count"], row["min_score"])
+            for row in RelatedIdea.objects.filter(language=self.lang_code).values("idea").annotate(
+                count=Count("pk"), min_score=Min("score"),
+            )
+        }
+        changed_pks = {pk for pk in changed_pks if pk in self.rows}
+        affected = set(changed_pks)
+        affected.update(
+            RelatedIdea.objects.filter(language=self.lang_code, related__in=changed_pks).values_list("idea", flat=True)
+        )
+
+        changed_rows = [self.rows[pk] for pk in changed_pks]
+        for start in range(0, len(changed_rows), batch_size):
+            products = (self.matrix[changed_rows[start:start + batch_size]] @ self.transposed).tocsr()
+            products.data[products.data < MIN_SCORE] = 0
+            products.eliminate_zeros()
+            for column, score in zip(products.indices, products.data):
+                pk = self.pks[column]
+                related_count, min_score = current.get(pk, (0, 0))
+                if related_count < count or score > min_score:
+                    affected.add(pk)
+        return affected
+
+
+def save_related_ideas(lang_code, neighbours, replace_all=False):
+    """
+    Replaces the related ideas of the ideas in the language
+    """
+    from .models import RelatedIdea
+
+    objects = [
+        RelatedIdea(idea_id=pk, related_id=related_pk, language=lang_code, rank=rank, score=score)
+        for pk, items in neighbours.items()
+        for rank, (related_pk, score) in enumerate(items)
+    ]
+    queryset = RelatedIdea.objects.filter(language=lang_code)
+    with transaction.atomic():
+        if replace_all:
+            queryset.delete()
+        else:
+            pks = list(neighbours)
+            for start in range(0, len(pks), BATCH_SIZE):
+                queryset.filter(idea__in=pks[start:start + BATCH_SIZE]).delete()
+        RelatedIdea.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+    return len(objects)
+
+
+def update_related_ideas(languages=None, full=False, count=COUNT, batch_size=BATCH_SIZE, margin=SAFETY_MARGIN):
+    """
+    Recomputes the related ideas of the ideas, which can be affected by the
+    ideas modified since the watermark of the language, or of all ideas for
+    the languages without a watermark or with full=True. Returns a dict of
+    language codes and numbers of the ideas with recomputed related ideas.
+    """
+    from crudl.apps.search import incremental
+    from crudl.apps.search.models import IndexWatermark
+    from .models import Idea
+
+    if languages is None:
+        languages = [lang_code for lang_code, lang_name in settings.LANGUAGES]
+    watermarks = dict(IndexWatermark.objects.filter(
+        name__in=[get_watermark_name(lang_code) for lang_code in languages],
+    ).values_list("name", "modified"))
+    counts = {}
+    for lang_code in languages:
+        since = None if full else watermarks.get(get_watermark_name(lang_code))
+        # taken before reading, so that nothing saved meanwhile is skipped
+        started = timezone_now()
+        vectors = LanguageVectors(lang_code)
+        if since is None:
+            pks = vectors.pks
+        else:
+            changed_pks = Idea.objects.filter(
+                incremental.get_changed_ideas_filter(since - margin),
+            ).values_list("pk", flat=True)
+            pks = sorted(vectors.get_affected(set(changed_pks), count, batch_size))
+        neighbours = vectors.get_neighbours(pks, count, batch_size)
+        save_related_ideas(lang_code, neighbours, replace_all=since is None)
+        IndexWatermark.objects.update_or_create(name=get_watermark_name(lang_code), defaults={"modified": started})
+        counts[lang_code] = len(neighbours)
+    return counts
@@ -0,0 +1,241 @@
+import asyncio
+import hashlib
+import json
+import math
+import weakref
+from django.conf import settings
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+from crudl.apps.core.paginators import InvalidCursor, KeysetPage, KeysetPaginator, decode_cursor, encode_cursor
+from crudl.apps.search import result_cache
+
+TOTAL_CACHE_ALIAS = getattr(settings, "IDEA_SEARCH_TOTAL_CACHE_ALIAS", "default")
+TOTAL_CACHE_TIMEOUT = getattr(settings, "IDEA_SEARCH_TOTAL_CACHE_TIMEOUT", 60)
+SEARCH_BACKEND = getattr(settings, "IDEA_SEARCH_BACKEND", "crudl.apps.ideas.search.ElasticsearchIdeaSearch")
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_elasticsearch():
+    """
+    Returns an AsyncElasticsearch client for the running event loop.
+    The client keeps a pool of HTTP connections, which is bound
+    to the loop, so one client is created per loop and reused by
+    all requests of an ASGI worker.
+    """
+    from elasticsearch import AsyncElasticsearch
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncElasticsearch(**settings.ELASTICSEARCH_DSL["default"])
+        _async_clients[loop] = client
+    return client
+
+
+async def fetch(search):
+    """
+    Sends the elasticsearch_dsl.Search and returns the raw response
+    """
+    return await get_async_elasticsearch().search(
+        index=search._index, body=search.to_dict()
+    )
+
+
+def get_total_cache_key(search, lang_code):
+    """
+    Returns the cache key for the number of hits of the query
+    in the language independent of the page
+    """
+    query = json.dumps(search.to_dict().get("query", {}), sort_keys=True)
+    return f"idea-search-total:{lang_code}:{hashlib.md5(query.encode('utf-8')).hexdigest()}"
+
+
+class SearchAfterPaginator(object):
+    """
+    Paginator of Elasticsearch results, which gets the hits of a page and
+    the sort values for the links to the following pages with one request.
+    Deep pages continue with search_after from the last hit of the previous
+    page instead of from/size, so they cost as much as the first one.
+
+    The total is requested with track_total_hits only when it isn't cached
+    for the query and language yet. The responses are cached by
+    search.result_cache until the search indexes are updated. The pages are KeysetPage instances
+    addressed by cursors, so they are rendered like the other keyset pages.
+
+    Args:
+        search: elasticsearch_dsl.Search with the query.
+        per_page: number of hits per page.
+        lang_code: language of the query for the total cache key.
+        window: number of linked pages on each side of the current page.
+        history: number of previous positions kept in the cursors
+            for the links back.
+        sort: sort order ending with a unique keyword field.
+    """
+    count_mode = "exact"
+
+    def __init__(self, search, per_page, lang_code, window=2, history=10, sort=("_score", "uuid")):
+        self.search = search.sort(*sort)
+        self.per_page = int(per_page)
+        self.lang_code = lang_code
+        self.window = window
+        self.history = max(history, window)
+        self.total_cache_key = get_total_cache_key(search, lang_code)
+        self.count = None
+
+    async def page(self, cursor=None):
+        """
+        Returns the page for the cursor or the first page,
+        if the cursor is empty or invalid
+        """
+        from elasticsearch_dsl.response import Response
+
+        positions, number = [], 1
+        if cursor:
+            try:
+                positions, number = decode_cursor(cursor)
+            except InvalidCursor:
+                pass
+        positions = positions[:number - 1]
+        if not positions or not all(isinstance(position, list) for position in positions):
+            positions, number = [], 1
+
+        search = self.search.extra(size=self.per_page * self.window + 1)
+        if positions:
+            search = search.extra(search_after=positions[0])
+        # the request body contains the query, language fields and cursor
+        cache_key = result_cache.get_cache_key(
+            "ideas", await result_cache.aget_generation(), self.lang_code, search.to_dict()
+        )
+
+        async def fetch_with_total():
+            cache = caches[TOTAL_CACHE_ALIAS]
+            count = await cache.aget(self.total_cache_key)
+            raw_response = await fetch(search.extra(track_total_hits=count is None))
+            if count is None:
+                await cache.aset(
+                    self.total_cache_key, raw_response["hits"]["total"]["value"], timeout=TOTAL_CACHE_TIMEOUT
+                )
+            else:
+                raw_response["hits"]["total"] = {"value": count, "relation": "eq"}
+            return raw_response
+
+        response = Response(search, await result_cache.aget_or_set(cache_key, fetch_with_total))
+        self.count = response.hits.total.value
+        return SearchAfterPage(list(response.hits), positions, number, self)
+
+    @cached_property
+    def num_pages(self):
+        if self.count is None:
+            return None
+        return max(math.ceil(self.count / self.per_page), 1)
+
+
+class SearchAfterPage(KeysetPage):
+    """
+    Page of a SearchAfterPaginator. The cursors contain the search_after
+    values of the current page followed by the ones of the previous pages,
+    as Elasticsearch can't look backwards in the same request.
+    """
+    def __init__(self, hits, positions, number, paginator):
+        per_page = paginator.per_page
+        self.object_list = hits[:per_page]
+        self.number = number
+        self.paginator = paginator
+
+        self.previous_pages = []
+        for offset in range(1, paginator.window + 1):
+            page_number = number - offset
+            if page_number < 1:
+                break
+            if page_number == 1:
+                cursor = None
+            elif len(positions) > offset:
+                cursor = encode_cursor(positions[offset:], page_number)
+            else:
+                break
+            self.previous_pages.insert(0, (page_number, cursor))
+
+        self.next_pages = []
+        for offset in range(1, paginator.window + 1):
+            if len(hits) <= offset * per_page:
+                break
+            next_positions = [
+                list(hit.meta.sort) for hit in reversed(hits[per_page - 1:offset * per_page:per_page])
+            ]
+            cursor = encode_cursor((next_positions + positions)[:paginator.history], number + offset)
+            self.next_pages.append((number + offset, cursor))
+
+
+def get_search_backend(path=None):
+    """
+    Returns the class of the idea search backend set by IDEA_SEARCH_BACKEND
+    """
+    return import_string(path or SEARCH_BACKEND)
+
+
+def get_idea_search(form, lang_code):
+    """
+    Returns the elasticsearch_dsl.Search for the phrase of the form in the
+    title, content or category titles of the ideas in the language
+    """
+    from elasticsearch_dsl.query import Q
+    from crudl.apps.search.result_cache import normalize_query
+    from .documents import IdeaDocument
+
+    search = IdeaDocument.search()
+    if form.is_valid():
+        # normalized, so that the variants of the query share cached results
+        value = normalize_query(form.cleaned_data["q"])
+        lang_code_underscored = lang_code.replace("-", "_")
+        search = search.query(
+            Q("match_phrase", **{f"title_{lang_code_underscored}":value})
+            | Q("match_phrase", **{f"content_{lang_code_underscored}":value})
+            | Q(
+                "nested",
+                path="categories",
+                query=Q("match_phrase", **{f"categories__title_{lang_code_underscored}":value},),
+            )
+        )
+    return search
+
+
+class ElasticsearchIdeaSearch(object):
+    """
+    Idea search backend, which pages the phrase matches
+    of Elasticsearch with the SearchAfterPaginator.
+    The objects of the pages are the hits of IdeaDocument.
+    """
+    def __init__(self, form, lang_code, per_page):
+        self.paginator = SearchAfterPaginator(get_idea_search(form, lang_code), per_page, lang_code)
+
+    async def page(self, cursor=None):
+        return await self.paginator.page(cursor)
+
+
+class DatabaseIdeaSearch(object):
+    """
+    Idea search backend, which finds the phrase in the IdeaSearchDocuments
+    of the primary database, ordered by relevance and paged by a
+    KeysetPaginator. The documents are rendered like the Elasticsearch
+    hits, so the view and template stay the same.
+    """
+    def __init__(self, form, lang_code, per_page):
+        self.form = form
+        self.lang_code = lang_code
+        self.per_page = per_page
+
+    def get_queryset(self):
+        from crudl.apps.search.result_cache import normalize_query
+        from .search_documents import get_search_queryset
+
+        value = normalize_query(self.form.cleaned_data["q"]) if self.form.is_valid() else ""
+        return get_search_queryset(value, self.lang_code).order_by("-rank", "pk")
+
+    def get_page(self, cursor=None):
+        return KeysetPaginator(self.get_queryset(), self.per_page).page(cursor)
+
+    async def page(self, cursor=None):
+        return await sync_to_async(self.get_page)(cursor)
@@ -0,0 +1,173 @@
+import re
+import threading
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+CHUNK_SIZE = getattr(settings, "IDEA_SEARCH_DOCUMENTS_CHUNK_SIZE", 500)
+# the documents are only kept up to date for the database search backend
+ENABLED = getattr(
+    settings,
+    "IDEA_SEARCH_DOCUMENTS_ENABLED",
+    getattr(settings, "IDEA_SEARCH_BACKEND", "").endswith(".DatabaseIdeaSearch"),
+)
+# text search configurations of PostgreSQL for the languages,
+# the other languages are only lowercased with "simple"
+CONFIGURATIONS = getattr(settings, "IDEA_SEARCH_CONFIGURATIONS", {
+    "da": "danish",
+    "nl": "dutch",
+    "en": "english",
+    "fi": "finnish",
+    "fr": "french",
+    "de": "german",
+    "el": "greek",
+    "hu": "hungarian",
+    "it": "italian",
+    "pt": "portuguese",
+    "ro": "romanian",
+    "es": "spanish",
+    "sv": "swedish",
+})
+# FTS5 table of the search documents on SQLite
+FTS_TABLE = "ideas_ideasearchdocument_fts"
+# weights of the title, content and categories columns of the FTS5 table
+FTS_WEIGHTS = (4.0, 1.0, 2.0)
+
+_pending = threading.local()
+
+
+def get_configuration(lang_code):
+    return CONFIGURATIONS.get(lang_code, "simple")
+
+
+def get_search_documents(idea):
+    """
+    Returns the unsaved IdeaSearchDocuments of the idea in all languages.
+    The categories of the idea should be prefetched.
+    """
+    from .models import IdeaSearchDocument
+
+    url_paths = idea.get_url_paths()
+    categories = list(idea.categories.all())
+    documents = []
+    for lang_code, lang_name in settings.LANGUAGES:
+        documents.append(IdeaSearchDocument(
+            idea=idea,
+            language=lang_code,
+            configuration=get_configuration(lang_code),
+            title=idea.multilingual_title.get_translation(lang_code),
+            content=idea.multilingual_content.get_translation(lang_code),
+            categories="\n".join(
+                category.multilingual_title.get_translation(lang_code) for category in categories
+            ),
+            url_path=url_paths[lang_code],
+        ))
+    return documents
+
+
+def update_search_documents(pks, chunk_size=CHUNK_SIZE):
+    """
+    Replaces the search documents of the ideas with the current texts
+    and removes the ones of the ideas, which don't exist anymore.
+    Returns the number of saved documents.
+    """
+    from .models import Idea, IdeaSearchDocument
+
+    pks = sorted({str(pk) for pk in pks})
+    saved = 0
+    for start in range(0, len(pks), chunk_size):
+        chunk = pks[start:start + chunk_size]
+        documents = []
+        for idea in Idea.objects.filter(pk__in=chunk).prefetch_related("categories"):
+            documents.extend(get_search_documents(idea))
+        with transaction.atomic():
+            IdeaSearchDocument.objects.filter(idea__in=chunk).delete()
+            IdeaSearchDocument.objects.bulk_create(documents)
+        saved += len(documents)
+    return saved
+
+
+def schedule_update(pks):
+    """
+    Updates the search documents of the ideas, when the current
+    transaction is committed, or immediately in autocommit mode.
+    The ideas changed several times in a transaction are updated once.
+    The ones left over from a rollback are updated with the next commit,
+    which doesn't harm, as the documents are read from the database.
+    """
+    if not ENABLED:
+        return
+    pending = getattr(_pending, "pks", None)
+    if pending is None:
+        pending = _pending.pks = set()
+    pending.update(str(pk) for pk in pks)
+    if pending:
+        transaction.on_commit(flush_pending)
+
+
+def flush_pending():
+    pks = getattr(_pending, "pks", None)
+    _pending.pks = set()
+    if pks:
+        update_search_documents(pks)
+
+
+def get_fts_phrase(value):
+    """
+    Returns the value as an FTS5 phrase or None, if it has no words
+    """
+    if not re.search(r"\w", value):
+        return None
+    return '"' + value.replace('"', '""') + '"'
+
+
+def get_search_queryset(value, lang_code):
+    """
+    Returns the search documents in the language, which contain the phrase
+    in their title, content or categories, with the relevance as "rank".
+    PostgreSQL ranks the stored search vectors, where the titles have
+    the weight A, the categories B and the contents C, SQLite uses
+    BM25 of the FTS5 table, and the other databases only find the
+    phrase with icontains.
+    """
+    from .models import IdeaSearchDocument
+
+    queryset = IdeaSearchDocument.objects.filter(language=lang_code).select_related("idea")
+    if not value:
+        return queryset.annotate(rank=RawSQL("0.0", [], output_field=FloatField())).none()
+    table = IdeaSearchDocument._meta.db_table
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        # imports psycopg2
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+        from django.db.models import F
+        from django.db.models.functions import Cast
+
+        query = SearchQuery(value, config=get_configuration(lang_code), search_type="phrase")
+        return queryset.annotate(
+            search_vector=RawSQL(f'"{table}"."search_vector"', [], output_field=SearchVectorField()),
+        ).filter(
+            search_vector=query,
+        ).annotate(
+            # in double precision, so that the cursors compare exactly
+            rank=Cast(SearchRank(F("search_vector"), query), FloatField()),
+        )
+    if vendor == "sqlite":
+        phrase = get_fts_phrase(value)
+        if phrase is None:
+            return queryset.annotate(rank=RawSQL("0.0", [], output_field=FloatField())).none()
+        weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+        # joined instead of a correlated subquery, so that bm25() gets the
+        # statistics of the phrase once for all rows instead of once per row
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE} MATCH %s", f'{FTS_TABLE}.rowid = "{table}"."id"'],
+            params=[phrase],
+        ).annotate(
+            # bm25() is lower for better matches
+            rank=RawSQL(f"-bm25({FTS_TABLE}, {weights})", [], output_field=FloatField()),
+        )
+    return queryset.filter(
+        Q(title__icontains=value) | Q(content__icontains=value) | Q(categories__icontains=value)
+    ).annotate(rank=RawSQL("0.0", [], output_field=FloatField()))
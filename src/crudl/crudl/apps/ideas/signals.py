@@ -0,0 +1,61 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from crudl.apps.core import translation_cache
+from crudl.apps.category.models import Category, CategoryTranslations
+from crudl.apps.category.tree import node_moved
+from crudl.apps.search import incremental
+from . import facets, search_documents
+from .affected import get_affected_idea_pks
+from .models import Idea, IdeaTranslations
+
+
+@receiver(post_save, sender=IdeaTranslations)
+@receiver(post_delete, sender=IdeaTranslations)
+def idea_translations_changed_handler(sender, **kwargs):
+    # The modification time is a part of the translation cache keys
+    translation_cache.touch(Idea, kwargs["instance"].idea_id)
+
+
+@receiver(post_delete, sender=Idea)
+def idea_delete_handler(sender, **kwargs):
+    translation_cache.delete(kwargs["instance"])
+
+
+@receiver(pre_delete, sender=Idea)
+def idea_related_ideas_handler(sender, instance, **kwargs):
+    # their related ideas are recomputed by the next incremental update
+    incremental.mark_ideas_dirty(Idea.objects.filter(related_ideas__related=instance).exclude(pk=instance.pk))
+
+
+@receiver(post_save, sender=Idea)
+@receiver(post_delete, sender=Idea)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(node_moved, sender=Category)
+def facet_counts_changed_handler(sender, **kwargs):
+    # counts computed before the commit would be cached with the new generation
+    transaction.on_commit(facets.invalidate)
+
+
+@receiver(m2m_changed, sender=Idea.categories.through)
+def idea_categories_changed_handler(sender, **kwargs):
+    if kwargs["action"] in ("post_add", "post_remove", "post_clear"):
+        transaction.on_commit(facets.invalidate)
+
+
+@receiver(post_save, sender=Idea)
+def idea_search_documents_handler(sender, instance, **kwargs):
+    # the documents of deleted ideas are deleted by the cascade
+    search_documents.schedule_update([instance.pk])
+
+
+@receiver(post_save, sender=IdeaTranslations)
+@receiver(post_delete, sender=IdeaTranslations)
+@receiver(m2m_changed, sender=Idea.categories.through)
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+@receiver(post_save, sender=CategoryTranslations)
+@receiver(post_delete, sender=CategoryTranslations)
+def ideas_search_documents_handler(sender, instance, **kwargs):
+    search_documents.schedule_update(get_affected_idea_pks(sender, instance, **kwargs))
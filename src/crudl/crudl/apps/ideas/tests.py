@@ -1,3 +1,422 @@
-from django.test import TestCase
+import datetime
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.utils import translation
+from django.utils.timezone import now as timezone_now
+from crudl.apps.core import translation_cache
+from crudl.apps.category.models import Category, CategoryTranslations
+from .facets import filter_ideas, get_facet_counts
+from . import related, search_documents
+from .models import Idea, IdeaSearchDocument, IdeaTranslations, RelatedIdea
+from .search import DatabaseIdeaSearch
 
-# Create your tests here.
+
+class TranslatedFieldPrefetchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.add_root(title="Architecture")
+        CategoryTranslations.objects.create(category=cls.category, language="de", title="Architektur")
+        for index in range(10):
+            idea = Idea.objects.create(
+                title=f"Idea {index}",
+                content=f"Content {index}",
+                picture="ideas/2022/06/idea.jpg",
+            )
+            idea.categories.add(cls.category)
+            IdeaTranslations.objects.create(
+                idea=idea, language="de", title=f"Idee {index}", content=f"Inhalt {index}"
+            )
+
+    def setUp(self):
+        cache.clear()
+        translation_cache.clear()
+
+    def render_page(self, qs):
+        return [
+            (idea.translated_title, idea.translated_content, [
+                category.translated_title for category in idea.categories.all()
+            ])
+            for idea in qs
+        ]
+
+    def test_with_translations_uses_constant_number_of_queries(self):
+        with translation.override("de"):
+            # ideas, idea translations, categories, category translations
+            with self.assertNumQueries(4):
+                page = self.render_page(Idea.objects.with_translations("categories").order_by("title"))
+        self.assertEqual(page[0], ("Idee 0", "Inhalt 0", ["Architektur"]))
+
+    def test_cached_translations_are_not_queried_again(self):
+        with translation.override("de"):
+            self.render_page(Idea.objects.with_translations("categories"))
+            # ideas, categories
+            with self.assertNumQueries(2):
+                self.render_page(Idea.objects.with_translations("categories"))
+            translation_cache.clear()
+            with self.assertNumQueries(2):
+                self.render_page(Idea.objects.with_translations("categories"))
+
+    def test_changed_translation_is_not_served_from_cache(self):
+        with translation.override("de"):
+            self.render_page(Idea.objects.with_translations("categories"))
+            idea_translation = IdeaTranslations.objects.get(idea__title="Idea 3")
+            idea_translation.title = "Neue Idee 3"
+            idea_translation.save()
+            idea = Idea.objects.with_translations().get(title="Idea 3")
+            self.assertEqual(idea.translated_title, "Neue Idee 3")
+
+    def test_fallback_queries_once_per_instance(self):
+        idea = Idea.objects.get(title="Idea 1")
+        with translation.override("de"):
+            with self.assertNumQueries(1):
+                self.assertEqual(idea.translated_title, "Idee 1")
+                self.assertEqual(idea.translated_content, "Inhalt 1")
+
+    def test_missing_translation_falls_back_to_default_language(self):
+        with translation.override("fr"):
+            idea = Idea.objects.with_translations().get(title="Idea 2")
+            with self.assertNumQueries(0):
+                self.assertEqual(idea.translated_title, "Idea 2")
+
+
+class TranslatedAnnotationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for title, translated_title in (("Apple", "Zitrone"), ("Banana", "Apfel"), ("Cherry", None)):
+            idea = Idea.objects.create(title=title, content=title, picture="ideas/2022/06/idea.jpg")
+            if translated_title:
+                IdeaTranslations.objects.create(
+                    idea=idea, language="de", title=translated_title, content=translated_title
+                )
+
+    def test_ordering_by_translated_title(self):
+        qs = Idea.objects.annotate_translations("title", language="de").order_by("translated_title")
+        self.assertEqual(
+            [idea.translated_title for idea in qs], ["Apfel", "Cherry", "Zitrone"]
+        )
+
+    def test_filtering_by_translated_title(self):
+        qs = Idea.objects.annotate_translations("title", language="de")
+        self.assertEqual(qs.get(translated_title="Apfel").title, "Banana")
+        self.assertFalse(qs.filter(translated_title="Banana").exists())
+
+
+class MultilingualFieldsTest(TestCase):
+    def test_translations_are_synced_to_json_fields(self):
+        idea = Idea.objects.create(title="Park", content="Gardens", picture="ideas/2022/06/idea.jpg")
+        translation_object = IdeaTranslations.objects.create(
+            idea=idea, language="de", title="Parkanlage", content="Gärten"
+        )
+        idea = Idea.objects.get(pk=idea.pk)
+        self.assertEqual(idea.multilingual_title, {"en": "Park", "de": "Parkanlage"})
+        self.assertEqual(idea.multilingual_content.get_translation("de"), "Gärten")
+        self.assertEqual(idea.multilingual_content.get_translation("fr"), "Gardens")
+        self.assertTrue(Idea.objects.filter(multilingual_title__de="Parkanlage").exists())
+
+        translation_object.delete()
+        idea.refresh_from_db()
+        self.assertEqual(idea.multilingual_title, {"en": "Park"})
+
+    def test_update_fields_include_the_multilingual_fields(self):
+        idea = Idea.objects.create(title="Park", content="Gardens", picture="ideas/2022/06/idea.jpg")
+        idea.title = "Public park"
+        idea.content = "Unsaved"
+        idea.save(update_fields=["title"])
+        idea = Idea.objects.get(pk=idea.pk)
+        self.assertEqual(idea.multilingual_title, {"en": "Public park"})
+        self.assertEqual(idea.multilingual_content, {"en": "Gardens"})
+
+
+class SearchAfterPaginatorTest(SimpleTestCase):
+    documents = [f"{index:04d}" for index in range(60)]
+
+    def setUp(self):
+        cache.clear()
+        self.requests = []
+
+    async def fetch(self, search):
+        body = search.to_dict()
+        self.requests.append(body)
+        after = body.get("search_after", [None, ""])[1]
+        documents = [document for document in self.documents if document > after]
+        raw_response = {"hits": {
+            "hits": [
+                {"_id": document, "_score": 1.0, "_source": {}, "sort": [1.0, document]}
+                for document in documents[:body["size"]]
+            ],
+        }}
+        if body["track_total_hits"]:
+            raw_response["hits"]["total"] = {"value": len(self.documents), "relation": "eq"}
+        return raw_response
+
+    def get_page(self, cursor=None):
+        from elasticsearch_dsl import Search
+        from . import search
+
+        paginator = search.SearchAfterPaginator(Search(index="ideas").query("match", title_en="x"), 10, "en")
+        with mock.patch.object(search, "fetch", self.fetch):
+            return async_to_sync(paginator.page)(cursor)
+
+    def test_pages_continue_after_the_previous_hits(self):
+        page = self.get_page()
+        self.assertEqual([hit.meta.id for hit in page], self.documents[:10])
+        self.assertEqual([number for number, cursor in page.next_pages], [2, 3])
+
+        page = self.get_page(page.next_pages[1][1])
+        self.assertEqual(page.number, 3)
+        self.assertEqual([hit.meta.id for hit in page], self.documents[20:30])
+        self.assertEqual(self.requests[-1]["search_after"], [1.0, "0019"])
+        self.assertEqual([number for number, cursor in page.previous_pages], [1, 2])
+
+        page = self.get_page(page.previous_pages[1][1])
+        self.assertEqual([hit.meta.id for hit in page], self.documents[10:20])
+        self.assertEqual(page.paginator.num_pages, 6)
+
+    def test_total_is_tracked_once_per_query_and_language(self):
+        from crudl.apps.search import result_cache
+
+        self.get_page()
+        result_cache.bump_generation()
+        page = self.get_page("invalid")
+        self.assertEqual(page.paginator.count, 60)
+        self.assertEqual([body["track_total_hits"] for body in self.requests], [True, False])
+
+    def test_responses_are_cached_until_the_indexes_are_updated(self):
+        from crudl.apps.search import result_cache
+
+        self.get_page()
+        self.get_page()
+        self.assertEqual(len(self.requests), 1)
+        result_cache.bump_generation()
+        self.get_page()
+        self.assertEqual(len(self.requests), 2)
+
+
+class FacetCountsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from crudl.apps.accounts.models import User
+
+        cls.author = User.objects.create(username="author", email="author@crudl.com")
+        cls.other_author = User.objects.create(username="other-author", email="other-author@crudl.com")
+        cls.art = Category.add_root(title="Art")
+        cls.painting = cls.art.add_child(title="Painting")
+        cls.music = Category.add_root(title="Music")
+        for title, author, categories, rating in (
+            ("Murals", cls.author, [cls.art, cls.painting], 5),
+            ("Portraits", cls.author, [cls.painting], 4),
+            ("Choir", cls.other_author, [cls.music], 4),
+            ("Opera", cls.other_author, [cls.music, cls.painting], None),
+        ):
+            idea = Idea.objects.create(
+                title=title, content=title, author=author,
+                rating=rating, picture="ideas/2022/06/idea.jpg",
+            )
+            idea.categories.set(categories)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_without_filters(self):
+        counts = get_facet_counts({})
+        self.assertEqual(counts["author"], {self.author.pk: 2, self.other_author.pk: 2})
+        self.assertEqual(counts["category"], {self.art.pk: 3, self.painting.pk: 3, self.music.pk: 2})
+        self.assertEqual(counts["rating"], {5: 1, 4: 2})
+
+    def test_counts_respect_other_filters(self):
+        filters = {"author": self.author, "category": self.art}
+        counts = get_facet_counts(filters)
+        self.assertEqual(counts["author"], {self.author.pk: 2, self.other_author.pk: 1})
+        self.assertEqual(counts["category"], {self.art.pk: 2, self.painting.pk: 2})
+        self.assertEqual(counts["rating"], {5: 1, 4: 1})
+        ideas = filter_ideas(Idea.objects.all(), filters)
+        self.assertEqual(sorted(idea.title for idea in ideas), ["Murals", "Portraits"])
+        self.assertNotIn("DISTINCT", str(ideas.query))
+
+    def test_counts_are_cached_until_an_idea_changes(self):
+        get_facet_counts({"rating": 4})
+        with self.assertNumQueries(0):
+            get_facet_counts({"rating": 4})
+        idea = Idea.objects.get(title="Choir")
+        idea.rating = 5
+        with self.captureOnCommitCallbacks(execute=True):
+            idea.save()
+            # the generation is only increased, when the transaction is committed
+            self.assertEqual(get_facet_counts({"rating": 4})["author"], {self.author.pk: 1, self.other_author.pk: 1})
+        self.assertEqual(get_facet_counts({"rating": 4})["author"], {self.author.pk: 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            idea.categories.clear()
+        self.assertEqual(get_facet_counts({})["category"][self.music.pk], 1)
+
+    def test_category_counts_include_the_subtrees_in_one_query(self):
+        from .facets import count_categories
+
+        with self.assertNumQueries(1):
+            self.assertEqual(count_categories({"rating": 4}), {self.art.pk: 1, self.painting.pk: 1, self.music.pk: 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.painting.move(Category.objects.get(pk=self.music.pk), "last-child")
+        self.assertEqual(get_facet_counts({})["category"], {self.art.pk: 1, self.painting.pk: 3, self.music.pk: 4})
+        ideas = filter_ideas(Idea.objects.all(), {"category": Category.objects.get(pk=self.music.pk)})
+        self.assertEqual(ideas.count(), 4)
+
+
+class RebuildIdeasIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.add_root(title="Architecture")
+        CategoryTranslations.objects.create(category=category, language="de", title="Architektur")
+        for index in range(5):
+            idea = Idea.objects.create(
+                title=f"Idea {index}", content=f"Content {index}", picture="ideas/2022/06/idea.jpg"
+            )
+            idea.categories.add(category)
+            IdeaTranslations.objects.create(
+                idea=idea, language="de", title=f"Idee {index}", content=f"Inhalt {index}"
+            )
+
+    def test_documents_are_prepared_with_constant_number_of_queries(self):
+        from .management.commands.rebuild_ideas_index import prepare_actions
+
+        pks = list(Idea.objects.values_list("pk", flat=True))
+        # ideas with authors, translations, categories, category translations
+        with self.assertNumQueries(4):
+            actions = prepare_actions(pks)
+        self.assertEqual(len(actions), 5)
+        document = actions[0]["_source"]
+        self.assertEqual(document["categories"][0]["title_de"], "Architektur")
+
+
+class DatabaseIdeaSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.add_root(title="Urban gardening")
+        CategoryTranslations.objects.create(category=cls.category, language="de", title="Urbanes Gärtnern")
+        cls.rooftop = Idea.objects.create(
+            title="Rooftop gardens", content="Vegetables on the roofs of the city",
+            picture="ideas/2022/06/idea.jpg",
+        )
+        IdeaTranslations.objects.create(
+            idea=cls.rooftop, language="de", title="Dachgärten", content="Gemüse auf den Dächern der Stadt"
+        )
+        cls.rooftop.categories.add(cls.category)
+        for index in range(5):
+            Idea.objects.create(
+                title=f"Idea {index}", content=f"Rooftop gardens and parks {index}",
+                picture="ideas/2022/06/idea.jpg",
+            )
+        search_documents.update_search_documents(Idea.objects.values_list("pk", flat=True))
+
+    def search(self, query, lang_code="en", per_page=24, cursor=None):
+        from .forms import IdeaSearchForm
+
+        request = mock.Mock(path="/search/")
+        search = DatabaseIdeaSearch(IdeaSearchForm(request, data={"q": query}), lang_code, per_page)
+        return async_to_sync(search.page)(cursor)
+
+    def test_phrase_is_found_in_the_language_ranked_by_relevance(self):
+        page = self.search("Rooftop  Gardens")
+        self.assertEqual(len(page), 6)
+        # the title weighs more than the content
+        self.assertEqual(page[0].idea, self.rooftop)
+        self.assertEqual(page[0].get_url_path(), self.rooftop.get_url_paths()["en"])
+        self.assertEqual(len(self.search("gardens rooftop")), 0)
+        self.assertEqual([document.translated_title for document in self.search("dachgarten", "de")], ["Dachgärten"])
+        self.assertEqual(len(self.search("dachgärten", "en")), 0)
+        self.assertEqual(len(self.search("urbanes gärtnern", "de")), 1)
+        self.assertEqual(len(self.search("")), 0)
+
+    def test_pages_continue_after_the_previous_documents(self):
+        titles, cursor = [], None
+        for number in range(1, 4):
+            page = self.search("rooftop gardens", per_page=2, cursor=cursor)
+            self.assertEqual(page.number, number)
+            titles += [document.title for document in page]
+            next_pages = dict(page.next_pages)
+            cursor = next_pages.get(number + 1)
+        self.assertEqual(len(set(titles)), 6)
+        self.assertIsNone(cursor)
+
+    def test_documents_are_updated_with_the_ideas(self):
+        with mock.patch.object(search_documents, "ENABLED", True):
+            with self.captureOnCommitCallbacks(execute=True):
+                CategoryTranslations.objects.filter(category=self.category).get().delete()
+                CategoryTranslations.objects.create(category=self.category, language="de", title="Stadtgärten")
+            self.assertEqual(len(self.search("stadtgärten", "de")), 1)
+
+            update_search_documents = mock.Mock(wraps=search_documents.update_search_documents)
+            with mock.patch.object(search_documents, "update_search_documents", update_search_documents):
+                with self.captureOnCommitCallbacks(execute=True):
+                    idea = Idea.objects.create(title="Seed library", content="Seeds", picture="ideas/2022/06/idea.jpg")
+                    idea.categories.add(self.category)
+            # the changes of a transaction are saved at once
+            update_search_documents.assert_called_once_with({str(idea.pk)})
+            self.assertEqual(len(self.search("stadtgärten", "de")), 2)
+            self.assertEqual(IdeaSearchDocument.objects.filter(idea=idea).count(), len(settings.LANGUAGES))
+
+        Idea.objects.filter(pk=idea.pk).delete()
+        self.assertFalse(IdeaSearchDocument.objects.filter(idea_id=idea.pk).exists())
+        self.assertEqual(len(self.search("seed library")), 0)
+
+
+class RelatedIdeasTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.add_root(title="Urban gardening")
+        cls.rooftop = cls.create_idea("Rooftop gardens", "Vegetables and herbs on the roofs of the city")
+        cls.balcony = cls.create_idea("Balcony gardens", "Herbs and vegetables on the balconies of the city")
+        cls.library = cls.create_idea("Seed library", "Lend seeds of rare vegetables to neighbours")
+        cls.bicycle = cls.create_idea("Bicycle repair cafe", "Repair bicycles together with volunteers")
+        cls.rooftop.categories.add(cls.category)
+        cls.balcony.categories.add(cls.category)
+        # the terms of more than a fifth of the ideas are ignored
+        for index in range(30):
+            cls.create_idea(f"Idea {index}", f"Something completely different {index}")
+
+    @classmethod
+    def create_idea(cls, title, content):
+        return Idea.objects.create(title=title, content=content, picture="ideas/2022/06/idea.jpg")
+
+    def get_related(self, idea, lang_code="en"):
+        return list(RelatedIdea.objects.filter(idea=idea, language=lang_code).values_list("related", flat=True))
+
+    def test_most_similar_ideas_are_related(self):
+        counts = related.update_related_ideas(["en"])
+        self.assertEqual(counts["en"], Idea.objects.count())
+        self.assertEqual(self.get_related(self.rooftop)[:2], [self.balcony.pk, self.library.pk])
+        self.assertNotIn(self.bicycle.pk, self.get_related(self.rooftop))
+        self.assertNotIn(self.rooftop.pk, self.get_related(self.rooftop))
+        scores = list(RelatedIdea.objects.filter(idea=self.rooftop, language="en").values_list("score", flat=True))
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_only_affected_ideas_are_updated_incrementally(self):
+        related.update_related_ideas(["en"])
+        self.assertEqual(related.update_related_ideas(["en"], margin=datetime.timedelta(0))["en"], 0)
+
+        Idea.objects.filter(pk=self.bicycle.pk).update(
+            multilingual_content={"en": "Vegetables and herbs on the bicycles of the city"},
+            modified=timezone_now(),
+        )
+        counts = related.update_related_ideas(["en"], margin=datetime.timedelta(0))
+        self.assertLess(counts["en"], Idea.objects.count())
+        self.assertIn(self.bicycle.pk, self.get_related(self.rooftop))
+        self.assertIn(self.rooftop.pk, self.get_related(self.bicycle))
+
+        Idea.objects.filter(pk=self.balcony.pk).delete()
+        related.update_related_ideas(["en"], margin=datetime.timedelta(0))
+        self.assertEqual(set(self.get_related(self.rooftop)), {self.bicycle.pk, self.library.pk})
+
+    def test_detail_view_reads_the_related_ideas_with_one_query(self):
+        from .views import IdeaDetail
+
+        related.update_related_ideas(["en"])
+        request = RequestFactory().get(self.rooftop.get_url_path())
+        request.LANGUAGE_CODE = "en"
+        view = IdeaDetail(request=request, kwargs={"pk": self.rooftop.pk})
+        view.object = self.rooftop
+        with self.assertNumQueries(1):
+            context = view.get_context_data()
+            titles = [str(related_idea.related.multilingual_title) for related_idea in context["related_ideas"]]
+        self.assertEqual(titles[0], "Balcony gardens")
@@ -8,12 +8,14 @@ from .views import (
     add_or_change_idea,
     delete_idea,
     idea_handout_pdf,
-    download_idea_picture
+    download_idea_picture,
+    search_with_elasticsearch,
 )
 
 urlpatterns = [
     path("", IdeaListView.as_view(), name="idea_list"),
     path("add/", add_or_change_idea, name="add_idea"),
+    path("search/", search_with_elasticsearch, name="search_ideas"),
     path("<uuid:pk>/", IdeaDetail.as_view(), name="idea_detail"),
     path("<uuid:pk>/change/", add_or_change_idea, name="change_idea"),
     path("<uuid:pk>/delete/", delete_idea, name="delete_idea"),
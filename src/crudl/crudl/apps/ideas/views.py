@@ -1,15 +1,17 @@
 import os
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import FileResponse, HttpResponseNotFound
 from django.views.generic import View, ListView, DetailView
 from django.forms import modelformset_factory
 from django.conf import settings
-from django.core.paginator import (EmptyPage, PageNotAnInteger, Paginator)
-from django.utils.functional import LazyObject
 from django.utils.text import slugify
+from crudl.apps.core.paginators import COUNT_APPROXIMATE, KeysetPaginator
+from .facets import FACET_NAMES, filter_ideas, get_facet_counts
 from .forms import IdeaForm, IdeaTranslationsForm, IdeaFilterForm, IdeaSearchForm
-from .models import Idea, IdeaTranslations, RATING_CHOICES
+from .models import Idea, IdeaTranslations, RelatedIdea, RATING_CHOICES
+from .search import get_search_backend
 
 PAGE_SIZE = getattr(settings, "PAGE_SIZE", 24)
 
@@ -31,51 +33,20 @@ def download_idea_picture(request, pk):
 #     model = Idea
 
 
-class SearchResults(LazyObject):
-    def __init__(self, search_object):
-        self._wrapped = search_object
-    
-    def __len__(self):
-        return self._wrapped.count
-    
-    def __getitem__(self, index):
-        search_results = self._wrapped[index]
-        if isinstance(index, slice):
-            search_results = list(search_results)
-        return search_results
-
-
-def search_with_elasticsearch(request):
-    from .documents import IdeaDocument
-    from elasticsearch_dsl.query import Q
-    
+async def search_with_elasticsearch(request):
+    """
+    Asynchronous search view, which waits for Elasticsearch without
+    blocking the worker, when the project is served with ASGI.
+    Each page is one search request continuing from the "cursor".
+    The search backend is set by IDEA_SEARCH_BACKEND, e.g. the
+    full-text search of the primary database instead of Elasticsearch.
+    """
     form = IdeaSearchForm(request, data=request.GET)
-    search = IdeaDocument.search()
-    if form.is_valid():
-        value = form.cleaned_data["q"]
-        lang_code_underscored = request.LANGUAGE_CODE.replace("-", "_")
-        search = search.query(
-            Q("match_phrase", **{f"title_{lang_code_underscored}":value})
-            | Q("match_phrase", **{f"content_{lang_code_underscored}":value})
-            | Q(
-                "nested",
-                path="categories",
-                query=Q("match_phrase", **{f"categories__title_{lang_code_underscored}":value},),
-            )
-        )
-    search_results = SearchResults(search)
-    paginator = Paginator(search_results, PAGE_SIZE)
-    page_number = request.GET.get("page")
-    try:
-        page = paginator.page(page_number)
-    except PageNotAnInteger:
-        # If page is not an integer, show first page.
-        page = paginator.page(1)
-    except EmptyPage:
-        # If page is out of range, show last existing page.
-        page = paginator.page(paginator.num_pages)
+    search = get_search_backend()(form, request.LANGUAGE_CODE, PAGE_SIZE)
+    page = await search.page(request.GET.get("cursor"))
     context = {"form":form, "object_list":page}
-    return render(request, "ideas/idea_search.html", context)
+    # the context processors and templates may still query the database
+    return await sync_to_async(render)(request, "ideas/idea_search.html", context)
 
 
 class IdeaListView(View):
@@ -90,49 +61,64 @@ class IdeaListView(View):
         return render(request, self.template_name, context)
     
     def get_queryset_and_facets(self, form):
-        qs = Idea.objects.order_by("title")
+        qs = Idea.objects.with_translations("categories").annotate_translations(
+            "title"
+        ).order_by("translated_title", "pk")
         facets = {
             "selected":{},
-            "categories": {
-                "author":form.fields["author"].queryset,
-                "categories":form.fields["category"].queryset,
-                "rating":RATING_CHOICES
-            },
+            "categories": {},
         }
+        filters = {}
         if form.is_valid():
-            filters = (
-                # query parameter, filter parameter
-                ("author", "author"),
-                ("category", "categories"),
-                ("rating", "rating"),
-            )
-            qs = self.filter_facets(facets, qs, form, filters)
+            qs, filters = self.filter_facets(facets, qs, form)
+        facets["categories"] = self.get_facet_categories(filters)
         return qs, facets
     
     @staticmethod
-    def filter_facets(facets, qs, form, filters):
-        for query_param, filter_param in filters:
+    def filter_facets(facets, qs, form):
+        filters = {}
+        for query_param in FACET_NAMES:
             value = form.cleaned_data[query_param]
             if value:
                 selected_value = value
                 if query_param == "rating":
-                    rating = int(value)
-                    selected_value = (rating, dict(RATING_CHOICES)[rating])
+                    value = int(value)
+                    selected_value = (value, dict(RATING_CHOICES)[value])
                 facets["selected"][query_param] = selected_value
-                filter_args = {filter_param:value}
-                qs = qs.filter(**filter_args).distinct()
-        return qs
+                filters[query_param] = value
+        return filter_ideas(qs, filters), filters
+
+    @staticmethod
+    def get_facet_categories(filters):
+        """
+        Returns the authors with the numbers of ideas as idea_count,
+        the categories as (node, idea count) tuples in the tree order
+        and the ratings as (value, label, idea count) tuples for the
+        values, which would leave any ideas with the other filters
+        """
+        from django.contrib.auth import get_user_model
+        from crudl.apps.category.snapshots import get_tree_nodes
+
+        counts = get_facet_counts(filters)
+        authors = list(get_user_model().objects.filter(pk__in=counts["author"]))
+        for author in authors:
+            author.idea_count = counts["author"][author.pk]
+        return {
+            "authors": authors,
+            # the shared nodes of the cached tree snapshot get no attributes
+            "categories": [
+                (node, counts["category"][node.pk]) for node in get_tree_nodes() if node.pk in counts["category"]
+            ],
+            "rating": [
+                (value, label, counts["rating"][value])
+                for value, label in RATING_CHOICES
+                if value in counts["rating"]
+            ],
+        }
     
     def get_page(self, request, qs):
-        paginator = Paginator(qs, PAGE_SIZE)
-        page_number = request.GET.get("page")
-        try:
-            page = paginator.page(page_number)
-        except PageNotAnInteger:
-            page = paginator.page(1)
-        except EmptyPage:
-            page = paginator.page(paginator.num_pages)
-        return page
+        paginator = KeysetPaginator(qs, PAGE_SIZE, count_mode=COUNT_APPROXIMATE)
+        return paginator.page(request.GET.get("cursor"))
 
 
 def idea_handout_pdf(request, pk):
@@ -206,6 +192,19 @@ class IdeaDetail(DetailView):
     model = Idea
     context_object_name = "idea"
 
+    def get_queryset(self):
+        return Idea.objects.with_translations("categories")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # precomputed by "manage.py update_related_ideas" and read with one query
+        context["related_ideas"] = list(
+            RelatedIdea.objects.filter(
+                idea=self.object, language=self.request.LANGUAGE_CODE,
+            ).select_related("related").only("related", "related__multilingual_title")
+        )
+        return context
+
 @login_required
 def add_or_change_idea(request, pk=None):
     idea = None
@@ -0,0 +1,33 @@
+# Generated by Django 4.0.5 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def delete_likes_without_object(apps, schema_editor):
+    # the likes were saved without the liked object, so they can't be kept
+    Like = apps.get_model("likes", "Like")
+    Like.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('likes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_likes_without_object, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='like',
+            name='content_type',
+            field=models.ForeignKey(default=None, help_text='Please select the type (model) for the relation, you want to build.', on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype', verbose_name="Related object's type (model)"),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='like',
+            name='object_id',
+            field=models.CharField(default='', help_text='Please enter the ID of the related object.', max_length=255, verbose_name='Related object'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django import template
 from django.contrib.contenttypes.models import ContentType
 from django.template.loader import render_to_string
+from crudl.apps.core import request_cache
 from ..models import Like
 
 register = template.Library()
@@ -38,12 +39,16 @@ class ObjectLikeWidget(template.Node):
     @register.filter
     def liked_by(obj, user):
         ct = ContentType.objects.get_for_model(obj)
-        liked = Like.objects.filter(user=user, content_type = ct, object_id=obj.pk)
-        return liked.count() > 0
+        return request_cache.get_or_set(
+            ("liked_by", user.pk, ct.pk, str(obj.pk)),
+            lambda: Like.objects.filter(user=user, content_type = ct, object_id=obj.pk).exists(),
+        )
     
     @register.filter
     def liked_count(obj):
         ct = ContentType.objects.get_for_model(obj)
-        likes = Like.objects.filter(content_type=ct, object_id=obj.pk)
-        return likes.count()
+        return request_cache.get_or_set(
+            ("liked_count", ct.pk, str(obj.pk)),
+            lambda: Like.objects.filter(content_type=ct, object_id=obj.pk).count(),
+        )
     
\ No newline at end of file
@@ -1,5 +1,6 @@
 import json
 from unittest import mock
+from asgiref.sync import async_to_sync
 from django.contrib.contenttypes.models import ContentType
 from django.test import TestCase
 from crudl.apps.accounts.models import User
@@ -20,9 +21,9 @@ class JSSetLikeViewTest(TestCase):
     
     @classmethod
     def tearDownClass(cls) -> None:
-        super(JSSetLikeViewTest, cls).tearDownClass()
         cls.idea.delete()
         cls.superuser.delete()
+        super(JSSetLikeViewTest, cls).tearDownClass()
     
     def test_authenticated_json_set_like(self):
         from .views import json_set_like
@@ -30,8 +31,8 @@ class JSSetLikeViewTest(TestCase):
         mock_request = mock.Mock()
         mock_request.user = self.superuser
         mock_request.method = "POST"
-        response = json_set_like(mock_request, self.content_type.pk, self.idea.pk)
-        expected_result = json.dumps({"success": True, "action": "add", "count": Idea.objects.count()})
+        response = async_to_sync(json_set_like)(mock_request, self.content_type.pk, self.idea.pk)
+        expected_result = json.dumps({"success": True, "action": "add", "count": 1})
         self.assertJSONEqual(response.content, expected_result)
     
     @mock.patch("django.contrib.auth.models.User")
@@ -43,6 +44,6 @@ class JSSetLikeViewTest(TestCase):
         mock_request = mock.Mock()
         mock_request.user = anonymous_user
         mock_request.method = 'POST'
-        response = json_set_like(mock_request, self.content_type.pk, self.idea.pk)
+        response = async_to_sync(json_set_like)(mock_request, self.content_type.pk, self.idea.pk)
         expected_result = json.dumps({"success": False})
         self.assertJSONEqual(response.content, expected_result)
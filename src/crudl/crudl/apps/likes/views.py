@@ -1,30 +1,44 @@
-from django.shortcuts import render
+from asgiref.sync import sync_to_async
 from django.contrib.contenttypes.models import ContentType
 from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.cache import never_cache
+from django.utils.cache import add_never_cache_headers
+from crudl.apps.core import request_cache
 from .models import Like
 from crudl.apps.likes.templatetags.likes_tags import ObjectLikeWidget
 
 
-@never_cache
-@csrf_exempt
-def json_set_like(request, content_type_id, object_id):
+def toggle_like(user, content_type_id, object_id):
+    """
+    Adds the like of the user for the object or removes it, if it exists
+    """
+    content_type = ContentType.objects.get_for_id(content_type_id)
+    obj = content_type.get_object_for_this_type(pk=object_id)
+    like, is_created = Like.objects.get_or_create(content_type=content_type, object_id=obj.pk, user=user)
+    if not is_created:
+        like.delete()
+    request_cache.delete_value(("liked_by", user.pk, content_type.pk, str(obj.pk)))
+    request_cache.delete_value(("liked_count", content_type.pk, str(obj.pk)))
+    return {
+        "success": True,
+        "action": "add" if is_created else "remove",
+        "count": ObjectLikeWidget.liked_count(obj),
+    }
+
+
+async def json_set_like(request, content_type_id, object_id):
     """
     Sets the object as a favorite for the current user.
     """
     result = {
         "success": False,
     }
-    if request.user.is_authenticated and request.method == "POST":
-        content_type = ContentType.objects.get(id=content_type_id)
-        obj = content_type.get_object_for_this_type(pk=content_type_id)
-        like, is_created = Like.objects.get_or_create(content_type=ContentType.objects.get_for_model(obj), object_id=obj.pk, user=request.user)
-        if not is_created:
-            like.delete()
-        result = {
-            "success": True,
-            "action": "add" if is_created else "remove",
-            "count": ObjectLikeWidget.liked_count(obj),
-        }
-    return JsonResponse(result)
+    # request.user is loaded lazily from the session
+    is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+    if is_authenticated and request.method == "POST":
+        result = await sync_to_async(toggle_like)(request.user, content_type_id, object_id)
+    response = JsonResponse(result)
+    # the never_cache and csrf_exempt decorators of Django 4.0 don't support coroutines
+    add_never_cache_headers(response)
+    return response
+
+json_set_like.csrf_exempt = True
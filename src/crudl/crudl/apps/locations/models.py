@@ -3,7 +3,6 @@ import os
 import uuid
 from collections import namedtuple
 from django.contrib.gis.db import models
-from django.urls import reverse
 from django.conf import settings
 from django.utils.timezone import now as timezone_now
 from django.utils.translation import gettext_lazy as _
@@ -46,6 +45,7 @@ class Location(CreationModificationDateBase, UrlBase):
     picture_mobile = ImageSpecField(source="picture", processors=[ResizeToFill(640, 320)],format="PNG")
     rating = models.PositiveIntegerField(_("Rating"), choices=RATING_CHOICES, blank=True, null=True)
 
+    url_name = "locations:location_detail"
 
     class Meta:
         verbose_name = _("Location")
@@ -54,9 +54,6 @@ class Location(CreationModificationDateBase, UrlBase):
     def __str__(self):
         return self.name
     
-    def get_url_path(self):
-        return reverse("locations:location_detail", kwargs={"pk":self.pk})
-    
     def save(self, *args, **kwargs):
         if self.pk is None:
             self.pk = uuid.uuid4()
@@ -1,6 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.views.generic import ListView, DetailView
+from crudl.apps.core.paginators import KeysetPaginationMixin
 from .forms import LocationForm
 from .models import Location
 
@@ -21,8 +22,9 @@ def add_or_change_location(request, pk=None):
     return render(request, "locations/location_form.html", context)
 
 
-class LocationList(ListView):
+class LocationList(KeysetPaginationMixin, ListView):
     model = Location
+    ordering = ["name"]
     paginate_by = 10
 
 class LocationDetail(DetailView):
@@ -4,7 +4,6 @@ import os
 from pydoc import describe
 from tabnanny import verbose
 import uuid
-from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.db import models
 from django.utils.text import slugify
@@ -25,6 +24,8 @@ class Song(CreationModificationDateBase, UrlBase):
     url = models.URLField(_("URL"), blank=True)
     image = models.ImageField(_("Image"), upload_to=upload_to, blank=True, null=True)
 
+    url_name = "music:song_detail"
+
     class Meta:
         verbose_name = _("Song")
         verbose_name_plural = _("Songs")
@@ -33,9 +34,6 @@ class Song(CreationModificationDateBase, UrlBase):
     def __str__(self):
         return f"{self.artist} - {self.title}"
     
-    def get_url_path(self):
-        return reverse("music:song_detail", kwargs={"pk":self.pk})
-    
     def save(self, *args, **kwargs):
         if self.pk is None:
             self.pk = uuid.uuid4()
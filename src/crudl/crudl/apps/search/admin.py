@@ -1,3 +1,21 @@
 from django.contrib import admin
+from .models import IndexUpdate, IndexWatermark, Tombstone
 
-# Register your models here.
+
+@admin.register(IndexUpdate)
+class IndexUpdateAdmin(admin.ModelAdmin):
+    list_display = ["model", "object_id", "action", "created"]
+    list_filter = ["model", "action"]
+    date_hierarchy = "created"
+
+
+@admin.register(IndexWatermark)
+class IndexWatermarkAdmin(admin.ModelAdmin):
+    list_display = ["name", "modified", "updated"]
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ["model", "object_id", "deleted"]
+    list_filter = ["model"]
+    date_hierarchy = "deleted"
@@ -5,4 +5,7 @@ from django.utils.translation import gettext_lazy as _
 class SearchConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'crudl.apps.search'
-    verbose_name = _("Search")
\ No newline at end of file
+    verbose_name = _("Search")
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,460 @@
+import array
+import fcntl
+import heapq
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import unicodedata
+from contextlib import contextmanager
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+
+# directory of the memory-mapped files, autocomplete is disabled without it
+PATH = getattr(settings, "SEARCH_AUTOCOMPLETE_PATH", None)
+LIMIT = getattr(settings, "SEARCH_AUTOCOMPLETE_LIMIT", 10)
+# the changed entries are collected in a small delta file per language,
+# which is merged into the base file, when it gets more entries
+MAX_DELTA_ENTRIES = getattr(settings, "SEARCH_AUTOCOMPLETE_MAX_DELTA_ENTRIES", 5000)
+# number of words of a text, from which a typed prefix can start
+MAX_KEY_WORDS = 10
+
+TYPECODE = "I"
+MAGIC = b"ACP1"
+# magic, key count, entry count, source count
+HEADER = struct.Struct("=4sIII")
+# the keys of the whole texts sort before the keys starting at later words
+TEXT_START, WORD_START = b"\x00", b"\x01"
+LOCK = "write.lock"
+WORD_RE = re.compile(r"\w+")
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+_pending = threading.local()
+
+
+def normalize(text):
+    """
+    Returns the words of the text in lowercase without
+    diacritics separated by single spaces
+    """
+    decomposed = unicodedata.normalize("NFKD", str(text).casefold())
+    return " ".join(WORD_RE.findall("".join(char for char in decomposed if not unicodedata.combining(char))))
+
+
+def get_keys(text):
+    """
+    Returns the sort keys of the text: the whole text and
+    the rest of it from each of its next words
+    """
+    words = normalize(text).split(" ")
+    keys = [TEXT_START + " ".join(words).encode("utf-8")]
+    for start in range(1, min(len(words), MAX_KEY_WORDS)):
+        keys.append(WORD_START + " ".join(words[start:]).encode("utf-8"))
+    return keys
+
+
+def write_table(filename, entries_by_source):
+    """
+    Writes the entries to the file replaced atomically. entries_by_source
+    is a dict of source labels and lists of (text, kind, url) tuples;
+    the sources without entries are only recorded as replaced.
+    """
+    sources = sorted(entries_by_source)
+    entries, keys = [], []
+    for source_number, source in enumerate(sources):
+        for text, kind, url in entries_by_source[source]:
+            for key in get_keys(text):
+                keys.append((key, len(entries)))
+            entries.append((source_number, json.dumps([text, kind, url]).encode("utf-8")))
+    keys.sort()
+
+    blobs = [key for key, entry_number in keys] + [entry for source_number, entry in entries] + [
+        source.encode("utf-8") for source in sources
+    ]
+    array_size = array.array(TYPECODE).itemsize * (2 * len(keys) + 2 * len(entries) + len(sources) + 3)
+    offsets = array.array(TYPECODE, [HEADER.size + array_size])
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    key_offsets = offsets[:len(keys) + 1]
+    entry_offsets = offsets[len(keys):len(keys) + len(entries) + 1]
+    source_offsets = offsets[len(keys) + len(entries):]
+
+    with open(f"{filename}.tmp", "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys), len(entries), len(sources)))
+        key_offsets.tofile(f)
+        array.array(TYPECODE, [entry_number for key, entry_number in keys]).tofile(f)
+        entry_offsets.tofile(f)
+        array.array(TYPECODE, [source_number for source_number, entry in entries]).tofile(f)
+        source_offsets.tofile(f)
+        for blob in blobs:
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f"{filename}.tmp", filename)
+
+
+class PrefixTable(object):
+    """
+    Sorted keys of the autocomplete entries in a memory-mapped file,
+    which are found by binary search without loading the file.
+    The file contains the header, the arrays of the key offsets, the
+    entry numbers of the keys, the entry offsets, the source numbers of
+    the entries and the source offsets followed by the keys, the entries
+    as JSON and the source labels of the replaced objects.
+    """
+    def __init__(self, filename=None):
+        self.key_count = self.entry_count = self.source_count = 0
+        self.data = memoryview(b"")
+        if filename is None:
+            return
+        with open(filename, "rb") as f:
+            self.data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        magic, self.key_count, self.entry_count, self.source_count = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} isn't an autocomplete file.")
+        position = HEADER.size
+        for name, length in (
+            ("key_offsets", self.key_count + 1),
+            ("key_entries", self.key_count),
+            ("entry_offsets", self.entry_count + 1),
+            ("entry_sources", self.entry_count),
+            ("source_offsets", self.source_count + 1),
+        ):
+            size = length * array.array(TYPECODE).itemsize
+            setattr(self, name, self.data[position:position + size].cast(TYPECODE))
+            position += size
+
+    def get_key(self, number):
+        return bytes(self.data[self.key_offsets[number]:self.key_offsets[number + 1]])
+
+    def get_entry(self, number):
+        text, kind, url = json.loads(bytes(self.data[self.entry_offsets[number]:self.entry_offsets[number + 1]]))
+        return {"text": text, "kind": kind, "url": url}
+
+    def get_source(self, number):
+        source_number = self.entry_sources[number]
+        return bytes(self.data[self.source_offsets[source_number]:self.source_offsets[source_number + 1]]).decode("utf-8")
+
+    def get_sources(self):
+        return [
+            bytes(self.data[self.source_offsets[number]:self.source_offsets[number + 1]]).decode("utf-8")
+            for number in range(self.source_count)
+        ]
+
+    def get_entries_by_source(self, exclude=()):
+        entries_by_source = {}
+        for source in self.get_sources():
+            if source not in exclude:
+                entries_by_source[source] = []
+        for number in range(self.entry_count):
+            entries = entries_by_source.get(self.get_source(number))
+            if entries is not None:
+                entry = self.get_entry(number)
+                entries.append((entry["text"], entry["kind"], entry["url"]))
+        return entries_by_source
+
+    def find(self, prefix):
+        """
+        Yields the keys starting with the prefix and their entry numbers in order
+        """
+        low, high = 0, self.key_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.get_key(middle) < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        for number in range(low, self.key_count):
+            key = self.get_key(number)
+            if not key.startswith(prefix):
+                break
+            yield key, self.key_entries[number]
+
+
+class Snapshot(object):
+    """
+    The base and delta tables of a language at one point in time.
+    The entries of the objects in the delta replace the ones in the base.
+    """
+    def __init__(self, version, base, delta):
+        self.version = version
+        self.base = base
+        self.delta = delta
+        self.replaced = frozenset(delta.get_sources())
+
+    def search(self, query, limit=LIMIT):
+        """
+        Returns the entries, whose texts or later words in them start
+        with the query, the former first, each in alphabetical order
+        """
+        prefix = normalize(query).encode("utf-8")
+        if not prefix or limit < 1:
+            return []
+        results, found = [], set()
+        for marker in (TEXT_START, WORD_START):
+            keys = heapq.merge(
+                ((key, 0, number) for key, number in self.delta.find(marker + prefix)),
+                ((key, 1, number) for key, number in self.base.find(marker + prefix)),
+            )
+            for key, table_number, number in keys:
+                if (table_number, number) in found:
+                    continue
+                if table_number == 1 and self.base.get_source(number) in self.replaced:
+                    continue
+                found.add((table_number, number))
+                results.append((self.delta, self.base)[table_number].get_entry(number))
+                if len(results) == limit:
+                    return results
+        return results
+
+
+class AutocompleteIndex(object):
+    """
+    Prefix index of the titles in one language shared by the worker
+    processes as memory-mapped files. The changes are written to the
+    delta file, which is replaced atomically, so that the readers keep
+    their snapshot until they notice the new file, and the delta is
+    merged into the base file, when it has more than max_delta_entries.
+    """
+    def __init__(self, path, lang_code, max_delta_entries=MAX_DELTA_ENTRIES):
+        self.path = path
+        self.base_filename = os.path.join(path, f"{lang_code}.base")
+        self.delta_filename = os.path.join(path, f"{lang_code}.delta")
+        self.max_delta_entries = max_delta_entries
+        self._snapshot = None
+        self._lock = threading.RLock()
+
+    def get_version(self):
+        version = []
+        for filename in (self.base_filename, self.delta_filename):
+            try:
+                stat = os.stat(filename)
+            except FileNotFoundError:
+                version.append(None)
+            else:
+                version.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        return tuple(version)
+
+    def get_snapshot(self):
+        """
+        Returns the snapshot of the latest files, which are mapped
+        again only when one of them was replaced
+        """
+        version = self.get_version()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.version != version:
+                    try:
+                        snapshot = self.load(version)
+                    except FileNotFoundError:
+                        # the delta was merged after checking the version
+                        snapshot = self.load(self.get_version())
+                    self._snapshot = snapshot
+        return snapshot
+
+    def load(self, version):
+        base_version, delta_version = version
+        return Snapshot(
+            version,
+            PrefixTable(self.base_filename if base_version else None),
+            PrefixTable(self.delta_filename if delta_version else None),
+        )
+
+    def search(self, query, limit=LIMIT):
+        return self.get_snapshot().search(query, limit)
+
+    @contextmanager
+    def write_lock(self):
+        """
+        Serializes the writers of the threads and processes and yields
+        the snapshot of the files mapped again, as a replaced file can
+        have the same inode, time and size as the cached one
+        """
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, open(os.path.join(self.path, LOCK), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._snapshot = self.load(self.get_version())
+                yield self._snapshot
+                self._snapshot = self.load(self.get_version())
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def update(self, entries_by_source):
+        """
+        Replaces the entries of the sources, e.g. "ideas.idea:<pk>",
+        with the lists of (text, kind, url) tuples. Empty lists remove them.
+        """
+        if not entries_by_source:
+            return
+        with self.write_lock() as snapshot:
+            delta = snapshot.delta.get_entries_by_source()
+            delta.update(entries_by_source)
+            if sum(len(entries) + 1 for entries in delta.values()) > self.max_delta_entries:
+                self.merge(snapshot, delta)
+            else:
+                write_table(self.delta_filename, delta)
+
+    def merge(self, snapshot, delta):
+        entries_by_source = snapshot.base.get_entries_by_source(exclude=frozenset(delta))
+        entries_by_source.update((source, entries) for source, entries in delta.items() if entries)
+        self.write_base(entries_by_source)
+
+    def rebuild(self, entries_by_source):
+        """
+        Replaces all entries of the language
+        """
+        with self.write_lock():
+            self.write_base({source: entries for source, entries in entries_by_source.items() if entries})
+
+    def write_base(self, entries_by_source):
+        # the readers, which see the new base with the old delta, get the same entries
+        write_table(self.base_filename, entries_by_source)
+        try:
+            os.remove(self.delta_filename)
+        except FileNotFoundError:
+            pass
+
+
+def get_autocomplete_index(lang_code, path=None):
+    """
+    Returns the AutocompleteIndex of the language, which is shared
+    by all threads of the process, or None, if autocomplete is disabled
+    """
+    path = path or PATH
+    if not path:
+        return None
+    key = (str(path), lang_code)
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None:
+                index = _indexes[key] = AutocompleteIndex(path, lang_code)
+    return index
+
+
+def search(query, lang_code, limit=LIMIT):
+    index = get_autocomplete_index(lang_code)
+    if index is None:
+        return []
+    return index.search(query, limit)
+
+
+def get_source(obj):
+    return f"{obj._meta.label_lower}:{obj.pk}"
+
+
+def get_querysets():
+    """
+    Returns the querysets of the objects with autocompleted titles
+    """
+    from crudl.apps.category.models import Category
+    from crudl.apps.ideas.models import Idea
+
+    querysets = [
+        Idea.objects.only("pk", "multilingual_title"),
+        Category.objects.only("pk", "multilingual_title"),
+    ]
+    if apps.is_installed("crudl.apps.music"):
+        from crudl.apps.music.models import Song
+
+        querysets.append(Song.objects.only("pk", "artist", "title"))
+    return querysets
+
+
+def get_entries(obj, languages):
+    """
+    Returns a dict of language codes and (text, kind, url) tuples of the object
+    """
+    from crudl.apps.core import url_paths
+
+    label = obj._meta.label_lower
+    if label == "ideas.idea":
+        paths = obj.get_url_paths(languages)
+        return {
+            lang_code: [(obj.multilingual_title.get_translation(lang_code), "idea", paths[lang_code])]
+            for lang_code in languages
+        }
+    if label == "category.category":
+        # the ideas of the category
+        paths = url_paths.get_url_paths("ideas:idea_list", languages)
+        return {
+            lang_code: [
+                (obj.multilingual_title.get_translation(lang_code), "category", f"{paths[lang_code]}?category={obj.pk}")
+            ]
+            for lang_code in languages
+        }
+    paths = obj.get_url_paths(languages)
+    return {lang_code: [(str(obj), "song", paths[lang_code])] for lang_code in languages}
+
+
+def update_objects(model, pks, languages=None):
+    """
+    Updates the entries of the objects in the indexes of the languages
+    and removes the ones of the objects, which don't exist anymore
+    """
+    if languages is None:
+        languages = [lang_code for lang_code, lang_name in settings.LANGUAGES]
+    queryset = next(queryset for queryset in get_querysets() if queryset.model is model)
+    changes = {lang_code: {} for lang_code in languages}
+    for pk in pks:
+        for lang_code in languages:
+            changes[lang_code][f"{model._meta.label_lower}:{pk}"] = []
+    for obj in queryset.filter(pk__in=pks):
+        for lang_code, entries in get_entries(obj, languages).items():
+            changes[lang_code][get_source(obj)] = entries
+    for lang_code in languages:
+        index = get_autocomplete_index(lang_code)
+        if index is not None:
+            index.update(changes[lang_code])
+
+
+def schedule_update(model, pks):
+    """
+    Updates the entries of the objects, when the current transaction
+    is committed, or immediately in autocommit mode. The objects changed
+    several times in a transaction are updated once.
+    """
+    if not PATH:
+        return
+    pending = getattr(_pending, "objects", None)
+    if pending is None:
+        pending = _pending.objects = {}
+    pending.setdefault(model, set()).update(str(pk) for pk in pks)
+    transaction.on_commit(flush_pending)
+
+
+def flush_pending():
+    pending = getattr(_pending, "objects", None)
+    _pending.objects = {}
+    for model, pks in (pending or {}).items():
+        if pks:
+            update_objects(model, sorted(pks))
+
+
+def rebuild(languages=None, chunk_size=2000):
+    """
+    Rebuilds the indexes of the languages from all objects.
+    Returns a dict of language codes and numbers of entries.
+    """
+    if languages is None:
+        languages = [lang_code for lang_code, lang_name in settings.LANGUAGES]
+    counts = {}
+    for lang_code in languages:
+        index = get_autocomplete_index(lang_code)
+        if index is None:
+            continue
+        entries_by_source = {}
+        for queryset in get_querysets():
+            for obj in queryset.iterator(chunk_size=chunk_size):
+                entries_by_source[get_source(obj)] = get_entries(obj, [lang_code])[lang_code]
+        index.rebuild(entries_by_source)
+        counts[lang_code] = sum(len(entries) for entries in entries_by_source.values())
+    return counts
@@ -0,0 +1,114 @@
+import contextlib
+import os
+import tempfile
+from django.conf import settings
+
+BATCH_SIZE = 1000
+
+
+def create_sample_ideas(count, batch_size=BATCH_SIZE, categories=10, callback=None):
+    """
+    Creates the ideas with titles and contents in all languages
+    in the given number of categories for the benchmarks.
+    The callback is called with the number of ideas after each batch.
+    """
+    from crudl.apps.category.models import Category
+    from crudl.apps.ideas.models import Idea
+
+    categories = [
+        Category.add_root(
+            title=f"Benchmark category {index}",
+            multilingual_title={
+                lang_code: f"Benchmark category {index} ({lang_code})"
+                for lang_code, lang_name in settings.LANGUAGES
+            },
+        )
+        for index in range(categories)
+    ]
+    for batch_start in range(0, count, batch_size):
+        ideas = Idea.objects.bulk_create([
+            Idea(
+                title=f"Benchmark idea {index}",
+                content=f"Content of the benchmark idea {index}. " * 20,
+                multilingual_title={
+                    lang_code: f"Benchmark idea {index} ({lang_code})"
+                    for lang_code, lang_name in settings.LANGUAGES
+                },
+                multilingual_content={
+                    lang_code: f"Content of the benchmark idea {index} ({lang_code}). " * 20
+                    for lang_code, lang_name in settings.LANGUAGES
+                },
+                picture="ideas/benchmark.png",
+            )
+            for index in range(batch_start, min(batch_start + batch_size, count))
+        ])
+        Idea.categories.through.objects.bulk_create([
+            Idea.categories.through(idea=idea, category=categories[index % len(categories)])
+            for index, idea in enumerate(ideas, start=batch_start)
+        ])
+        if callback:
+            callback(batch_start + len(ideas))
+
+
+def get_whoosh_connections_info(path):
+    """
+    Returns the haystack connections of multilingual Whoosh
+    indexes of all languages in the directory
+    """
+    connections_info = {}
+    for lang_code, lang_name in settings.LANGUAGES:
+        lang_code_underscored = lang_code.replace("-", "_")
+        connections_info[f"default_{lang_code_underscored}"] = {
+            "ENGINE": "crudl.apps.search.multilingual_whoosh_backend.MultilingualWhooshEngine",
+            "PATH": os.path.join(path, f"whoosh_index_{lang_code_underscored}"),
+        }
+    lang_code_underscored = settings.LANGUAGE_CODE.replace("-", "_")
+    connections_info["default"] = connections_info[f"default_{lang_code_underscored}"]
+    return connections_info
+
+
+def get_embedded_connections_info(path):
+    """
+    Returns the haystack connection of the embedded
+    index of all languages in the directory
+    """
+    return {
+        "default": {
+            "ENGINE": "crudl.apps.search.embedded_backend.EmbeddedEngine",
+            "PATH": path,
+        },
+    }
+
+
+@contextlib.contextmanager
+def temporary_search_indexes(engine="whoosh"):
+    """
+    Replaces the haystack connections with multilingual Whoosh indexes
+    or with the embedded index in a temporary directory,
+    which is deleted afterwards
+    """
+    from django.test.utils import override_settings
+    from haystack import connections
+
+    get_connections_info = {
+        "whoosh": get_whoosh_connections_info,
+        "embedded": get_embedded_connections_info,
+    }[engine]
+    original_connections_info = connections.connections_info
+    with tempfile.TemporaryDirectory() as path:
+        connections_info = get_connections_info(path)
+        settings_override = override_settings(HAYSTACK_CONNECTIONS=connections_info)
+        settings_override.enable()
+        connections.connections_info = connections_info
+        connections.thread_local.connections = {}
+        try:
+            yield connections_info
+        finally:
+            if engine == "whoosh":
+                from . import multilingual_whoosh_backend
+
+                multilingual_whoosh_backend.close_pool()
+                multilingual_whoosh_backend.clear_searchers()
+            settings_override.disable()
+            connections.connections_info = original_connections_info
+            connections.thread_local.connections = {}
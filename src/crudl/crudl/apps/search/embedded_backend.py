@@ -0,0 +1,211 @@
+import collections
+import os
+import threading
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import translation
+from haystack.backends import BaseEngine, BaseSearchBackend, BaseSearchQuery, log_query
+from haystack.constants import DJANGO_CT, DJANGO_ID, ID
+from haystack.exceptions import SkipDocument
+from haystack.inputs import Clean, PythonData
+from haystack.models import SearchResult
+from haystack.utils import get_identifier, get_model_ct
+from .embedded_index import LanguageIndex, analyze, get_field_term, get_term_positions, parse_query
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_language_index(path, **kwargs):
+    """
+    Returns the LanguageIndex of the directory, which is
+    shared by all backends and threads of the process
+    """
+    index = _indexes.get(path)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(path)
+            if index is None:
+                index = _indexes[path] = LanguageIndex(path, **kwargs)
+    return index
+
+
+class EmbeddedSearchBackend(BaseSearchBackend):
+    """
+    Haystack backend, which searches in-process inverted indexes of the
+    languages in the subdirectories of "PATH" ranked with BM25. The posting
+    lists are memory-mapped arrays, so the indexes are shared by the worker
+    processes through the page cache, and the updates are written as
+    new segments, which the other processes load on their next query.
+
+    Connection options: "PATH", "BM25_K1" (1.2), "BM25_B" (0.75)
+    and "MAX_SEGMENTS" (8) per language.
+    """
+    RESERVED_WORDS = ("AND", "NOT", "OR")
+    RESERVED_CHARACTERS = ("\\", "(", ")", '"', ":", "-", "*")
+
+    def __init__(self, connection_alias, **connection_options):
+        super().__init__(connection_alias, **connection_options)
+        self.path = connection_options.get("PATH")
+        if not self.path:
+            raise ImproperlyConfigured(
+                f"You must specify a 'PATH' in your settings for connection '{connection_alias}'."
+            )
+        self.index_options = {
+            "k1": connection_options.get("BM25_K1", 1.2),
+            "b": connection_options.get("BM25_B", 0.75),
+            "max_segments": connection_options.get("MAX_SEGMENTS", 8),
+        }
+
+    def get_index(self, lang_code=None):
+        lang_code = lang_code or translation.get_language() or settings.LANGUAGE_CODE
+        if lang_code not in dict(settings.LANGUAGES):
+            lang_code = translation.get_supported_language_variant(lang_code)
+        return get_language_index(os.path.join(self.path, lang_code), **self.index_options)
+
+    def get_field_names(self):
+        from haystack import connections
+
+        unified_index = connections[self.connection_alias].get_unified_index()
+        return [ID, DJANGO_CT, DJANGO_ID] + [
+            field.index_fieldname for field in unified_index.all_searchfields().values()
+            if not field.document
+        ]
+
+    def update(self, index, iterable, commit=True):
+        objects = list(iterable)
+        for lang_code, lang_name in settings.LANGUAGES:
+            documents = []
+            with translation.override(lang_code):
+                for obj in objects:
+                    try:
+                        documents.append(self.prepare_document(index, index.full_prepare(obj)))
+                    except SkipDocument:
+                        self.log.debug("Indexing for object `%s` skipped", obj)
+            self.get_index(lang_code).update(documents)
+
+    def prepare_document(self, index, prepared):
+        """
+        Returns the document of the prepared data of a search index:
+        the words of the content field and the values of the other
+        fields as terms, and the other fields as stored fields
+        """
+        prepared = dict(prepared)
+        prepared.pop("boost", None)
+        words = analyze(prepared.pop(index.get_content_field(), ""))
+        terms = collections.Counter(words)
+        length = len(words)
+        stored = {}
+        for field_name, value in prepared.items():
+            if value is None:
+                continue
+            for item in value if isinstance(value, (list, tuple, set)) else [value]:
+                terms[get_field_term(field_name, item)] += 1
+            if field_name not in (ID, DJANGO_CT, DJANGO_ID):
+                stored[field_name] = list(value) if isinstance(value, (tuple, set)) else value
+        return {
+            "id": prepared[ID],
+            "django_ct": prepared[DJANGO_CT],
+            "django_id": prepared[DJANGO_ID],
+            "stored": stored,
+            "terms": terms,
+            "positions": get_term_positions(words),
+            "length": length,
+        }
+
+    def remove(self, obj_or_string, commit=True):
+        document_id = get_identifier(obj_or_string)
+        for lang_code, lang_name in settings.LANGUAGES:
+            self.get_index(lang_code).remove([document_id])
+
+    def clear(self, models=None, commit=True):
+        for lang_code, lang_name in settings.LANGUAGES:
+            index = self.get_index(lang_code)
+            if models:
+                index.remove_content_types({get_model_ct(model) for model in models})
+            else:
+                index.clear()
+
+    def get_segment_count(self):
+        return len(self.get_index().get_snapshot().segments)
+
+    def optimize(self):
+        for lang_code, lang_name in settings.LANGUAGES:
+            self.get_index(lang_code).optimize()
+
+    @log_query
+    def search(
+        self,
+        query_string,
+        sort_by=None,
+        start_offset=0,
+        end_offset=None,
+        models=None,
+        limit_to_registered_models=None,
+        result_class=None,
+        narrow_queries=None,
+        **kwargs
+    ):
+        if not query_string:
+            return {"results": [], "hits": 0}
+
+        if limit_to_registered_models is None:
+            limit_to_registered_models = getattr(settings, "HAYSTACK_LIMIT_TO_REGISTERED_MODELS", True)
+        if models:
+            content_types = {get_model_ct(model) for model in models}
+        elif limit_to_registered_models:
+            content_types = set(self.build_models_list())
+        else:
+            content_types = None
+
+        field_names = self.get_field_names()
+        query = parse_query(query_string, field_names)
+        for narrow_query in narrow_queries or []:
+            narrow_node = parse_query(narrow_query, field_names)
+            if query is not None and narrow_node is not None:
+                query = ("and", [query, narrow_node])
+
+        hits, page = self.get_index().search(query, content_types, start_offset, end_offset, sort_by)
+        result_class = result_class or SearchResult
+        results = []
+        for score, (document_id, django_ct, django_id, stored) in page:
+            app_label, model_name = django_ct.split(".")
+            results.append(result_class(app_label, model_name, django_id, score, **stored))
+        return {"results": results, "hits": hits, "facets": {}, "spelling_suggestion": None}
+
+
+class EmbeddedSearchQuery(BaseSearchQuery):
+    def build_query_fragment(self, field, filter_type, value):
+        from haystack import connections
+
+        if not hasattr(value, "input_type_name"):
+            if hasattr(value, "values_list"):
+                value = list(value)
+            value = Clean(value) if isinstance(value, str) else PythonData(value)
+
+        if field == "content":
+            if filter_type not in ("content", "contains", "exact", "fuzzy"):
+                raise NotImplementedError(f"The embedded search backend doesn't support {filter_type} for the content.")
+            prepared_value = str(value.prepare(self))
+            if filter_type == "exact" and value.input_type_name != "exact":
+                prepared_value = self.build_exact_query(prepared_value)
+            return f"({prepared_value})"
+
+        # the other fields are matched by their exact values
+        if filter_type not in ("content", "exact", "in"):
+            raise NotImplementedError(f"The embedded search backend doesn't support {filter_type} for the fields.")
+        index_fieldname = connections[self._using].get_unified_index().get_index_fieldname(field)
+        values = value.query_string if filter_type == "in" else [value.query_string]
+        fragments = [
+            f"{index_fieldname}:{self.build_exact_query(str(item))}" for item in values
+        ]
+        return f"({' OR '.join(fragments) or 'NOT *'})"
+
+    def build_exact_query(self, query_string):
+        escaped = query_string.replace("\\", "\\\\").replace('"', '\\"')
+        return f'"{escaped}"'
+
+
+class EmbeddedEngine(BaseEngine):
+    backend = EmbeddedSearchBackend
+    query = EmbeddedSearchQuery
@@ -0,0 +1,629 @@
+import array
+import fcntl
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import threading
+from contextlib import contextmanager
+from django.core.serializers.json import DjangoJSONEncoder
+
+# unsigned 32-bit integers in the byte order of the machine
+TYPECODE = "I"
+MANIFEST = "manifest.json"
+LOCK = "write.lock"
+
+TOKEN_RE = re.compile(r"\w+")
+QUERY_TOKEN_RE = re.compile(
+    r'\s*(?:(?P<open>\()|(?P<close>\))|"(?P<phrase>(?:[^"\\]|\\.)*)"?|(?P<word>(?:[^\s()"\\]|\\.)+))'
+)
+ESCAPE_RE = re.compile(r"\\(.)")
+
+
+def analyze(text):
+    """
+    Returns the terms of the text: its words in lowercase
+    """
+    return TOKEN_RE.findall(str(text).casefold())
+
+
+def get_term_positions(terms):
+    """
+    Returns a dict of the terms and the lists of their positions in the terms
+    """
+    positions = {}
+    for position, term in enumerate(terms):
+        positions.setdefault(term, []).append(position)
+    return positions
+
+
+def get_field_term(field_name, value):
+    """
+    Returns the term for filtering by the exact value of a field
+    """
+    return f"{field_name}:{str(value).casefold()}"
+
+
+def map_array(filename):
+    """
+    Returns the array in the file as a read-only memoryview
+    of the memory-mapped file
+    """
+    with open(filename, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            return memoryview(array.array(TYPECODE))
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mapped).cast(TYPECODE)
+
+
+def get_sort_key(field_name):
+    def sort_key(hit):
+        value = hit[1][3].get(field_name)
+        # the documents without the value come first
+        return (value is not None, "" if value is None else value)
+    return sort_key
+
+
+class Segment(object):
+    """
+    Immutable part of a language index with the stored fields and
+    lengths of its documents and the posting lists of its terms.
+    The posting list of a term is an array of document numbers followed
+    by an array of the term frequencies in the same order. The positions
+    of the words of the content are stored in the same order in another
+    array, each document with as many positions as its frequency.
+    """
+    def __init__(self, path, name):
+        self.name = name
+        with open(os.path.join(path, f"{name}.json"), encoding="utf-8") as f:
+            data = json.load(f)
+        # [id, django_ct, django_id, stored fields] by document number
+        self.documents = data["documents"]
+        self.terms = data["terms"]
+        self.lengths = map_array(os.path.join(path, f"{name}.lengths"))
+        self.postings = map_array(os.path.join(path, f"{name}.postings"))
+        try:
+            self.positions = map_array(os.path.join(path, f"{name}.positions"))
+        except FileNotFoundError:
+            # the segments written before the positions were stored
+            # don't match phrases until the index is rebuilt
+            self.positions = memoryview(array.array(TYPECODE))
+        self.total_length = sum(self.lengths)
+
+    def get_postings(self, term):
+        """
+        Returns the document numbers and frequencies of the term
+        """
+        offset, count = self.terms.get(term, (0, 0))[:2]
+        return self.postings[offset:offset + count], self.postings[offset + count:offset + 2 * count]
+
+    def get_positions(self, term):
+        """
+        Returns a dict of the document numbers and the positions of the
+        word in them, which is empty for the terms of the field values
+        """
+        entry = self.terms.get(term)
+        if entry is None or len(entry) < 3:
+            return {}
+        numbers, frequencies = self.get_postings(term)
+        positions = {}
+        start = entry[2]
+        for number, frequency in zip(numbers, frequencies):
+            positions[number] = self.positions[start:start + frequency]
+            start += frequency
+        return positions
+
+    @classmethod
+    def write(cls, path, name, documents, lengths, postings):
+        """
+        Writes the documents, their lengths and the posting lists,
+        which are dicts of terms and lists of (document number,
+        frequency, positions) tuples with empty positions for the
+        terms of the field values, and returns the segment
+        """
+        terms = {}
+        data = array.array(TYPECODE)
+        position_data = array.array(TYPECODE)
+        for term in sorted(postings):
+            entries = postings[term]
+            terms[term] = [len(data), len(entries)]
+            data.extend(document_number for document_number, frequency, positions in entries)
+            data.extend(frequency for document_number, frequency, positions in entries)
+            if any(positions for document_number, frequency, positions in entries):
+                terms[term].append(len(position_data))
+                for document_number, frequency, positions in entries:
+                    position_data.extend(positions)
+        with open(os.path.join(path, f"{name}.postings"), "wb") as f:
+            data.tofile(f)
+        with open(os.path.join(path, f"{name}.positions"), "wb") as f:
+            position_data.tofile(f)
+        with open(os.path.join(path, f"{name}.lengths"), "wb") as f:
+            array.array(TYPECODE, lengths).tofile(f)
+        with open(os.path.join(path, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump({"documents": documents, "terms": terms}, f, cls=DjangoJSONEncoder)
+        return cls(path, name)
+
+    def delete_files(self, path):
+        for extension in ("json", "lengths", "postings", "positions"):
+            try:
+                os.remove(os.path.join(path, f"{self.name}.{extension}"))
+            except FileNotFoundError:
+                pass
+
+
+class Snapshot(object):
+    """
+    The segments of a language index and their deleted documents
+    in one generation of the manifest, which is searched with BM25
+    """
+    def __init__(self, version, generation, counter, segments, k1, b):
+        self.version = version
+        self.generation = generation
+        self.counter = counter
+        # (segment, frozenset of deleted document numbers) tuples
+        self.segments = segments
+        self.k1 = k1
+        self.b = b
+        self.document_count = sum(len(segment.documents) - len(deleted) for segment, deleted in segments)
+        total_length = sum(
+            segment.total_length - sum(segment.lengths[number] for number in deleted)
+            for segment, deleted in segments
+        )
+        self.average_length = total_length / self.document_count if self.document_count else 1.0
+        self._idf = {}
+        self._locations = None
+
+    def get_locations(self):
+        """
+        Returns a dict of document ids and the
+        (segment name, document number) tuples
+        """
+        if self._locations is None:
+            self._locations = {
+                document[0]: (segment.name, number)
+                for segment, deleted in self.segments
+                for number, document in enumerate(segment.documents)
+                if number not in deleted
+            }
+        return self._locations
+
+    def get_idf(self, term):
+        idf = self._idf.get(term)
+        if idf is None:
+            # the deleted documents are counted until the segments are merged
+            frequency = sum(segment.terms.get(term, (0, 0))[1] for segment, deleted in self.segments)
+            idf = self._idf[term] = math.log(
+                1 + (self.document_count - frequency + 0.5) / (frequency + 0.5)
+            )
+        return idf
+
+    def evaluate(self, node, segment):
+        """
+        Returns a dict of the numbers of the matching documents of
+        the segment and their scores for the parsed query node
+        """
+        kind = node[0]
+        if kind == "term":
+            numbers, frequencies = segment.get_postings(node[1])
+            idf = self.get_idf(node[1])
+            k1, b, lengths = self.k1, self.b, segment.lengths
+            norm = k1 * b / self.average_length
+            return {
+                number: idf * frequency * (k1 + 1) / (frequency + k1 * (1 - b) + norm * lengths[number])
+                for number, frequency in zip(numbers, frequencies)
+            }
+        if kind == "phrase":
+            # the documents with all words are checked for their adjacency
+            scores = self.evaluate(("and", [("term", term) for term in node[1]]), segment)
+            if scores:
+                positions = [segment.get_positions(term) for term in node[1]]
+                scores = {
+                    number: score for number, score in scores.items()
+                    if has_phrase([term_positions.get(number, ()) for term_positions in positions])
+                }
+            return scores
+        if kind == "field":
+            return dict.fromkeys(segment.get_postings(node[1])[0], 0.0)
+        if kind == "all":
+            return dict.fromkeys(range(len(segment.documents)), 0.0)
+        if kind == "not":
+            excluded = self.evaluate(node[1], segment)
+            return {number: 0.0 for number in range(len(segment.documents)) if number not in excluded}
+        if kind == "or":
+            scores = {}
+            for child in node[1]:
+                for number, score in self.evaluate(child, segment).items():
+                    scores[number] = scores.get(number, 0.0) + score
+            return scores
+        # "and": the smallest results are intersected first
+        positive = [child for child in node[1] if child[0] != "not"]
+        negative = [child[1] for child in node[1] if child[0] == "not"]
+        results = sorted((self.evaluate(child, segment) for child in positive), key=len)
+        if not results:
+            results = [self.evaluate(("all",), segment)]
+        scores = results[0]
+        for result in results[1:]:
+            scores = {number: score + result[number] for number, score in scores.items() if number in result}
+        for child in negative:
+            if not scores:
+                break
+            excluded = self.evaluate(child, segment)
+            scores = {number: score for number, score in scores.items() if number not in excluded}
+        return scores
+
+    def search(self, query, content_types=None, start=0, end=None, sort_by=None):
+        """
+        Returns the number of documents matching the parsed query and the
+        (score, document) tuples of the slice of them sorted by relevance
+        or by the stored fields in sort_by, e.g. ["-created", "title"]
+        """
+        hits = []
+        if query is not None:
+            for segment, deleted in self.segments:
+                documents = segment.documents
+                for number, score in self.evaluate(query, segment).items():
+                    if number in deleted:
+                        continue
+                    document = documents[number]
+                    if content_types is None or document[1] in content_types:
+                        hits.append((score, document))
+        if sort_by:
+            # sorted by the last field first, as the sorting is stable
+            for field_name in reversed(sort_by):
+                hits.sort(key=get_sort_key(field_name.lstrip("-")), reverse=field_name.startswith("-"))
+            page = hits[start:end]
+        elif end is not None:
+            page = heapq.nlargest(end, hits, key=lambda hit: hit[0])[start:]
+        else:
+            page = sorted(hits, key=lambda hit: hit[0], reverse=True)[start:]
+        return len(hits), page
+
+
+class LanguageIndex(object):
+    """
+    Inverted index of the documents in one language in a directory.
+    Every update writes a new segment and the numbers of the replaced
+    documents to the manifest, which is replaced atomically, so that the
+    readers in the other threads and processes keep searching their
+    snapshot until they notice the new manifest. Segments over
+    max_segments are merged without their deleted documents.
+    """
+    def __init__(self, path, k1=1.2, b=0.75, max_segments=8):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.max_segments = max_segments
+        self._snapshot = None
+        self._segments = {}
+        self._lock = threading.RLock()
+
+    def get_version(self):
+        try:
+            stat = os.stat(os.path.join(self.path, MANIFEST))
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def get_snapshot(self):
+        """
+        Returns the snapshot of the latest manifest, which is loaded
+        again only when the manifest file was replaced
+        """
+        version = self.get_version()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.version != version:
+                    try:
+                        snapshot = self.load(version)
+                    except FileNotFoundError:
+                        # the segments were merged after reading the manifest
+                        snapshot = self.load(self.get_version())
+                    self._snapshot = snapshot
+        return snapshot
+
+    def load(self, version):
+        manifest = {"generation": 0, "counter": 0, "segments": []}
+        if version is not None:
+            with open(os.path.join(self.path, MANIFEST), encoding="utf-8") as f:
+                manifest = json.load(f)
+        segments = []
+        for entry in manifest["segments"]:
+            segment = self._segments.get(entry["name"])
+            if segment is None:
+                segment = self._segments[entry["name"]] = Segment(self.path, entry["name"])
+            segments.append((segment, frozenset(entry["deleted"])))
+        names = {entry["name"] for entry in manifest["segments"]}
+        for name in list(self._segments):
+            if name not in names:
+                del self._segments[name]
+        return Snapshot(version, manifest["generation"], manifest["counter"], segments, self.k1, self.b)
+
+    def search(self, query, content_types=None, start=0, end=None, sort_by=None):
+        return self.get_snapshot().search(query, content_types, start, end, sort_by)
+
+    @contextmanager
+    def write_lock(self):
+        """
+        Serializes the writers of the threads and processes and yields
+        the snapshot of the manifest read again from the disk, as a replaced
+        manifest can have the same inode, time and size as the cached one
+        """
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, open(os.path.join(self.path, LOCK), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._snapshot = self.load(self.get_version())
+                yield self._snapshot
+                self._snapshot = self.load(self.get_version())
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def update(self, documents):
+        """
+        Adds the documents or replaces the ones with the same ids.
+        The documents are dicts with "id", "django_ct", "django_id",
+        "stored" fields, "terms" with their frequencies, "positions"
+        of the words of the content and "length".
+        """
+        documents = list({document["id"]: document for document in documents}.values())
+        if not documents:
+            return
+        with self.write_lock() as snapshot:
+            deleted = self.get_deleted(snapshot, [document["id"] for document in documents])
+            postings = {}
+            for number, document in enumerate(documents):
+                positions = document.get("positions", {})
+                for term, frequency in document["terms"].items():
+                    postings.setdefault(term, []).append((number, frequency, positions.get(term, ())))
+            name = f"segment_{snapshot.counter}"
+            segment = Segment.write(
+                self.path, name,
+                [
+                    [document["id"], document["django_ct"], document["django_id"], document["stored"]]
+                    for document in documents
+                ],
+                [document["length"] for document in documents],
+                postings,
+            )
+            self._segments[name] = segment
+            segments = [(segment, deleted[segment.name]) for segment, _ in snapshot.segments]
+            segments.append((segment, set()))
+            self.save(snapshot, segments, snapshot.counter + 1)
+
+    def remove(self, document_ids):
+        with self.write_lock() as snapshot:
+            deleted = self.get_deleted(snapshot, document_ids)
+            segments = [(segment, deleted[segment.name]) for segment, _ in snapshot.segments]
+            self.save(snapshot, segments, snapshot.counter)
+
+    def remove_content_types(self, content_types):
+        with self.write_lock() as snapshot:
+            segments = [
+                (segment, set(deleted) | {
+                    number for number, document in enumerate(segment.documents)
+                    if document[1] in content_types
+                })
+                for segment, deleted in snapshot.segments
+            ]
+            self.save(snapshot, segments, snapshot.counter)
+
+    def clear(self):
+        with self.write_lock() as snapshot:
+            self.save(snapshot, [], snapshot.counter)
+
+    def optimize(self):
+        """
+        Merges all segments into one without the deleted documents
+        """
+        with self.write_lock() as snapshot:
+            segments = [(segment, set(deleted)) for segment, deleted in snapshot.segments]
+            if len(segments) > 1 or any(deleted for segment, deleted in segments):
+                self.save(snapshot, segments, snapshot.counter, max_segments=1)
+
+    def get_deleted(self, snapshot, document_ids):
+        deleted = {segment.name: set(numbers) for segment, numbers in snapshot.segments}
+        locations = snapshot.get_locations()
+        for document_id in document_ids:
+            location = locations.get(document_id)
+            if location is not None:
+                deleted[location[0]].add(location[1])
+        return deleted
+
+    def save(self, snapshot, segments, counter, max_segments=None):
+        """
+        Merges the smallest segments over max_segments, writes the
+        manifest of the segments and deletes the unused segment files
+        """
+        max_segments = max_segments or self.max_segments
+        # the segments of the old manifest and the passed ones, including
+        # a segment written just now, whose files are deleted, if they
+        # aren't in the new manifest
+        previous = {segment.name: segment for segment, deleted in snapshot.segments}
+        previous.update((segment.name, segment) for segment, deleted in segments)
+        segments = [
+            (segment, deleted) for segment, deleted in segments
+            if len(deleted) < len(segment.documents)
+        ]
+        if len(segments) > max_segments:
+            segments.sort(key=lambda item: len(item[0].documents) - len(item[1]))
+            merged_count = len(segments) - max_segments + 1
+            merged = self.merge(f"segment_{counter}", segments[:merged_count])
+            counter += 1
+            segments = segments[merged_count:] + [(merged, set())]
+
+        manifest = {
+            "generation": snapshot.generation + 1,
+            "counter": counter,
+            "segments": [
+                {"name": segment.name, "deleted": sorted(deleted)} for segment, deleted in segments
+            ],
+        }
+        filename = os.path.join(self.path, MANIFEST)
+        with open(f"{filename}.tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{filename}.tmp", filename)
+
+        # the snapshots of the readers keep the deleted files mapped
+        names = {segment.name for segment, deleted in segments}
+        for name, segment in previous.items():
+            if name not in names:
+                segment.delete_files(self.path)
+                self._segments.pop(name, None)
+
+    def merge(self, name, segments):
+        documents, lengths, postings = [], [], {}
+        for segment, deleted in segments:
+            numbers = {}
+            for number, document in enumerate(segment.documents):
+                if number not in deleted:
+                    numbers[number] = len(documents)
+                    documents.append(document)
+                    lengths.append(segment.lengths[number])
+            for term in segment.terms:
+                entries = postings.setdefault(term, [])
+                old_numbers, frequencies = segment.get_postings(term)
+                positions = segment.get_positions(term)
+                entries.extend(
+                    (numbers[number], frequency, positions.get(number, ()))
+                    for number, frequency in zip(old_numbers, frequencies)
+                    if number in numbers
+                )
+        postings = {term: entries for term, entries in postings.items() if entries}
+        segment = self._segments[name] = Segment.write(self.path, name, documents, lengths, postings)
+        return segment
+
+
+def parse_query(query_string, field_names=()):
+    """
+    Parses the query of the words and "phrases" combined with AND, OR,
+    NOT and parentheses, where field:"value" matches the exact value of
+    one of the field names and * matches everything. Returns a tree of
+    ("and" | "or", [nodes]), ("not", node), ("term", term),
+    ("phrase", [terms]), ("field", term) and ("all",) tuples or None
+    for an empty query. Phrases match the documents with their words
+    next to each other in the same order.
+    """
+    tokens = []
+    for match in QUERY_TOKEN_RE.finditer(query_string):
+        if match.group("open"):
+            tokens.append(("(", None))
+        elif match.group("close"):
+            tokens.append((")", None))
+        elif match.group("phrase") is not None:
+            tokens.append(("phrase", ESCAPE_RE.sub(r"\1", match.group("phrase"))))
+        elif match.group("word"):
+            tokens.append(("word", match.group("word")))
+    parser = QueryParser(tokens, field_names)
+    return parser.parse()
+
+
+class QueryParser(object):
+    def __init__(self, tokens, field_names):
+        self.tokens = tokens
+        self.position = 0
+        self.field_names = set(field_names)
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return (None, None)
+
+    def next(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        nodes = []
+        while self.position < len(self.tokens):
+            # unbalanced closing parentheses are skipped
+            if self.peek()[0] == ")":
+                self.next()
+                continue
+            nodes.append(self.parse_or())
+        return combine("and", nodes)
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.peek() == ("word", "OR"):
+            self.next()
+            nodes.append(self.parse_and())
+        return combine("or", nodes)
+
+    def parse_and(self):
+        nodes = [self.parse_unary()]
+        while self.peek()[0] not in (None, ")") and self.peek() != ("word", "OR"):
+            if self.peek() == ("word", "AND"):
+                self.next()
+                continue
+            nodes.append(self.parse_unary())
+        return combine("and", nodes)
+
+    def parse_unary(self):
+        kind, value = self.peek()
+        if (kind, value) == ("word", "NOT"):
+            self.next()
+            node = self.parse_unary()
+            return ("not", node) if node is not None else None
+        if kind == "word" and value.startswith("-") and len(value) > 1:
+            self.tokens[self.position] = ("word", value[1:])
+            node = self.parse_atom()
+            return ("not", node) if node is not None else None
+        return self.parse_atom()
+
+    def parse_atom(self):
+        kind, value = self.next()
+        if kind == "(":
+            node = self.parse_or()
+            if self.peek()[0] == ")":
+                self.next()
+            return node
+        if kind == "phrase":
+            return self.phrase_node(value)
+        if kind != "word":
+            return None
+        if value in ("*", "*:*"):
+            return ("all",)
+        field_name, separator, field_value = value.partition(":")
+        if separator and field_name in self.field_names:
+            if not field_value and self.peek()[0] == "phrase":
+                field_value = self.next()[1]
+            return ("field", get_field_term(field_name, ESCAPE_RE.sub(r"\1", field_value)))
+        return self.text_node(ESCAPE_RE.sub(r"\1", value))
+
+    def text_node(self, text):
+        return combine("and", [("term", term) for term in analyze(text)])
+
+    def phrase_node(self, text):
+        terms = analyze(text)
+        if len(terms) > 1:
+            return ("phrase", terms)
+        return self.text_node(text)
+
+
+def has_phrase(positions):
+    """
+    Returns True, if the lists of the positions of the words of
+    a phrase in a document have the words at consecutive positions
+    """
+    starts = set(positions[0])
+    for offset, word_positions in enumerate(positions[1:], start=1):
+        starts &= {position - offset for position in word_positions}
+        if not starts:
+            return False
+    return True
+
+
+def combine(kind, nodes):
+    nodes = [node for node in nodes if node is not None]
+    if not nodes:
+        return None
+    if len(nodes) == 1:
+        return nodes[0]
+    return (kind, nodes)
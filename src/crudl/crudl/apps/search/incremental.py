@@ -0,0 +1,142 @@
+import datetime
+from django.apps import apps
+from django.conf import settings
+from django.db import models, transaction
+from django.utils.timezone import now as timezone_now
+from . import index_queue, result_cache
+from .models import IndexWatermark, Tombstone
+
+CHUNK_SIZE = getattr(settings, "SEARCH_INCREMENTAL_CHUNK_SIZE", 500)
+# modifications committed later than their timestamp, e.g. by long
+# transactions, are still found, if they are at most this late
+SAFETY_MARGIN = getattr(settings, "SEARCH_INCREMENTAL_SAFETY_MARGIN", datetime.timedelta(minutes=5))
+
+
+class IndexTarget(object):
+    """
+    A search index of ideas with its own watermark
+    """
+    def __init__(self, name, update, remove):
+        self.name = name
+        self.update = update
+        self.remove = remove
+
+
+def get_targets():
+    """
+    Returns the IndexTargets of the Elasticsearch index
+    and the haystack connections, which index the ideas
+    """
+    from crudl.apps.ideas.models import Idea
+
+    targets = []
+    if apps.is_installed("django_elasticsearch_dsl"):
+        targets.append(IndexTarget(
+            "elasticsearch:ideas", index_queue.update_elasticsearch, index_queue.remove_elasticsearch,
+        ))
+    for using, backend, index in index_queue.get_haystack_backends(Idea):
+        targets.append(IndexTarget(
+            f"haystack:{using}",
+            lambda ideas, backend=backend, index=index: backend.update(index, ideas),
+            lambda pks, backend=backend: index_queue.remove_haystack(backend, pks),
+        ))
+    return targets
+
+
+def mark_ideas_dirty(queryset):
+    """
+    Marks the ideas as changed for the search, e.g. when their translations
+    or categories change, so that they are reindexed. Their modification
+    time, which is shown and is a part of the translation cache keys,
+    is kept.
+    """
+    queryset.update(search_dirty_at=timezone_now())
+
+
+def get_changed_ideas_filter(since):
+    """
+    Returns a Q object for the ideas saved or marked as changed since the time
+    """
+    return models.Q(modified__gte=since) | models.Q(search_dirty_at__gte=since)
+
+
+def record_deletion(model, pks):
+    Tombstone.objects.bulk_create([
+        Tombstone(model=model._meta.label_lower, object_id=str(pk)) for pk in pks
+    ])
+
+
+def update_indexes(names=None, full=False, chunk_size=CHUNK_SIZE, margin=SAFETY_MARGIN):
+    """
+    Updates the search indexes with the ideas changed since their
+    watermarks and removes the ideas deleted since then. Indexes
+    without a watermark or all indexes with full=True get all ideas.
+    The targets with the same watermark share the database queries.
+    Returns a dict of index names and (updated, removed) counts.
+    """
+    from crudl.apps.ideas.models import Idea
+
+    targets = [target for target in get_targets() if names is None or target.name in names]
+    watermarks = {
+        watermark.name: watermark.modified
+        for watermark in IndexWatermark.objects.filter(name__in=[target.name for target in targets])
+    }
+    targets_by_since = {}
+    for target in targets:
+        since = None if full else watermarks.get(target.name)
+        if since is not None:
+            since -= margin
+        targets_by_since.setdefault(since, []).append(target)
+
+    counts = {}
+    for since, targets_group in targets_by_since.items():
+        # taken before reading, so that nothing saved meanwhile is skipped
+        started = timezone_now()
+        ideas = Idea.objects.order_by("modified", "pk")
+        tombstones = Tombstone.objects.filter(model=Idea._meta.label_lower)
+        if since is not None:
+            ideas = ideas.filter(get_changed_ideas_filter(since))
+            tombstones = tombstones.filter(deleted__gte=since)
+
+        updated = 0
+        pks = ideas.values_list("pk", flat=True)
+        for chunk in index_queue.iter_chunks(pks.iterator(chunk_size=chunk_size), chunk_size):
+            chunk_ideas = list(index_queue.get_ideas(chunk))
+            for target in targets_group:
+                target.update(chunk_ideas)
+            updated += len(chunk_ideas)
+
+        removed = 0
+        tombstone_pks = tombstones.order_by("object_id").values_list("object_id", flat=True).distinct()
+        for chunk in index_queue.iter_chunks(tombstone_pks.iterator(chunk_size=chunk_size), chunk_size):
+            # the ideas saved again with the same primary key stay indexed
+            existing = {str(pk) for pk in Idea.objects.filter(pk__in=chunk).values_list("pk", flat=True)}
+            chunk = [pk for pk in chunk if pk not in existing]
+            if chunk:
+                for target in targets_group:
+                    target.remove(chunk)
+                removed += len(chunk)
+
+        with transaction.atomic():
+            for target in targets_group:
+                IndexWatermark.objects.update_or_create(name=target.name, defaults={"modified": started})
+                counts[target.name] = (updated, removed)
+
+    prune_tombstones(margin)
+    if counts:
+        result_cache.bump_generation()
+    return counts
+
+
+def prune_tombstones(margin=SAFETY_MARGIN):
+    """
+    Deletes the tombstones, which all indexes have processed
+    """
+    names = [target.name for target in get_targets()]
+    watermarks = list(
+        IndexWatermark.objects.filter(name__in=names).values_list("modified", flat=True)
+    )
+    if not watermarks or len(watermarks) < len(names) or None in watermarks:
+        return 0
+    deleted, details = Tombstone.objects.filter(deleted__lt=min(watermarks) - margin).delete()
+    return deleted
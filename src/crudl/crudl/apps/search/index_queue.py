@@ -0,0 +1,182 @@
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now as timezone_now
+from . import result_cache
+from .models import IndexUpdate
+
+BATCH_SIZE = getattr(settings, "SEARCH_INDEX_QUEUE_BATCH_SIZE", 500)
+CHUNK_SIZE = getattr(settings, "SEARCH_INDEX_QUEUE_CHUNK_SIZE", 500)
+
+
+def enqueue(model, pks, action=IndexUpdate.UPDATE, using=None):
+    """
+    Records the objects of the model for the search index update,
+    when the current transaction is committed, or immediately
+    in autocommit mode. Nothing is recorded on rollback.
+    """
+    label = model._meta.label_lower
+    object_ids = sorted({str(pk) for pk in pks})
+    if not object_ids:
+        return
+
+    def record():
+        IndexUpdate.objects.using(using).bulk_create([
+            IndexUpdate(model=label, object_id=object_id, action=action)
+            for object_id in object_ids
+        ])
+
+    transaction.on_commit(record, using=using)
+
+
+def get_stats():
+    """
+    Returns the number of waiting updates as "depth" and the age
+    of the oldest one in seconds as "lag"
+    """
+    depth = IndexUpdate.objects.count()
+    oldest = IndexUpdate.objects.order_by("created").values_list("created", flat=True).first()
+    return {
+        "depth": depth,
+        "lag": (timezone_now() - oldest).total_seconds() if oldest else 0,
+    }
+
+
+def process_batch(batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE):
+    """
+    Takes the oldest updates, coalesces repeated ones of the same object
+    to the last action, updates the search indexes and removes the
+    processed updates. The rows are locked, so that several workers
+    can run at the same time, and they stay in the queue,
+    if indexing fails. Returns the number of processed rows.
+    """
+    from crudl.apps.ideas.models import Idea
+
+    with transaction.atomic():
+        rows = list(
+            IndexUpdate.objects.select_for_update(skip_locked=True).order_by("pk")[:batch_size]
+        )
+        if not rows:
+            return 0
+        last_actions = {}
+        for row in rows:
+            last_actions[(row.model, row.object_id)] = row.action
+
+        idea_label = Idea._meta.label_lower
+        updated_ideas, deleted_ideas, updated_categories = set(), set(), set()
+        for (label, object_id), action in last_actions.items():
+            if label == idea_label:
+                (deleted_ideas if action == IndexUpdate.DELETE else updated_ideas).add(object_id)
+            elif label == "category.category":
+                # the ideas of deleted categories are recorded before deleting
+                if action == IndexUpdate.UPDATE:
+                    updated_categories.add(object_id)
+
+        for chunk in iter_chunks(sorted(updated_ideas - deleted_ideas), chunk_size):
+            update_ideas(chunk)
+        for chunk in iter_chunks(sorted(deleted_ideas), chunk_size):
+            remove_ideas(chunk)
+        if updated_categories:
+            # a category can have a lot of ideas, so they are streamed in chunks
+            idea_pks = Idea.categories.through.objects.filter(
+                category_id__in=updated_categories,
+            ).exclude(
+                idea_id__in=updated_ideas | deleted_ideas,
+            ).order_by("idea_id").values_list("idea_id", flat=True).distinct()
+            for chunk in iter_chunks(idea_pks.iterator(chunk_size=chunk_size), chunk_size):
+                update_ideas(chunk)
+
+        IndexUpdate.objects.filter(pk__in=[row.pk for row in rows]).delete()
+    result_cache.bump_generation()
+    return len(rows)
+
+
+def iter_chunks(iterable, chunk_size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def get_ideas(pks):
+    from crudl.apps.ideas.models import Idea
+
+    return Idea.objects.filter(pk__in=pks).select_related("author").prefetch_related(
+        "translations", "categories__translations"
+    )
+
+
+def update_ideas(pks):
+    """
+    Updates the ideas in the Elasticsearch and haystack indexes
+    and removes the ones, which don't exist anymore
+    """
+    from crudl.apps.ideas.models import Idea
+
+    ideas = list(get_ideas(pks))
+    missing = {str(pk) for pk in pks} - {str(idea.pk) for idea in ideas}
+    if ideas:
+        if apps.is_installed("django_elasticsearch_dsl"):
+            update_elasticsearch(ideas)
+        for using, backend, index in get_haystack_backends(Idea):
+            backend.update(index, ideas)
+    if missing:
+        remove_ideas(sorted(missing))
+
+
+def remove_ideas(pks):
+    from crudl.apps.ideas.models import Idea
+
+    if apps.is_installed("django_elasticsearch_dsl"):
+        remove_elasticsearch(pks)
+    for using, backend, index in get_haystack_backends(Idea):
+        remove_haystack(backend, pks)
+
+
+def update_elasticsearch(ideas):
+    from crudl.apps.ideas.documents import IdeaDocument
+
+    IdeaDocument().update(ideas)
+
+
+def remove_elasticsearch(pks):
+    from elasticsearch.helpers import bulk
+    from crudl.apps.ideas.documents import IdeaDocument
+
+    bulk(
+        IdeaDocument._get_connection(),
+        [{"_op_type": "delete", "_index": IdeaDocument._index._name, "_id": pk} for pk in pks],
+        raise_on_error=False,
+    )
+
+
+def remove_haystack(backend, pks):
+    from crudl.apps.ideas.models import Idea
+
+    for pk in pks:
+        backend.remove(f"{Idea._meta.label_lower}.{pk}")
+
+
+def get_haystack_backends(model):
+    """
+    Returns (connection alias, backend, index) tuples
+    of the haystack connections, which index the model
+    """
+    if not apps.is_installed("haystack"):
+        return []
+    from haystack import connection_router, connections
+    from haystack.exceptions import NotHandled
+
+    backends = []
+    for using in connection_router.for_write():
+        connection = connections[using]
+        try:
+            index = connection.get_unified_index().get_index(model)
+        except NotHandled:
+            continue
+        backends.append((using, connection.get_backend(), index))
+    return backends
@@ -0,0 +1,132 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Benchmarks the autocomplete prefix index in a temporary directory: "
+        "the rebuild from the generated sample ideas, the latency of the "
+        "searches and of the view for prefixes of the titles, the updates "
+        "on save and the searches with the updated entries in the delta. "
+        "The generated sample data is rolled back afterwards."
+    )
+    SILENT, NORMAL, VERBOSE, VERY_VERBOSE = 0, 1, 2, 3
+    TARGET_P99_MS = 5.0
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument("--ideas", type=int, default=10000)
+        parser.add_argument("--queries", type=int, default=2000)
+        parser.add_argument("--updates", type=int, default=200, help="Number of ideas saved one by one")
+        parser.add_argument("--language", help="Language of the searches")
+
+    def handle(self, *args, **options):
+        import tempfile
+        from django.conf import settings
+        from django.db import transaction
+        from ... import autocomplete
+
+        self.verbosity = options.get("verbosity", self.NORMAL)
+        self.idea_count = options["ideas"]
+        self.query_count = options["queries"]
+        self.update_count = options["updates"]
+        self.lang_code = options["language"] or settings.LANGUAGE_CODE
+        original_path = autocomplete.PATH
+        with tempfile.TemporaryDirectory() as path, transaction.atomic():
+            autocomplete.PATH = path
+            try:
+                self.prepare()
+                self.main()
+            finally:
+                autocomplete.PATH = original_path
+            transaction.set_rollback(True)
+        self.finalize()
+
+    def prepare(self):
+        import random
+        from crudl.apps.ideas.models import Idea
+        from ...benchmarks import create_sample_ideas
+
+        self.results = []
+        create_sample_ideas(self.idea_count)
+        ideas = list(Idea.objects.only("pk", "multilingual_title").order_by("pk"))
+        titles = [idea.multilingual_title.get_translation(self.lang_code) for idea in ideas]
+        generator = random.Random(0)
+        # prefixes of the titles and of their later words
+        self.queries = []
+        for index in range(self.query_count):
+            title = generator.choice(titles)
+            if index % 2:
+                title = title.split(" ", generator.randrange(1, 3))[-1]
+            self.queries.append(title[:generator.randrange(1, len(title) + 1)])
+        self.updated_pks = [idea.pk for idea in generator.sample(ideas, min(self.update_count, len(ideas)))]
+
+    def main(self):
+        import time
+        from crudl.apps.ideas.models import Idea
+        from ... import autocomplete
+
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(
+                f"=== Benchmarking {self.query_count} autocomplete searches in {self.idea_count} ideas ===\n"
+            )
+        start = time.perf_counter()
+        autocomplete.rebuild([self.lang_code])
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(f"Rebuilt in {time.perf_counter() - start:.2f} s\n")
+
+        index = autocomplete.get_autocomplete_index(self.lang_code)
+        self.measure("search", lambda query: index.search(query))
+        self.measure("view", self.get_view_function())
+
+        durations = []
+        for pk in self.updated_pks:
+            Idea.objects.filter(pk=pk).update(
+                multilingual_title={self.lang_code: f"Renamed benchmark idea {pk}"},
+            )
+            start = time.perf_counter()
+            autocomplete.update_objects(Idea, [pk], [self.lang_code])
+            durations.append((time.perf_counter() - start) * 1000)
+        if durations:
+            self.results.append(("update on save", durations))
+        self.measure("search with delta", lambda query: index.search(query))
+
+    def get_view_function(self):
+        from django.test import RequestFactory
+        from django.utils import translation
+        from ...views import autocomplete_titles
+
+        factory = RequestFactory()
+
+        def view(query):
+            with translation.override(self.lang_code):
+                return autocomplete_titles(factory.get("/search/autocomplete/", {"q": query}))
+        return view
+
+    def measure(self, name, function):
+        import time
+
+        function(self.queries[0])
+        durations = []
+        for query in self.queries:
+            start = time.perf_counter()
+            function(query)
+            durations.append((time.perf_counter() - start) * 1000)
+        self.results.append((name, durations))
+
+    def finalize(self):
+        import statistics
+
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(f"{'':<20}{'mean ms':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}\n")
+            for name, durations in self.results:
+                percentiles = statistics.quantiles(durations, n=100, method="inclusive")
+                self.stdout.write(
+                    f"{name:<20}{statistics.mean(durations):>10.3f}"
+                    f"{percentiles[49]:>10.3f}{percentiles[89]:>10.3f}{percentiles[98]:>10.3f}\n"
+                )
+            p99 = {
+                name: statistics.quantiles(durations, n=100, method="inclusive")[98]
+                for name, durations in self.results
+            }
+            if p99.get("search with delta", 0) > self.TARGET_P99_MS:
+                self.stdout.write(self.style.WARNING(f"The searches are over the p99 target of {self.TARGET_P99_MS} ms\n"))
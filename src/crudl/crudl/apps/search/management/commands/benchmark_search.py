@@ -0,0 +1,133 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Benchmarks the latency of searches in temporary multilingual Whoosh "
+        "indexes, which are updated in batches like by the search worker: "
+        "opening the index for every query, with the cached searchers and "
+        "with the cached searchers after merging the segments, "
+        "and in the embedded index updated in the same batches. "
+        "The generated sample data is rolled back afterwards."
+    )
+    SILENT, NORMAL, VERBOSE, VERY_VERBOSE = 0, 1, 2, 3
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument("--ideas", type=int, default=500)
+        parser.add_argument("--updates", type=int, default=20, help="Number of batches of the index updates")
+        parser.add_argument("--queries", type=int, default=500)
+        parser.add_argument("--language", help="Language of the searched index")
+        parser.add_argument(
+            "--engines", nargs="+", choices=["whoosh", "embedded"], default=["whoosh", "embedded"],
+        )
+
+    def handle(self, *args, **options):
+        from django.conf import settings
+        from django.db import transaction
+
+        self.verbosity = options.get("verbosity", self.NORMAL)
+        self.idea_count = options["ideas"]
+        self.update_count = options["updates"]
+        self.query_count = options["queries"]
+        self.lang_code = options["language"] or settings.LANGUAGE_CODE
+        self.engines = options["engines"]
+        with transaction.atomic():
+            self.prepare()
+            self.main()
+            transaction.set_rollback(True)
+        self.finalize()
+
+    def prepare(self):
+        from ...benchmarks import create_sample_ideas
+
+        self.results = []
+        create_sample_ideas(self.idea_count)
+        # specific and frequent terms alternately
+        self.queries = [
+            f"idea {index * 7919 % self.idea_count}" if index % 2 else "benchmark content"
+            for index in range(self.query_count)
+        ]
+
+    def main(self):
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(
+                f"=== Benchmarking {self.query_count} searches in {self.idea_count} ideas "
+                f"indexed in {self.update_count} updates ===\n"
+            )
+        if "whoosh" in self.engines:
+            self.benchmark_whoosh()
+        if "embedded" in self.engines:
+            self.benchmark_embedded()
+
+    def update_index(self):
+        from django.core.management import call_command
+
+        call_command(
+            "update_index", "ideas.idea", using=["default"],
+            batchsize=max(self.idea_count // self.update_count, 1), verbosity=0,
+        )
+
+    def benchmark_whoosh(self):
+        from haystack import connections
+        from ... import multilingual_whoosh_backend
+        from ...benchmarks import temporary_search_indexes
+
+        original_cache_searchers = multilingual_whoosh_backend.CACHE_SEARCHERS
+        with temporary_search_indexes("whoosh"):
+            try:
+                self.update_index()
+                using = f"default_{self.lang_code.replace('-', '_')}"
+
+                multilingual_whoosh_backend.CACHE_SEARCHERS = False
+                multilingual_whoosh_backend.clear_searchers()
+                self.measure("opened per query", using)
+                multilingual_whoosh_backend.CACHE_SEARCHERS = True
+                self.measure("cached searcher", using)
+                connections["default"].get_backend().merge_segments(None)
+                multilingual_whoosh_backend.clear_searchers()
+                self.measure("cached, merged", using)
+            finally:
+                multilingual_whoosh_backend.CACHE_SEARCHERS = original_cache_searchers
+
+    def benchmark_embedded(self):
+        from ...benchmarks import temporary_search_indexes
+
+        with temporary_search_indexes("embedded"):
+            self.update_index()
+            self.measure("embedded", "default")
+
+    def measure(self, name, using):
+        import time
+        from django.utils import translation
+        from haystack import connections
+
+        # the backends are set up again with the current settings
+        connections.thread_local.connections = {}
+        backend = connections[using].get_backend()
+        with translation.override(self.lang_code):
+            segments = backend.get_segment_count()
+            backend.search(self.queries[0])
+
+            durations = []
+            for query in self.queries:
+                start = time.perf_counter()
+                backend.search(query)
+                durations.append((time.perf_counter() - start) * 1000)
+        self.results.append((name, segments, durations))
+        if self.verbosity >= self.VERBOSE:
+            self.stdout.write(f"{name}: {sum(durations) / 1000:.2f} s\n")
+
+    def finalize(self):
+        import statistics
+
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(
+                f"{'':<20}{'segments':>10}{'mean ms':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}\n"
+            )
+            for name, segments, durations in self.results:
+                percentiles = statistics.quantiles(durations, n=100, method="inclusive")
+                self.stdout.write(
+                    f"{name:<20}{segments:>10}{statistics.mean(durations):>10.2f}"
+                    f"{percentiles[49]:>10.2f}{percentiles[89]:>10.2f}{percentiles[98]:>10.2f}\n"
+                )
@@ -0,0 +1,81 @@
+import os
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Benchmarks a full update_index of ideas into temporary multilingual "
+        "Whoosh indexes of all languages, writing the language indexes in "
+        "this process and with process pools of the given sizes. "
+        "The generated sample data is rolled back afterwards."
+    )
+    SILENT, NORMAL, VERBOSE, VERY_VERBOSE = 0, 1, 2, 3
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument("--ideas", type=int, default=2000)
+        parser.add_argument(
+            "--processes", type=int, nargs="+", default=[0, os.cpu_count()],
+            help="Pool sizes to compare; 0 or 1 writes the indexes one after another in this process",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        from django.db import transaction
+
+        self.verbosity = options.get("verbosity", self.NORMAL)
+        self.idea_count = options["ideas"]
+        self.process_counts = options["processes"]
+        self.batch_size = options["batch_size"]
+        with transaction.atomic():
+            self.prepare()
+            self.main()
+            transaction.set_rollback(True)
+        self.finalize()
+
+    def prepare(self):
+        from ...benchmarks import create_sample_ideas
+
+        self.results = []
+        create_sample_ideas(self.idea_count, callback=self.report_progress)
+
+    def report_progress(self, count):
+        if self.verbosity >= self.VERBOSE:
+            self.stdout.write(f"Created {count} ideas\n")
+
+    def main(self):
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(f"=== Benchmarking update_index of {self.idea_count} ideas ===\n")
+        for processes in self.process_counts:
+            self.results.append((processes,) + self.measure(processes))
+
+    def measure(self, processes):
+        import time
+        from django.core.management import call_command
+        from ... import multilingual_whoosh_backend
+        from ...benchmarks import temporary_search_indexes
+
+        original_processes = multilingual_whoosh_backend.PROCESSES
+        with temporary_search_indexes():
+            multilingual_whoosh_backend.PROCESSES = processes
+            try:
+                if processes > 1:
+                    # the workers are started before the measurement
+                    multilingual_whoosh_backend.get_pool()
+                start = time.perf_counter()
+                call_command(
+                    "update_index", "ideas.idea", using=["default"],
+                    batchsize=self.batch_size, verbosity=max(self.verbosity - 1, 0),
+                )
+                duration = time.perf_counter() - start
+            finally:
+                multilingual_whoosh_backend.PROCESSES = original_processes
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(f"{processes} processes: {duration:.2f} s\n")
+        return (duration, self.idea_count / duration)
+
+    def finalize(self):
+        if self.verbosity >= self.NORMAL:
+            self.stdout.write(f"{'processes':<12}{'seconds':>10}{'ideas/s':>10}\n")
+            for processes, duration, ideas_per_second in self.results:
+                self.stdout.write(f"{processes:<12}{duration:>10.2f}{ideas_per_second:>10.0f}\n")
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Merges the segments of the multilingual Whoosh indexes, which have "
+        "more than the given number of them, into one. Run it from cron or "
+        "with --loop, e.g. at night, so that the queries don't slow down "
+        "with the segments added by every index update."
+    )
+    SILENT, NORMAL, VERBOSE, VERY_VERBOSE = 0, 1, 2, 3
+
+    def add_arguments(self, parser):
+        from ... import multilingual_whoosh_backend
+
+        # Named (optional) arguments
+        parser.add_argument("--using", default="default", help="Haystack connection of the Whoosh indexes")
+        parser.add_argument(
+            "--max-segments", type=int, default=multilingual_whoosh_backend.MAX_SEGMENTS,
+            help="Merge only the indexes with more segments",
+        )
+        parser.add_argument("--all", action="store_true", help="Merge all indexes regardless of their segments")
+        parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for the index writers")
+        parser.add_argument("--loop", action="store_true", help="Keep merging in intervals")
+        parser.add_argument("--interval", type=float, default=3600.0, help="Seconds between the merges with --loop")
+
+    def handle(self, *args, **options):
+        import time
+        from haystack import connections
+        from ...multilingual_whoosh_backend import MultilingualWhooshSearchBackend
+
+        self.verbosity = options.get("verbosity", self.NORMAL)
+        backend = connections[options["using"]].get_backend()
+        if not isinstance(backend, MultilingualWhooshSearchBackend):
+            raise CommandError(f"The connection \"{options['using']}\" doesn't use the multilingual Whoosh backend.")
+        max_segments = None if options["all"] else options["max_segments"]
+        while True:
+            start = time.perf_counter()
+            segment_counts = backend.merge_segments(max_segments, timeout=options["timeout"])
+            duration = time.perf_counter() - start
+            if self.verbosity >= self.NORMAL:
+                merged = 0
+                for using, (before, after) in segment_counts.items():
+                    if before != after:
+                        merged += 1
+                    if before != after or self.verbosity >= self.VERBOSE:
+                        self.stdout.write(f"{using}: {before} -> {after} segments\n")
+                self.stdout.write(f"Merged {merged} indexes in {duration:.2f} s\n")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Updates the search indexes from the queue of changed objects. "
+        "Repeated changes of the same object are indexed once and the "
+        "ideas of changed categories are updated in chunks."
+    )
+    SILENT, NORMAL, VERBOSE, VERY_VERBOSE = 0, 1, 2, 3
+
+    def add_arguments(self, parser):
+        from ... import index_queue
+
+        # Named (optional) arguments
+        parser.add_argument("--batch-size", type=int, default=index_queue.BATCH_SIZE)
+        parser.add_argument("--chunk-size", type=int, default=index_queue.CHUNK_SIZE)
+        parser.add_argument("--loop", action="store_true", help="Keep waiting for new updates")
+        parser.add_argument("--sleep", type=float, default=1.0, help="Seconds to wait, when the queue is empty")
+        parser.add_argument("--stats", action="store_true", help="Show the queue depth and lag and exit")
+
+    def handle(self, *args, **options):
+        import time
+        from ... import index_queue
+
+        self.verbosity = options.get("verbosity", self.NORMAL)
+        if options["stats"]:
+            self.print_stats()
+            return
+        while True:
+            processed = index_queue.process_batch(
+                batch_size=options["batch_size"], chunk_size=options["chunk_size"]
+            )
+            if processed and self.verbosity >= self.NORMAL:
+                self.stdout.write(f"Processed {processed} updates\n")
+                if self.verbosity >= self.VERBOSE:
+                    self.print_stats()
+            if not processed:
+                if not options["loop"]:
+                    break
+                time.sleep(options["sleep"])
+
+    def print_stats(self):
+        from ... import index_queue
+
+        stats = index_queue.get_stats()
+        self.stdout.write(f"Queue depth : {stats['depth']}\n")
+        self.stdout.write(f"Lag         : {stats['lag']:.1f} s\n")
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Rebuilds the memory-mapped autocomplete indexes of the idea, "
+        "category and song titles in SEARCH_AUTOCOMPLETE_PATH for all "
+        "or the given languages. The changes are added on save afterwards."
+    )
+    SILENT, NORMAL, VERBOSE, VERY_VERBOSE = 0, 1, 2, 3
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument("--language", action="append", dest="languages", help="Language to rebuild")
+
+    def handle(self, *args, **options):
+        import time
+        from ... import autocomplete
+
+        self.verbosity = options.get("verbosity", self.NORMAL)
+        if not autocomplete.PATH:
+            raise CommandError("SEARCH_AUTOCOMPLETE_PATH isn't set.")
+        start = time.perf_counter()
+        counts = autocomplete.rebuild(options["languages"])
+        if self.verbosity >= self.NORMAL:
+            if self.verbosity >= self.VERBOSE:
+                for lang_code, count in counts.items():
+                    self.stdout.write(f"{lang_code}: {count} titles\n")
+            self.stdout.write(
+                f"Rebuilt {len(counts)} languages in {time.perf_counter() - start:.2f} s\n"
+            )
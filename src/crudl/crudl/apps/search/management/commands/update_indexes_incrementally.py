@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Updates the Elasticsearch and haystack indexes of ideas with the ideas "
+        "modified since the last run of each index and removes the deleted ones. "
+        "Indexes, which weren't updated by this command yet, get all ideas."
+    )
+    SILENT, NORMAL, VERBOSE, VERY_VERBOSE = 0, 1, 2, 3
+
+    def add_arguments(self, parser):
+        from ... import incremental
+
+        # Named (optional) arguments
+        parser.add_argument(
+            "--index", action="append", dest="indexes",
+            help="Update only this index, e.g. elasticsearch:ideas or haystack:default",
+        )
+        parser.add_argument("--full", action="store_true", help="Update all ideas regardless of the watermarks")
+        parser.add_argument("--chunk-size", type=int, default=incremental.CHUNK_SIZE)
+        parser.add_argument(
+            "--margin", type=float, default=incremental.SAFETY_MARGIN.total_seconds(),
+            help="Seconds before the watermark, from which the modifications are reindexed again",
+        )
+        parser.add_argument("--list", action="store_true", help="Show the indexes and their watermarks and exit")
+
+    def handle(self, *args, **options):
+        import datetime
+        import time
+        from ... import incremental
+
+        self.verbosity = options.get("verbosity", self.NORMAL)
+        if options["list"]:
+            self.print_watermarks()
+            return
+        start = time.perf_counter()
+        counts = incremental.update_indexes(
+            names=options["indexes"],
+            full=options["full"],
+            chunk_size=options["chunk_size"],
+            margin=datetime.timedelta(seconds=options["margin"]),
+        )
+        duration = time.perf_counter() - start
+        if self.verbosity >= self.NORMAL:
+            for name, (updated, removed) in counts.items():
+                self.stdout.write(f"{name}: {updated} updated, {removed} removed\n")
+            self.stdout.write(f"Finished in {duration:.2f} s\n")
+
+    def print_watermarks(self):
+        from ... import incremental
+        from ...models import IndexWatermark
+
+        watermarks = dict(IndexWatermark.objects.values_list("name", "modified"))
+        for target in incremental.get_targets():
+            self.stdout.write(f"{target.name:<30}{watermarks.get(target.name) or '-'}\n")
@@ -0,0 +1,33 @@
+# Generated by Django 4.0.5 on 2026-10-18 08:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, verbose_name='Model')),
+                ('object_id', models.CharField(max_length=255, verbose_name='Object ID')),
+                ('action', models.CharField(choices=[('update', 'Update'), ('delete', 'Delete')], default='update', max_length=10, verbose_name='Action')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Created')),
+            ],
+            options={
+                'verbose_name': 'Index update',
+                'verbose_name_plural': 'Index updates',
+                'ordering': ['pk'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='indexupdate',
+            index=models.Index(fields=['model', 'object_id'], name='index_update_object'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.0.5 on 2026-10-18 09:27
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Index')),
+                ('modified', models.DateTimeField(blank=True, null=True, verbose_name='Indexed up to')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Updated')),
+            ],
+            options={
+                'verbose_name': 'Index watermark',
+                'verbose_name_plural': 'Index watermarks',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, verbose_name='Model')),
+                ('object_id', models.CharField(max_length=255, verbose_name='Object ID')),
+                ('deleted', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Deleted')),
+            ],
+            options={
+                'verbose_name': 'Tombstone',
+                'verbose_name_plural': 'Tombstones',
+                'ordering': ['deleted'],
+            },
+        ),
+    ]
@@ -1,3 +1,70 @@
 from django.db import models
+from django.utils.timezone import now as timezone_now
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+
+class IndexUpdate(models.Model):
+    """
+    A model instance, which has to be updated in or deleted from the search
+    indexes. The rows are added, when the transactions are committed,
+    and removed by the process_index_updates management command.
+    """
+    UPDATE = "update"
+    DELETE = "delete"
+    ACTION_CHOICES = (
+        (UPDATE, _("Update")),
+        (DELETE, _("Delete")),
+    )
+
+    model = models.CharField(_("Model"), max_length=100)
+    object_id = models.CharField(_("Object ID"), max_length=255)
+    action = models.CharField(_("Action"), max_length=10, choices=ACTION_CHOICES, default=UPDATE)
+    created = models.DateTimeField(_("Created"), auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = _("Index update")
+        verbose_name_plural = _("Index updates")
+        ordering = ["pk"]
+        indexes = [
+            models.Index(fields=["model", "object_id"], name="index_update_object"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.model} {self.object_id}"
+
+
+class IndexWatermark(models.Model):
+    """
+    The modification time up to which the objects are in a search index.
+    The update_indexes_incrementally management command reindexes
+    only the objects modified after it.
+    """
+    name = models.CharField(_("Index"), max_length=100, unique=True)
+    modified = models.DateTimeField(_("Indexed up to"), blank=True, null=True)
+    updated = models.DateTimeField(_("Updated"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Index watermark")
+        verbose_name_plural = _("Index watermarks")
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
+class Tombstone(models.Model):
+    """
+    A deleted model instance, which the incremental index updates
+    remove from the search indexes
+    """
+    model = models.CharField(_("Model"), max_length=100)
+    object_id = models.CharField(_("Object ID"), max_length=255)
+    deleted = models.DateTimeField(_("Deleted"), default=timezone_now, db_index=True)
+
+    class Meta:
+        verbose_name = _("Tombstone")
+        verbose_name_plural = _("Tombstones")
+        ordering = ["deleted"]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id}"
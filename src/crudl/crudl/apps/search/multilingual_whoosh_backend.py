@@ -1,3 +1,6 @@
+import atexit
+import threading
+import time
 from django.conf import settings
 from django.utils import translation
 from haystack.backends.whoosh_backend import (
@@ -7,23 +10,265 @@ from haystack.backends.whoosh_backend import (
 )
 from haystack import connections
 from haystack.constants import DEFAULT_ALIAS
+from haystack.exceptions import SkipDocument
+from whoosh.writing import AsyncWriter
+
+# 0 or 1 writes the language indexes one after another in this process,
+# more start a pool of worker processes writing them in parallel
+PROCESSES = getattr(settings, "HAYSTACK_WHOOSH_PROCESSES", 0)
+# searchers are kept open and checked for a new index generation
+# at most once in this number of seconds
+CACHE_SEARCHERS = getattr(settings, "HAYSTACK_WHOOSH_CACHE_SEARCHERS", True)
+SEARCHER_CHECK_INTERVAL = getattr(settings, "HAYSTACK_WHOOSH_SEARCHER_CHECK_INTERVAL", 1.0)
+# the indexes with more segments are optimized by "manage.py merge_whoosh_segments"
+MAX_SEGMENTS = getattr(settings, "HAYSTACK_WHOOSH_MAX_SEGMENTS", 10)
+
+_pool = None
+_worker_backends = {}
+_searchers = threading.local()
+
+
+def init_worker():
+    import django
+
+    # processes started with "spawn" don't inherit the loaded apps
+    django.setup()
+
+
+def get_pool():
+    """
+    Returns the process pool for writing the language indexes, which
+    is created once and reused by all updates of this process
+    """
+    global _pool
+    if _pool is None:
+        import multiprocessing
+
+        # the workers only write the indexes, so they don't need
+        # the database connections or other state of this process
+        context = multiprocessing.get_context("spawn")
+        _pool = context.Pool(min(PROCESSES, len(settings.LANGUAGES)), initializer=init_worker)
+        atexit.register(close_pool)
+    return _pool
+
+
+def close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool.join()
+        _pool = None
+
+
+def write_language_documents(using, connection_options, documents, commit=True):
+    """
+    Writes the prepared documents to the index of one language.
+    Runs in the worker processes, which keep their backends
+    by the connection options of the parent process.
+    """
+    key = (using, connection_options.get("PATH"))
+    backend = _worker_backends.get(key)
+    if backend is None:
+        # the schema is built from the unified index of the connection
+        connections.connections_info.setdefault(using, connection_options)
+        backend = _worker_backends[key] = MultilingualWhooshSearchBackend(using, **connection_options)
+    backend.write_documents(documents, commit)
+    return len(documents)
+
+
+def get_searcher(index):
+    """
+    Returns the open searcher of the index, which is created once per
+    thread and refreshed, when the generation of the index changes.
+    Refreshing reuses the readers of the unchanged segments, but closes
+    the replaced ones, so the searchers aren't shared between threads.
+    """
+    cache = getattr(_searchers, "cache", None)
+    if cache is None:
+        cache = _searchers.cache = {}
+    key = (getattr(index.storage, "folder", id(index.storage)), index.indexname)
+    searcher, version, checked = cache.get(key, (None, None, 0))
+    now = time.monotonic()
+    if searcher is not None and now - checked < SEARCHER_CHECK_INTERVAL:
+        return searcher
+
+    # the modification time tells apart the indexes rebuilt from scratch
+    generation = index.latest_generation()
+    latest_version = (generation, index.last_modified() if generation >= 0 else None)
+    if searcher is None:
+        searcher = index.searcher()
+    elif latest_version != version:
+        if searcher.reader().generation() == generation:
+            searcher.close()
+            searcher = index.searcher()
+        else:
+            searcher = searcher.refresh()
+    cache[key] = (searcher, latest_version, now)
+    return searcher
+
+
+def clear_searchers():
+    """
+    Closes the searchers of this thread
+    """
+    cache = getattr(_searchers, "cache", None) or {}
+    for searcher, version, checked in cache.values():
+        searcher.close()
+    cache.clear()
+
+
+class KeptOpenSearcher(object):
+    """
+    Cached searcher, which haystack can close after the search
+    without closing it for the following searches
+    """
+    def __init__(self, searcher):
+        self._searcher = searcher
+
+    def __getattr__(self, name):
+        return getattr(self._searcher, name)
+
+    def close(self):
+        pass
+
+
+class SearcherCachingIndex(object):
+    """
+    Whoosh index, which searches with the cached searchers of get_searcher()
+    instead of opening the segments of the index for every query
+    """
+    def __init__(self, index):
+        self._index = index
+
+    def __getattr__(self, name):
+        return getattr(self._index, name)
+
+    def refresh(self):
+        # the generation is checked by get_searcher()
+        return self
+
+    def doc_count(self):
+        return get_searcher(self._index).doc_count()
+
+    def searcher(self, **kwargs):
+        if kwargs:
+            return self._index.searcher(**kwargs)
+        return KeptOpenSearcher(get_searcher(self._index))
 
 
 class MultilingualWhooshSearchBackend(WhooshSearchBackend):
+    """
+    Whoosh backend, which keeps one index per language in the
+    "default_<lang_code>" connections. Updates of the "default"
+    connection are prepared for all languages in this process
+    and written to the language indexes in parallel.
+    """
+    def setup(self):
+        super().setup()
+        if CACHE_SEARCHERS:
+            self.index = SearcherCachingIndex(self.index)
+
+    def get_language_aliases(self):
+        return [
+            f"default_{lang_code.replace('-', '_')}"
+            for lang_code, lang_name in settings.LANGUAGES
+        ]
+
     def update(self, index, iterable, commit=True, language_specific=False):
-        if not language_specific and self.connection_alias == "default":
-            current_language = (translation.get_language() or settings.LANGUAGE_CODE)[:2]
-            for lang_code, lang_name in settings.LANGUAGES:
-                lang_code_underscored = lang_code.replace("-", "_")
-                using = f"default_{lang_code_underscored}"
-                translation.activate(lang_code)
-                backend = connections[using].load_backend()
-                print(backend)
-                backend.update(index, iterable, commit, language_specific=True)
-            translation.activate(current_language)
+        if not language_specific and self.connection_alias == DEFAULT_ALIAS:
+            documents_by_alias = self.prepare_documents(index, iterable)
+            tasks = [
+                (using, connections[using].options, documents, commit)
+                for using, documents in documents_by_alias.items()
+                if documents
+            ]
+            if PROCESSES > 1 and len(tasks) > 1:
+                get_pool().starmap(write_language_documents, tasks)
+            else:
+                for task in tasks:
+                    write_language_documents(*task)
         elif language_specific:
             super().update(index, iterable, commit)
 
+    def prepare_documents(self, index, iterable):
+        """
+        Returns a dict of connection aliases and the documents of the
+        objects in the language of the connection as plain dictionaries.
+        The iterable is evaluated once for all languages.
+        """
+        objects = list(iterable)
+        documents_by_alias = {}
+        for (lang_code, lang_name), using in zip(settings.LANGUAGES, self.get_language_aliases()):
+            documents = documents_by_alias[using] = []
+            with translation.override(lang_code):
+                for obj in objects:
+                    try:
+                        document = index.full_prepare(obj)
+                    except SkipDocument:
+                        self.log.debug("Indexing for object `%s` skipped", obj)
+                        continue
+                    # Whoosh accepts only strings and document boosts aren't supported
+                    document.pop("boost", None)
+                    documents.append({key: self._from_python(value) for key, value in document.items()})
+        return documents_by_alias
+
+    def write_documents(self, documents, commit=True):
+        if not self.setup_complete:
+            self.setup()
+
+        self.index = self.index.refresh()
+        writer = AsyncWriter(self.index)
+        for document in documents:
+            try:
+                writer.update_document(**document)
+            except Exception:
+                if not self.silently_fail:
+                    raise
+                self.log.error(
+                    "Failed to add document '%s' to Whoosh", document.get("id"), exc_info=True
+                )
+        if documents:
+            writer.commit()
+            if writer.ident is not None:
+                writer.join()
+
+    def remove(self, obj_or_string, commit=True):
+        if self.connection_alias == DEFAULT_ALIAS:
+            for using in self.get_language_aliases():
+                connections[using].get_backend().remove(obj_or_string, commit)
+        else:
+            super().remove(obj_or_string, commit)
+
+    def clear(self, models=None, commit=True):
+        if self.connection_alias == DEFAULT_ALIAS:
+            for using in self.get_language_aliases():
+                connections[using].get_backend().clear(models, commit)
+        else:
+            super().clear(models, commit)
+
+    def get_segment_count(self):
+        if not self.setup_complete:
+            self.setup()
+        return len(self.index._segments())
+
+    def merge_segments(self, max_segments=MAX_SEGMENTS, timeout=60.0):
+        """
+        Merges the segments of the language indexes, which have more than
+        max_segments of them, or of all indexes with max_segments=None,
+        into one. Returns a dict of connection aliases and the numbers
+        of segments before and after merging.
+        """
+        if self.connection_alias == DEFAULT_ALIAS:
+            return {
+                using: connections[using].get_backend().merge_segments(max_segments, timeout)[using]
+                for using in self.get_language_aliases()
+            }
+        before = self.get_segment_count()
+        if max_segments is None or before > max_segments:
+            # waits for the writers of the index updates instead of failing
+            self.index.optimize(timeout=timeout, delay=0.25)
+        return {self.connection_alias: (before, self.get_segment_count())}
+
 
 class MultilingualWhooshSearchQuery(WhooshSearchQuery):
     def __init__(self, using=DEFAULT_ALIAS):
@@ -34,4 +279,4 @@ class MultilingualWhooshSearchQuery(WhooshSearchQuery):
 
 class MultilingualWhooshEngine(WhooshEngine):
     backend = MultilingualWhooshSearchBackend
-    query = MultilingualWhooshSearchQuery
\ No newline at end of file
+    query = MultilingualWhooshSearchQuery
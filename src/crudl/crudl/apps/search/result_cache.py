@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import weakref
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from crudl.apps.core import generations
+
+CACHE_ALIAS = getattr(settings, "SEARCH_RESULT_CACHE_ALIAS", "default")
+CACHE_TIMEOUT = getattr(settings, "SEARCH_RESULT_CACHE_TIMEOUT", 60)
+LOCK_TIMEOUT = getattr(settings, "SEARCH_RESULT_CACHE_LOCK_TIMEOUT", 10)
+POLL_INTERVAL = 0.05
+GENERATION_KEY = "search-results:generation"
+
+MISSING = object()
+
+
+def normalize_query(query):
+    """
+    Returns the query in lowercase with single spaces, as the
+    search analyzers don't distinguish the other variants
+    """
+    return " ".join(str(query).split()).casefold()
+
+
+def get_generation():
+    return generations.get_generation(GENERATION_KEY, CACHE_ALIAS)
+
+
+async def aget_generation():
+    return await generations.aget_generation(GENERATION_KEY, CACHE_ALIAS)
+
+
+def bump_generation():
+    """
+    Makes all cached search results obsolete,
+    e.g. after the search indexes were updated
+    """
+    generations.bump_generation(GENERATION_KEY, CACHE_ALIAS)
+
+
+def get_cache_key(namespace, generation, *parts):
+    """
+    Returns the cache key for the results of the search described by
+    the JSON-serializable parts, e.g. the language, normalized query and
+    page cursor, in the given generation of the indexes
+    """
+    data = json.dumps(parts, cls=DjangoJSONEncoder, sort_keys=True, separators=(",", ":"))
+    return f"search-results:{namespace}:{generation}:{hashlib.md5(data.encode('utf-8')).hexdigest()}"
+
+
+class Flight(object):
+    """
+    A computation of a missing cache value, which the other threads
+    of the process asking for the same key wait for
+    """
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = MISSING
+        self.error = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+_async_flights = weakref.WeakKeyDictionary()
+
+
+def get_or_set(key, compute, timeout=CACHE_TIMEOUT):
+    """
+    Returns the cached value or the result of compute(), which is cached.
+    Concurrent misses of the same key are coalesced: one thread per process
+    and one process per cache computes the value, the others wait for it.
+    """
+    cache = caches[CACHE_ALIAS]
+    value = cache.get(key, MISSING)
+    if value is not MISSING:
+        return value
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        is_leader = flight is None
+        if is_leader:
+            flight = _flights[key] = Flight()
+    if not is_leader:
+        if not flight.event.wait(LOCK_TIMEOUT):
+            return compute()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    try:
+        flight.value = compute_once(key, compute, timeout)
+        return flight.value
+    except Exception as error:
+        flight.error = error
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.event.set()
+
+
+def compute_once(key, compute, timeout):
+    """
+    Computes and caches the value, while holding a lock in the cache,
+    or waits for the process holding the lock to cache the value
+    """
+    cache = caches[CACHE_ALIAS]
+    lock_key = f"{key}:lock"
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        time.sleep(POLL_INTERVAL)
+        value = cache.get(key, MISSING)
+        if value is not MISSING:
+            return value
+        if time.monotonic() > deadline:
+            return compute()
+    try:
+        value = compute()
+        cache.set(key, value, timeout=timeout)
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+async def aget_or_set(key, compute, timeout=CACHE_TIMEOUT):
+    """
+    Asynchronous get_or_set() for a coroutine function compute.
+    The misses are coalesced per event loop and per cache.
+    """
+    cache = caches[CACHE_ALIAS]
+    value = await cache.aget(key, MISSING)
+    if value is not MISSING:
+        return value
+
+    loop = asyncio.get_running_loop()
+    flights = _async_flights.setdefault(loop, {})
+    future = flights.get(key)
+    if future is not None:
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), LOCK_TIMEOUT)
+        except asyncio.TimeoutError:
+            return await compute()
+
+    future = flights[key] = loop.create_future()
+    try:
+        value = await acompute_once(key, compute, timeout)
+        future.set_result(value)
+        return value
+    except Exception as error:
+        future.set_exception(error)
+        # the waiting requests get the error; nobody else has to retrieve it
+        future.exception()
+        raise
+    finally:
+        flights.pop(key, None)
+        if not future.done():
+            future.cancel()
+
+
+async def acompute_once(key, compute, timeout):
+    cache = caches[CACHE_ALIAS]
+    lock_key = f"{key}:lock"
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while not await cache.aadd(lock_key, 1, timeout=LOCK_TIMEOUT):
+        await asyncio.sleep(POLL_INTERVAL)
+        value = await cache.aget(key, MISSING)
+        if value is not MISSING:
+            return value
+        if time.monotonic() > deadline:
+            return await compute()
+    try:
+        value = await compute()
+        await cache.aset(key, value, timeout=timeout)
+    finally:
+        await cache.adelete(lock_key)
+    return value
@@ -12,16 +12,19 @@ class IdeaIndex(indexes.SearchIndex, indexes.Indexable):
         """
         Used when the entire index for model is updated.
         """
-        return self.get_model().objects.all()
+        return self.get_model().objects.prefetch_related("categories")
     
     def prepare_text(self, idea):
         """
-        Called for each language / backend
+        Called for each language / backend. The multilingual fields
+        contain all languages, so no translations are queried.
         """
         fields = [
-            idea.translated_title, idea.translated_content
+            idea.multilingual_title.get_translation(),
+            idea.multilingual_content.get_translation(),
         ]
         fields += [
-            category.translated_title for category in idea.categories.all()
+            category.multilingual_title.get_translation()
+            for category in idea.categories.all()
         ]
         return "\n".join(fields)
\ No newline at end of file
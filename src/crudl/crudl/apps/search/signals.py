@@ -0,0 +1,69 @@
+from django.apps import apps
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from crudl.apps.category.models import Category, CategoryTranslations
+from crudl.apps.ideas.affected import get_affected_idea_pks
+from crudl.apps.ideas.models import Idea, IdeaTranslations
+from . import autocomplete, incremental, index_queue
+from .models import IndexUpdate
+
+
+@receiver(post_save, sender=Idea)
+def idea_saved_handler(sender, instance, **kwargs):
+    index_queue.enqueue(Idea, [instance.pk])
+
+
+@receiver(post_delete, sender=Idea)
+def idea_deleted_handler(sender, instance, **kwargs):
+    index_queue.enqueue(Idea, [instance.pk], action=IndexUpdate.DELETE)
+    incremental.record_deletion(Idea, [instance.pk])
+
+
+@receiver(post_save, sender=IdeaTranslations)
+@receiver(post_delete, sender=IdeaTranslations)
+@receiver(m2m_changed, sender=Idea.categories.through)
+@receiver(pre_delete, sender=Category)
+def ideas_changed_handler(sender, instance, **kwargs):
+    idea_pks = get_affected_idea_pks(sender, instance, **kwargs)
+    index_queue.enqueue(Idea, idea_pks)
+    incremental.mark_ideas_dirty(Idea.objects.filter(pk__in=idea_pks))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=CategoryTranslations)
+@receiver(post_delete, sender=CategoryTranslations)
+def category_changed_handler(sender, instance, **kwargs):
+    # the index queue worker finds the ideas of the category itself,
+    # the incremental updates find them marked as changed
+    category_pk = instance.pk if sender is Category else instance.category_id
+    index_queue.enqueue(Category, [category_pk])
+    incremental.mark_ideas_dirty(Idea.objects.filter(pk__in=get_affected_idea_pks(sender, instance, **kwargs)))
+
+
+@receiver(post_save, sender=Idea)
+@receiver(post_delete, sender=Idea)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def autocomplete_object_changed_handler(sender, instance, **kwargs):
+    autocomplete.schedule_update(sender, [instance.pk])
+
+
+@receiver(post_save, sender=IdeaTranslations)
+@receiver(post_delete, sender=IdeaTranslations)
+def autocomplete_idea_translations_changed_handler(sender, instance, **kwargs):
+    autocomplete.schedule_update(Idea, [instance.idea_id])
+
+
+@receiver(post_save, sender=CategoryTranslations)
+@receiver(post_delete, sender=CategoryTranslations)
+def autocomplete_category_translations_changed_handler(sender, instance, **kwargs):
+    autocomplete.schedule_update(Category, [instance.category_id])
+
+
+if apps.is_installed("crudl.apps.music"):
+    from crudl.apps.music.models import Song
+
+    @receiver(post_save, sender=Song)
+    @receiver(post_delete, sender=Song)
+    def autocomplete_song_changed_handler(sender, instance, **kwargs):
+        autocomplete.schedule_update(Song, [instance.pk])
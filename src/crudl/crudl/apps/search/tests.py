@@ -1,3 +1,429 @@
-from django.test import TestCase
+import asyncio
+import collections
+import datetime
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils.timezone import now as timezone_now
+from crudl.apps.category.models import Category
+from crudl.apps.ideas.models import Idea, IdeaTranslations
+from . import autocomplete, incremental, index_queue, result_cache
+from .models import IndexUpdate, IndexWatermark, Tombstone
 
-# Create your tests here.
+
+class IndexQueueTest(TestCase):
+    def create_idea(self, title):
+        return Idea.objects.create(title=title, content=title, picture="ideas/2022/06/idea.jpg")
+
+    def test_changes_are_recorded_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            idea = self.create_idea("Idea")
+        self.assertFalse(IndexUpdate.objects.exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(
+            list(IndexUpdate.objects.values_list("model", "object_id", "action")),
+            [("ideas.idea", str(idea.pk), IndexUpdate.UPDATE)],
+        )
+
+    @mock.patch.object(index_queue, "remove_ideas")
+    @mock.patch.object(index_queue, "update_ideas")
+    def test_batch_is_coalesced(self, update_ideas, remove_ideas):
+        with self.captureOnCommitCallbacks(execute=True):
+            kept = self.create_idea("Kept")
+            deleted = self.create_idea("Deleted")
+            deleted_pk = deleted.pk
+            kept.title = "Kept again"
+            kept.save()
+            Idea.objects.filter(pk=deleted_pk).delete()
+        self.assertEqual(index_queue.get_stats()["depth"], 4)
+
+        self.assertEqual(index_queue.process_batch(), 4)
+        update_ideas.assert_called_once_with([str(kept.pk)])
+        remove_ideas.assert_called_once_with([str(deleted_pk)])
+        self.assertEqual(index_queue.get_stats(), {"depth": 0, "lag": 0})
+
+    @mock.patch.object(index_queue, "update_ideas")
+    def test_category_changes_update_its_ideas_in_chunks(self, update_ideas):
+        category = Category.add_root(title="Architecture")
+        ideas = [self.create_idea(f"Idea {index}") for index in range(5)]
+        for idea in ideas:
+            idea.categories.add(category)
+        IndexUpdate.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category.title = "Modern architecture"
+            category.save()
+        index_queue.process_batch(chunk_size=2)
+        self.assertEqual(
+            [len(call.args[0]) for call in update_ideas.call_args_list], [2, 2, 1]
+        )
+        self.assertFalse(IndexUpdate.objects.exists())
+
+
+class IncrementalUpdateTest(TestCase):
+    def setUp(self):
+        self.updated, self.removed = [], []
+        target = incremental.IndexTarget(
+            "test", lambda ideas: self.updated.extend(idea.title for idea in ideas), self.removed.extend,
+        )
+        patcher = mock.patch.object(incremental, "get_targets", return_value=[target])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_idea(self, title):
+        return Idea.objects.create(title=title, content=title, picture="ideas/2022/06/idea.jpg")
+
+    def test_only_changes_since_watermark_are_indexed(self):
+        old = self.create_idea("Old")
+        self.assertEqual(incremental.update_indexes(), {"test": (1, 0)})
+        Idea.objects.filter(pk=old.pk).update(modified=timezone_now() - datetime.timedelta(days=1))
+        IndexWatermark.objects.update(modified=timezone_now() - datetime.timedelta(hours=1))
+
+        self.create_idea("Changed")
+        deleted_pk = self.create_idea("Deleted").pk
+        Idea.objects.filter(pk=deleted_pk).delete()
+        self.updated.clear()
+        self.assertEqual(incremental.update_indexes(margin=datetime.timedelta(0)), {"test": (1, 1)})
+        self.assertEqual(self.updated, ["Changed"])
+        self.assertEqual(self.removed, [str(deleted_pk)])
+
+    def test_category_changes_mark_its_ideas_without_modifying_them(self):
+        category = Category.add_root(title="Architecture")
+        idea = self.create_idea("Idea")
+        idea.categories.add(category)
+        modified = timezone_now() - datetime.timedelta(days=1)
+        Idea.objects.filter(pk=idea.pk).update(modified=modified, search_dirty_at=None)
+        self.assertEqual(incremental.update_indexes(), {"test": (1, 0)})
+        IndexWatermark.objects.update(modified=timezone_now() - datetime.timedelta(hours=1))
+        category.title = "Modern architecture"
+        category.save()
+        idea.refresh_from_db()
+        self.assertEqual(idea.modified, modified)
+        self.assertGreater(idea.search_dirty_at, timezone_now() - datetime.timedelta(minutes=1))
+        self.updated.clear()
+        self.assertEqual(incremental.update_indexes(margin=datetime.timedelta(0)), {"test": (1, 0)})
+        self.assertEqual(self.updated, ["Idea"])
+
+    def test_cleared_ideas_of_a_category_are_queued_and_marked(self):
+        category = Category.add_root(title="Architecture")
+        ideas = [self.create_idea(f"Idea {index}") for index in range(2)]
+        category.category_ideas.add(*ideas)
+        Idea.objects.update(search_dirty_at=None)
+        IndexUpdate.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            category.category_ideas.clear()
+        self.assertEqual(
+            sorted(IndexUpdate.objects.values_list("object_id", flat=True)),
+            sorted(str(idea.pk) for idea in ideas),
+        )
+        self.assertFalse(Idea.objects.filter(search_dirty_at=None).exists())
+
+    def test_processed_tombstones_are_pruned(self):
+        object_id = str(uuid.uuid4())
+        Tombstone.objects.create(model="ideas.idea", object_id=object_id, deleted=timezone_now() - datetime.timedelta(days=1))
+        incremental.update_indexes()
+        self.assertEqual(self.removed, [object_id])
+        self.assertFalse(Tombstone.objects.exists())
+
+
+class ResultCacheTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cache_key_depends_on_normalized_query_and_generation(self):
+        generation = result_cache.get_generation()
+        key = result_cache.get_cache_key("ideas", generation, "en", result_cache.normalize_query(" Green  Roof"))
+        self.assertEqual(key, result_cache.get_cache_key("ideas", generation, "en", "green roof"))
+        self.assertNotEqual(key, result_cache.get_cache_key("ideas", generation, "de", "green roof"))
+        result_cache.bump_generation()
+        self.assertNotEqual(
+            key, result_cache.get_cache_key("ideas", result_cache.get_generation(), "en", "green roof")
+        )
+
+    def test_concurrent_misses_are_computed_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return ["result"]
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(result_cache.get_or_set("key", compute)))
+            for index in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [["result"]] * 5)
+        self.assertEqual(len(calls), 1)
+
+    def test_concurrent_async_misses_are_computed_once(self):
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "result"
+
+        async def search():
+            return await asyncio.gather(*[
+                result_cache.aget_or_set("async-key", compute) for index in range(5)
+            ])
+
+        self.assertEqual(async_to_sync(search)(), ["result"] * 5)
+        self.assertEqual(len(calls), 1)
+
+
+class MultilingualWhooshBackendTest(TestCase):
+    def test_documents_are_prepared_for_all_languages_at_once(self):
+        from .multilingual_whoosh_backend import MultilingualWhooshSearchBackend
+        from .search_indexes import IdeaIndex
+
+        category = Category.add_root(title="Architecture")
+        for index in range(3):
+            idea = Idea.objects.create(title=f"Idea {index}", content="Content", picture="ideas/2022/06/idea.jpg")
+            idea.categories.add(category)
+            IdeaTranslations.objects.create(idea=idea, language="de", title=f"Idee {index}", content="Inhalt")
+            idea.sync_multilingual_fields()
+
+        index = IdeaIndex()
+        backend = MultilingualWhooshSearchBackend("default", PATH="/tmp/unused")
+        with self.assertNumQueries(2):
+            documents_by_alias = backend.prepare_documents(index, index.index_queryset().order_by("title"))
+        self.assertEqual(len(documents_by_alias), 24)
+        self.assertEqual(documents_by_alias["default_de"][0]["text"], "Idee 0\nInhalt\nArchitecture")
+        self.assertEqual(documents_by_alias["default_fr"][0]["text"], "Idea 0\nContent\nArchitecture")
+
+    def test_searchers_are_kept_open_until_the_index_changes(self):
+        from . import multilingual_whoosh_backend
+        from .multilingual_whoosh_backend import MultilingualWhooshSearchBackend
+
+        with tempfile.TemporaryDirectory() as path:
+            self.addCleanup(multilingual_whoosh_backend.clear_searchers)
+            backend = MultilingualWhooshSearchBackend("default", PATH=path)
+            backend.setup()
+            with mock.patch.object(multilingual_whoosh_backend, "SEARCHER_CHECK_INTERVAL", 0):
+                searcher = backend.index.searcher()
+                searcher.close()
+                self.assertIs(backend.index.searcher()._searcher, searcher._searcher)
+                self.assertEqual(backend.index.doc_count(), 0)
+
+                backend.write_documents([
+                    {"id": "ideas.idea.1", "django_ct": "ideas.idea", "django_id": "1", "text": "Green roof"},
+                ])
+                self.assertIsNot(backend.index.searcher()._searcher, searcher._searcher)
+                self.assertEqual(backend.index.doc_count(), 1)
+                self.assertEqual(backend.get_segment_count(), 1)
+
+
+class EmbeddedIndexTest(SimpleTestCase):
+    def setUp(self):
+        from .embedded_index import LanguageIndex
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.index = LanguageIndex(directory.name, max_segments=2)
+
+    def get_document(self, pk, text):
+        from .embedded_index import analyze, get_field_term, get_term_positions
+
+        words = analyze(text)
+        terms = collections.Counter(words)
+        terms[get_field_term("django_ct", "ideas.idea")] += 1
+        return {
+            "id": f"ideas.idea.{pk}", "django_ct": "ideas.idea", "django_id": str(pk),
+            "stored": {}, "terms": terms, "positions": get_term_positions(words), "length": len(words),
+        }
+
+    def search(self, query_string):
+        from .embedded_index import parse_query
+
+        hits, page = self.index.search(parse_query(query_string, ["django_ct"]))
+        return [document[2] for score, document in page]
+
+    def test_queries_are_ranked_with_bm25(self):
+        self.index.update([
+            self.get_document(1, "Green roof with plants on a flat roof"),
+            self.get_document(2, "Solar panels on the roof of a long building with a lot of floors"),
+            self.get_document(3, "Bike lanes in the city"),
+        ])
+        self.assertEqual(self.search("roof"), ["1", "2"])
+        self.assertEqual(self.search("roof NOT solar"), ["1"])
+        self.assertEqual(self.search("(city OR solar) -bike"), ["2"])
+        self.assertEqual(self.search('"flat roof"'), ["1"])
+        self.assertEqual(self.search('"roof flat"'), [])
+        self.assertEqual(self.search('"roof of a long"'), ["2"])
+        self.assertEqual(sorted(self.search('django_ct:"ideas.idea"')), ["1", "2", "3"])
+        self.assertEqual(self.search("nothing"), [])
+
+    def test_updates_replace_documents_and_segments_are_merged(self):
+        self.index.update([self.get_document(1, "Green roof"), self.get_document(2, "Solar roof")])
+        self.index.update([self.get_document(1, "Green wall")])
+        self.index.remove(["ideas.idea.2"])
+        self.index.update([self.get_document(3, "Roof garden")])
+
+        self.assertEqual(self.search("roof"), ["3"])
+        self.assertEqual(self.search("green"), ["1"])
+        self.assertEqual(self.search('"roof garden"'), ["3"])
+        snapshot = self.index.get_snapshot()
+        self.assertEqual(len(snapshot.segments), 2)
+        self.assertEqual(snapshot.document_count, 2)
+        self.index.optimize()
+        self.assertEqual([len(segment.documents) for segment, deleted in self.index.get_snapshot().segments], [2])
+        self.assertEqual(self.search('"green wall"'), ["1"])
+        self.assertEqual(self.search('"wall green"'), [])
+
+    def test_writers_read_the_replaced_manifest_with_the_same_version(self):
+        from .embedded_index import LanguageIndex
+
+        other = LanguageIndex(self.index.path, max_segments=2)
+        self.index.update([self.get_document(1, "Green roof")])
+        stale_version = other.get_snapshot().version
+        # the replaced manifest looks unchanged to the other process
+        with mock.patch.object(other, "get_version", return_value=stale_version):
+            self.index.update([self.get_document(2, "Solar roof")])
+            other.update([self.get_document(3, "Roof garden")])
+            hits, page = other.get_snapshot().search(("term", "roof"))
+            self.assertEqual(sorted(document[2] for score, document in page), ["1", "2", "3"])
+        self.assertEqual(sorted(self.search("roof")), ["1", "2", "3"])
+
+    def test_merged_segments_leave_no_files(self):
+        for pk in range(10):
+            self.index.update([self.get_document(pk, f"Roof {pk}")])
+        names = {segment.name for segment, deleted in self.index.get_snapshot().segments}
+        self.assertEqual(len(names), 2)
+        self.assertEqual(
+            sorted(os.listdir(self.index.path)),
+            sorted(
+                ["manifest.json", "write.lock"]
+                + [f"{name}.{extension}" for name in names for extension in ("json", "lengths", "postings", "positions")]
+            ),
+        )
+        self.index.clear()
+        self.assertEqual(sorted(os.listdir(self.index.path)), ["manifest.json", "write.lock"])
+
+
+class EmbeddedBackendTest(TestCase):
+    def test_current_language_is_searched(self):
+        from django.utils import translation
+        from haystack import connections
+        from haystack.query import SearchQuerySet
+        from .benchmarks import temporary_search_indexes
+        from .search_indexes import IdeaIndex
+
+        idea = Idea.objects.create(title="Green roof", content="Plants", picture="ideas/2022/06/idea.jpg")
+        IdeaTranslations.objects.create(idea=idea, language="de", title="Gr\u00fcndach", content="Pflanzen")
+        idea.sync_multilingual_fields()
+        with temporary_search_indexes("embedded"):
+            connections["default"].get_backend().update(IdeaIndex(), IdeaIndex().index_queryset())
+            with translation.override("de"):
+                self.assertEqual(
+                    [result.pk for result in SearchQuerySet().auto_query("gr\u00fcndach")], [str(idea.pk)]
+                )
+            with translation.override("en"):
+                self.assertEqual(SearchQuerySet().auto_query("gr\u00fcndach").count(), 0)
+                self.assertEqual(SearchQuerySet().auto_query("green -plants").count(), 0)
+                self.assertEqual(SearchQuerySet().auto_query("green").count(), 1)
+
+
+
+class AutocompleteIndexTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+        self.index = autocomplete.AutocompleteIndex(self.path, "de", max_delta_entries=4)
+
+    def search(self, query, index=None):
+        return [result["text"] for result in (index or self.index).search(query)]
+
+    def test_titles_and_their_words_are_found_by_prefix(self):
+        self.index.rebuild({
+            "ideas.idea:1": [("Gr\u00fcne D\u00e4cher", "idea", "/de/ideas/1/")],
+            "ideas.idea:2": [("D\u00e4cher mit Solaranlagen", "idea", "/de/ideas/2/")],
+            "category.category:1": [("Stadtg\u00e4rten", "category", "/de/ideas/?category=1")],
+        })
+        # the titles starting with the query come first
+        self.assertEqual(self.search("dach"), ["D\u00e4cher mit Solaranlagen", "Gr\u00fcne D\u00e4cher"])
+        self.assertEqual(self.search("GR\u00dcNE  d"), ["Gr\u00fcne D\u00e4cher"])
+        self.assertEqual(self.search("solar"), ["D\u00e4cher mit Solaranlagen"])
+        self.assertEqual(self.index.search("stadt")[0]["url"], "/de/ideas/?category=1")
+        self.assertEqual(self.search("park"), [])
+        self.assertEqual(self.search(" - "), [])
+
+    def test_updates_are_seen_by_other_processes_and_merged(self):
+        self.index.rebuild({"ideas.idea:1": [("Gr\u00fcne D\u00e4cher", "idea", "/de/ideas/1/")]})
+        # another worker process with its own mapping of the files
+        other_index = autocomplete.AutocompleteIndex(self.path, "de")
+        self.assertEqual(self.search("gr\u00fcn", other_index), ["Gr\u00fcne D\u00e4cher"])
+
+        self.index.update({"ideas.idea:1": [("Gr\u00fcne W\u00e4nde", "idea", "/de/ideas/1/")]})
+        self.index.update({"ideas.idea:2": [("Gr\u00fcnfl\u00e4chen", "idea", "/de/ideas/2/")]})
+        self.assertTrue(os.path.exists(self.index.delta_filename))
+        self.assertEqual(self.search("gr\u00fcn", other_index), ["Gr\u00fcne W\u00e4nde", "Gr\u00fcnfl\u00e4chen"])
+        self.assertEqual(self.search("d\u00e4cher", other_index), [])
+
+        self.index.update({"ideas.idea:1": [], "ideas.idea:3": [("Gr\u00fcnes Dach", "idea", "/de/ideas/3/")]})
+        # the delta got more entries than max_delta_entries
+        self.assertFalse(os.path.exists(self.index.delta_filename))
+        self.assertEqual(self.search("gr\u00fcn", other_index), ["Gr\u00fcnes Dach", "Gr\u00fcnfl\u00e4chen"])
+
+    def test_writers_map_the_replaced_files_with_the_same_version(self):
+        self.index.rebuild({"ideas.idea:1": [("Gr\u00fcne D\u00e4cher", "idea", "/de/ideas/1/")]})
+        other_index = autocomplete.AutocompleteIndex(self.path, "de", max_delta_entries=4)
+        self.index.update({"ideas.idea:2": [("Gr\u00fcnfl\u00e4chen", "idea", "/de/ideas/2/")]})
+        stale_snapshot = other_index.get_snapshot()
+        self.index.update({"ideas.idea:3": [("Gr\u00fcnes Dach", "idea", "/de/ideas/3/")]})
+        # the replaced files look unchanged to the other process
+        stale_snapshot.version = other_index.get_version()
+        other_index.update({"ideas.idea:4": [("Gr\u00fcne W\u00e4nde", "idea", "/de/ideas/4/")]})
+        self.assertEqual(
+            self.search("gr\u00fcn"), ["Gr\u00fcne D\u00e4cher", "Gr\u00fcne W\u00e4nde", "Gr\u00fcnes Dach", "Gr\u00fcnfl\u00e4chen"],
+        )
+
+
+class AutocompleteTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch.object(autocomplete, "PATH", directory.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_json(self, query, lang_code):
+        from django.test import RequestFactory
+        from django.utils import translation
+        from .views import autocomplete_titles
+
+        with translation.override(lang_code):
+            response = autocomplete_titles(RequestFactory().get("/search/autocomplete/", {"q": query}))
+        return json.loads(response.content)
+
+    def test_titles_are_updated_on_save(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            idea = Idea.objects.create(title="Green roof", content="Plants", picture="ideas/2022/06/idea.jpg")
+            IdeaTranslations.objects.create(idea=idea, language="de", title="Gr\u00fcndach", content="Pflanzen")
+            Category.add_root(title="Roof gardens")
+        self.assertEqual(
+            [(result["text"], result["kind"]) for result in self.get_json("roo", "en")["results"]],
+            [("Roof gardens", "category"), ("Green roof", "idea")],
+        )
+        self.assertEqual(self.get_json("grun", "de")["results"][0]["url"], idea.get_url_paths(["de"])["de"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Idea.objects.filter(pk=idea.pk).delete()
+        self.assertEqual([result["text"] for result in self.get_json("roo", "en")["results"]], ["Roof gardens"])
+
+        autocomplete.rebuild(["en"])
+        self.assertEqual(len(self.get_json("roof", "en")["results"]), 1)
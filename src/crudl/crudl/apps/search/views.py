@@ -1,3 +1,81 @@
-from django.shortcuts import render
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404, JsonResponse
+from django.utils.translation import get_language
+from haystack.views import SearchView
+from . import autocomplete, result_cache
 
-# Create your views here.
+MAX_AUTOCOMPLETE_QUERY_LENGTH = 100
+
+
+class CachedSearchResults(object):
+    """
+    The cached results of one page, which can be
+    passed to Paginator instead of the SearchQuerySet
+    """
+    def __init__(self, results, count, offset):
+        self.results = results
+        self.count = count
+        self.offset = offset
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.results[index.start - self.offset:index.stop - self.offset]
+        return self.results[index - self.offset]
+
+
+class CachedSearchView(SearchView):
+    """
+    Haystack search view, which caches the results of each page
+    by the normalized query, language and page number until the
+    search indexes are updated. Concurrent identical searches
+    wait for the first one instead of querying the backend.
+    The view keeps the request and query on the instance, so it's
+    routed with search_view_factory to get an instance per request.
+    """
+    def build_page(self):
+        try:
+            page_number = int(self.request.GET.get("page", 1))
+        except (TypeError, ValueError):
+            raise Http404("Not a valid number for page.")
+
+        cache_key = result_cache.get_cache_key(
+            "haystack",
+            result_cache.get_generation(),
+            get_language(),
+            result_cache.normalize_query(self.query),
+            sorted(self.request.GET.getlist("models")),
+            page_number,
+        )
+
+        def search():
+            paginator, page = super(CachedSearchView, self).build_page()
+            return {"results": list(page.object_list), "count": paginator.count}
+
+        cached = result_cache.get_or_set(cache_key, search)
+        offset = (page_number - 1) * self.results_per_page
+        paginator = Paginator(
+            CachedSearchResults(cached["results"], cached["count"], offset), self.results_per_page
+        )
+        try:
+            page = paginator.page(page_number)
+        except InvalidPage:
+            raise Http404("No such page!")
+        return (paginator, page)
+
+
+def autocomplete_titles(request):
+    """
+    Returns the idea, category and song titles as JSON, which start with
+    the query "q" or have a word starting with it, in the active language.
+    The titles are found in the memory-mapped prefix indexes without
+    querying the database or the search engines.
+    """
+    query = request.GET.get("q", "")[:MAX_AUTOCOMPLETE_QUERY_LENGTH]
+    try:
+        limit = min(max(int(request.GET.get("limit", autocomplete.LIMIT)), 1), autocomplete.LIMIT)
+    except ValueError:
+        limit = autocomplete.LIMIT
+    return JsonResponse({"query": query, "results": autocomplete.search(query, get_language(), limit)})
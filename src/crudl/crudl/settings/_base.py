@@ -44,6 +44,7 @@ INTERNAL_IPS = [
 ]
 
 WSGI_APPLICATION = 'crudl.wsgi.application'
+ASGI_APPLICATION = 'crudl.asgi.application'
 
 # Application definition
 
@@ -102,7 +103,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     #"csp.middleware.CSPMiddleware",
-    "crudl.apps.core.middleware.ThreadLocalMiddleware",
+    "crudl.apps.core.middleware.RequestCacheMiddleware",
 ]
 
 ROOT_URLCONF = 'crudl.urls'
@@ -344,12 +345,24 @@ HAYSTACK_CONNECTIONS = {
     }
 }
 
+# Memory-mapped prefix indexes of the titles for "search/autocomplete/",
+# filled by "manage.py rebuild_autocomplete" and updated on save
+SEARCH_AUTOCOMPLETE_PATH = os.path.join(BASE_DIR, "tmp", "autocomplete")
+
 # Elasticsearch Dsl
 ELASTICSEARCH_DSL={
     'default': {
         'hosts': 'localhost:9200'
     },
 }
+# The indexes are updated by "manage.py process_index_updates"
+# from the queue of crudl.apps.search instead of during the requests
+ELASTICSEARCH_DSL_SIGNAL_PROCESSOR = 'django_elasticsearch_dsl.signals.BaseSignalProcessor'
+
+# Backend of the idea search view. With "crudl.apps.ideas.search.DatabaseIdeaSearch"
+# the ideas are searched in the full-text index of the primary database instead,
+# which is filled by "manage.py rebuild_idea_search_documents" and kept up to date
+IDEA_SEARCH_BACKEND = "crudl.apps.ideas.search.ElasticsearchIdeaSearch"
 
 # CSP Config
 CSP_DEFAULT_SRC = [
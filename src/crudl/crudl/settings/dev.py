@@ -3,4 +3,12 @@ from ._base import *
 DEBUG = True
 WEBSITE_URL = 'http://127.0.0.1:8000'
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
-MEDIA_URL = f"{WEBSITE_URL}/media/"
\ No newline at end of file
+MEDIA_URL = f"{WEBSITE_URL}/media/"
+
+# Full-text search in the process without Elasticsearch
+HAYSTACK_CONNECTIONS = {
+    "default": {
+        "ENGINE": "crudl.apps.search.embedded_backend.EmbeddedEngine",
+        "PATH": os.path.join(BASE_DIR, "tmp", "search_index"),
+    }
+}
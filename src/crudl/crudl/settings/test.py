@@ -1,4 +1,14 @@
 from ._base import *
 
 DEBUG = True
-WEBSITE_URL = 'http://127.0.0.1:8000'
\ No newline at end of file
+WEBSITE_URL = 'http://127.0.0.1:8000'
+
+# Full-text search in the process without Elasticsearch
+HAYSTACK_CONNECTIONS = {
+    "default": {
+        "ENGINE": "crudl.apps.search.embedded_backend.EmbeddedEngine",
+        "PATH": os.path.join(BASE_DIR, "tmp", "search_index_test"),
+    }
+}
+
+SEARCH_AUTOCOMPLETE_PATH = os.path.join(BASE_DIR, "tmp", "autocomplete_test")
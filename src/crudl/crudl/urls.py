@@ -5,21 +5,30 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.shortcuts import redirect
+from django.utils import translation
 from django.contrib.sitemaps import views as sitemaps_views
 from django.contrib.sitemaps import GenericSitemap
 import debug_toolbar
+from haystack.views import search_view_factory
 from crudl.apps.core import views as core_views
 from crudl.apps.external_auth.views import (index, dashboard, logout)
 from crudl.apps.category import views as category_views
+from crudl.apps.search import views as search_views
 from crudl.apps.music.models import Song
 from crudl.apps.music.views import RESTSongList, RESTSongDetail
 
 
 class CrudlSitemap(GenericSitemap):
     limit = 50
+    i18n = True
+    alternates = True
 
     def location(self, obj):
-        return obj.get_url_path()
+        # the language of the item or its alternate is active, and the path
+        # is formatted from the URL templates of core.url_paths without
+        # reversing the URL pattern
+        lang_code = translation.get_language()
+        return obj.get_url_paths([lang_code])[lang_code]
 
 song_info_dict = {
     "queryset": Song.objects.all(),
@@ -47,7 +56,8 @@ urlpatterns += i18n_patterns(
     path("ideas/", include(("crudl.apps.ideas.urls", "ideas"), namespace="ideas")),
     path("news/", include(("crudl.apps.news.urls", "news"), namespace="news")),
     path("locations/", include(("crudl.apps.locations.urls", "locations"), namespace="locations")),
-    path("search/", include("haystack.urls")),
+    path("search/autocomplete/", search_views.autocomplete_titles, name="search_autocomplete"),
+    path("search/", search_view_factory(view_class=search_views.CachedSearchView), name="haystack_search"),
     path("js_settings/", core_views.js_settings, name="js_settings"),
     path("upload-file/", core_views.upload_file, name="upload_file"),
     path("likes/", include(("crudl.apps.likes.urls", "likes"), namespace="likes")),